@@ -0,0 +1,257 @@
+# answer_cache.py
+"""
+Two-tier answer cache for ask_question, scoped per collection.
+
+Tier 1: exact match on normalized question text (no embedding needed).
+Tier 2: near-duplicate match on the query embedding (cosine >= threshold).
+
+Entries expire after a TTL (expired rows are deleted from the file on the
+next write) and the least-recently-used ones are evicted past max_entries.
+Everything is mirrored to a small sqlite file so answers survive restarts;
+invalidate_collection() drops a collection's entries on re-ingest.
+The file also holds a generation counter per collection, bumped on every
+write and invalidation, so a process reloads a collection's entries when
+another process (batch CLI, a second app worker) has changed them.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+ANSWER_CACHE_PATH = os.getenv("FINDOC_ANSWER_CACHE_PATH", os.path.join("data", "answer_cache.sqlite"))
+ANSWER_CACHE_ENABLED = os.getenv("FINDOC_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_TTL_S = float(os.getenv("FINDOC_ANSWER_CACHE_TTL_S", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("FINDOC_ANSWER_CACHE_MAX_ENTRIES", "5000"))
+SIMILARITY_THRESHOLD = float(os.getenv("FINDOC_ANSWER_CACHE_SIMILARITY", "0.95"))
+
+def normalize_question(question: str) -> str:
+    q = re.sub(r"\s+", " ", question.strip().lower())
+    return q.rstrip("?!. ")
+
+def _numbers(text: str):
+    return sorted(re.findall(r"\d+(?:\.\d+)?", text))
+
+class AnswerCache:
+    def __init__(self, path=ANSWER_CACHE_PATH, ttl_s=ANSWER_CACHE_TTL_S,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES, similarity_threshold=SIMILARITY_THRESHOLD):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        # (collection, k, normalized question) -> entry, in LRU order
+        self._entries = OrderedDict()
+        # collection -> sqlite generation its in-memory entries reflect
+        self._generations = {}
+        # (collection, k) -> (keys, unit-normalized embedding matrix); rebuilt lazily
+        self._matrices = {}
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "llm_calls_saved": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " collection TEXT, k INTEGER, question TEXT, embedding BLOB, result TEXT,"
+                " used_llm INTEGER, created_at REAL, PRIMARY KEY (collection, k, question))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS generations (collection TEXT PRIMARY KEY, generation INTEGER)"
+            )
+            self._db.commit()
+
+    # -- persistence -------------------------------------------------------
+    def _db_generation(self, collection) -> int:
+        row = self._db.execute("SELECT generation FROM generations WHERE collection = ?", (collection,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump_generation(self, collection) -> int:
+        self._db.execute(
+            "INSERT INTO generations VALUES (?, 1)"
+            " ON CONFLICT(collection) DO UPDATE SET generation = generation + 1",
+            (collection,)
+        )
+        return self._db_generation(collection)
+
+    def _load_collection(self, collection):
+        """(Re)loads a collection's entries unless memory already matches the sqlite generation."""
+        if self._db is None:
+            return
+        generation = self._db_generation(collection)
+        if self._generations.get(collection) == generation:
+            return
+        self._drop_collection(collection)
+        self._generations[collection] = generation
+        rows = self._db.execute(
+            "SELECT k, question, embedding, result, used_llm, created_at FROM answers"
+            " WHERE collection = ? AND created_at >= ?",
+            (collection, time.time() - self.ttl_s)
+        ).fetchall()
+        for k, question, emb, result, used_llm, created_at in rows:
+            self._entries[(collection, k, question)] = {
+                "embedding": np.frombuffer(emb, dtype=np.float32) if emb else None,
+                "result": json.loads(result),
+                "used_llm": bool(used_llm),
+                "created_at": created_at
+            }
+
+    def _drop_collection(self, collection):
+        for key in [key for key in self._entries if key[0] == collection]:
+            del self._entries[key]
+        for mkey in [mkey for mkey in self._matrices if mkey[0] == collection]:
+            del self._matrices[mkey]
+
+    def _purge_expired(self, now):
+        """Drops expired entries from memory and, for every collection, from the sqlite file."""
+        expired = [key for key, e in self._entries.items() if now - e["created_at"] > self.ttl_s]
+        for key in expired:
+            del self._entries[key]
+            self._matrices.pop(key[:2], None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_s,))
+
+    def _delete_rows(self, keys):
+        if self._db is not None and keys:
+            self._db.executemany("DELETE FROM answers WHERE collection = ? AND k = ? AND question = ?", keys)
+            self._db.commit()
+
+    # -- lookup ------------------------------------------------------------
+    def _expired(self, entry):
+        return time.time() - entry["created_at"] > self.ttl_s
+
+    def _hit(self, key, entry, tier):
+        self._entries.move_to_end(key)
+        self.counters[f"{tier}_hits"] += 1
+        if entry["used_llm"]:
+            self.counters["llm_calls_saved"] += 1
+        return entry["result"], tier
+
+    def get_exact(self, collection, question, k):
+        """Tier 1 only; cheap enough to call before embedding the question."""
+        with self._lock:
+            self._load_collection(collection)
+            key = (collection, k, normalize_question(question))
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry):
+                return self._hit(key, entry, "exact")
+        return None, None
+
+    def _matrix(self, collection, k):
+        cached = self._matrices.get((collection, k))
+        if cached is None:
+            keys = [key for key, e in self._entries.items()
+                    if key[0] == collection and key[1] == k and e["embedding"] is not None]
+            if keys:
+                mat = np.stack([self._entries[key]["embedding"] for key in keys])
+                mat = mat / np.maximum(np.linalg.norm(mat, axis=1, keepdims=True), 1e-12)
+            else:
+                mat = None
+            cached = (keys, mat)
+            self._matrices[(collection, k)] = cached
+        return cached
+
+    def get_semantic(self, collection, question, k, embedding):
+        """
+        Tier 2; counts a miss when nothing is close enough. Near-duplicates must
+        mention the same numbers ("net sales in 2024" never answers "... 2023").
+        """
+        numbers = _numbers(normalize_question(question))
+        with self._lock:
+            self._load_collection(collection)
+            keys, mat = self._matrix(collection, k)
+            if mat is not None:
+                q = np.asarray(embedding, dtype=np.float32)
+                sims = mat @ (q / max(float(np.linalg.norm(q)), 1e-12))
+                for i in np.argsort(-sims):
+                    if sims[i] < self.similarity_threshold:
+                        break
+                    entry = self._entries.get(keys[i])
+                    if entry is not None and not self._expired(entry) and _numbers(keys[i][2]) == numbers:
+                        return self._hit(keys[i], entry, "semantic")
+            self.counters["misses"] += 1
+        return None, None
+
+    def get(self, collection, question, k, embedding):
+        """Returns (result, tier) with tier "exact" or "semantic", or (None, None) on a miss."""
+        result, tier = self.get_exact(collection, question, k)
+        if result is not None:
+            return result, tier
+        return self.get_semantic(collection, question, k, embedding)
+
+    # -- updates -----------------------------------------------------------
+    def put(self, collection, question, k, result, embedding=None, used_llm=False):
+        key = (collection, k, normalize_question(question))
+        emb = np.asarray(embedding, dtype=np.float32) if embedding is not None else None
+        entry = {"embedding": emb, "result": result, "used_llm": used_llm, "created_at": time.time()}
+        with self._lock:
+            self._load_collection(collection)
+            self._purge_expired(entry["created_at"])
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._matrices.pop((collection, k), None)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._matrices.pop(old_key[:2], None)
+                evicted.append(old_key)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (collection, k, key[2], emb.tobytes() if emb is not None else None,
+                     json.dumps(result), int(used_llm), entry["created_at"])
+                )
+                generation = self._bump_generation(collection)
+                self._db.commit()
+                # only our own write happened since the load: memory is still current
+                if generation == self._generations.get(collection, 0) + 1:
+                    self._generations[collection] = generation
+            self._delete_rows(evicted)
+
+    def invalidate_collection(self, collection):
+        with self._lock:
+            self._drop_collection(collection)
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers WHERE collection = ?", (collection,))
+                self._generations[collection] = self._bump_generation(collection)
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["exact_hits"] + self.counters["semantic_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return dict(self.counters, entries=len(self._entries),
+                        hit_rate=(hits / lookups) if lookups else 0.0)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_answer_cache():
+    """Process-wide cache, or None when disabled with FINDOC_ANSWER_CACHE=0."""
+    global _cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache()
+    return _cache
+
+def invalidate_collection(collection):
+    """
+    Drops a collection's cached answers (re-ingest, evicted ingest). With the
+    cache disabled in this process, an existing cache file is still updated,
+    so other processes that use it stop serving answers from the old content.
+    """
+    cache = get_answer_cache()
+    if cache is not None:
+        cache.invalidate_collection(collection)
+    elif ANSWER_CACHE_PATH and os.path.exists(ANSWER_CACHE_PATH):
+        other = AnswerCache(ANSWER_CACHE_PATH)
+        try:
+            other.invalidate_collection(collection)
+        finally:
+            other._db.close()
@@ -1,58 +1,176 @@
 # app.py
 import streamlit as st
-from ingest import ingest_pdf_return_collection
-from rag import ask_question
+from ingest import list_cached_ingests, evict_cached_ingest
+from jobs import get_job, get_job_registry, submit_digests, submit_ingest
+from digests import load_digests
+from rag import ask_question_stream
+from answer_cache import get_answer_cache
+from embedding_cache import get_embedding_cache
 from table_parser import load_tables_metadata
-import os
-import pandas as pd
+import store
+import tracing
+import json
+import time
+import warmup
 
 st.set_page_config(page_title="Financial Document Intelligence", layout="wide")
 st.title("📈 Financial Document Intelligence — Practical Version")
 
+# load the embedding model/tokenizer in the background while the page renders
+warmup.start_warmup()
+
 if "collection_name" not in st.session_state:
     st.session_state["collection_name"] = None
 if "filename_hint" not in st.session_state:
     st.session_state["filename_hint"] = None
+if "ingest_stats" not in st.session_state:
+    st.session_state["ingest_stats"] = {}
+if "upload_jobs" not in st.session_state:
+    # "name:size" of each upload -> background job id
+    st.session_state["upload_jobs"] = {}
+if "seen_jobs" not in st.session_state:
+    st.session_state["seen_jobs"] = set()
+if "digest_jobs" not in st.session_state:
+    # collection name -> background digest job id
+    st.session_state["digest_jobs"] = {}
+
+def show_trace(trace):
+    import pandas as pd
+    rows = [{"stage": name, "ms": round(1000 * s["seconds"], 1), "calls": s["calls"]}
+            for name, s in sorted(trace["spans"].items(), key=lambda kv: -kv[1]["seconds"])]
+    st.write(f"Total: {1000 * trace['total_s']:.0f} ms")
+    if rows:
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    if trace["counters"]:
+        st.write(trace["counters"])
 
-uploaded_file = st.file_uploader("Upload a financial PDF", type=["pdf"])
+uploaded_files = st.file_uploader("Upload financial PDFs", type=["pdf"], accept_multiple_files=True)
 col1, col2 = st.columns([2,1])
 
 with col1:
-    if uploaded_file:
-        st.write(f"Uploaded file: {uploaded_file.name}")
-        with st.spinner("Saving and ingesting document (may take a moment)..."):
-            try:
-                os.makedirs("data/uploads", exist_ok=True)
-                saved_path = os.path.join("data/uploads", uploaded_file.name)
-                uploaded_file.seek(0)
-                with open(saved_path, "wb") as f:
-                    f.write(uploaded_file.read())
+    # ingestion runs on background workers (jobs.py); this rerun only submits and polls
+    for uploaded_file in uploaded_files or []:
+        upload_key = f"{uploaded_file.name}:{uploaded_file.size}"
+        if upload_key not in st.session_state["upload_jobs"]:
+            # deduped by content hash: re-uploads of an ingested file finish immediately
+            st.session_state["upload_jobs"][upload_key] = submit_ingest(
+                uploaded_file.getvalue(), filename_hint=uploaded_file.name
+            )
 
-                collection_name, n_chunks = ingest_pdf_return_collection(saved_path, filename_hint=uploaded_file.name)
+    for job_id in reversed(list(st.session_state["upload_jobs"].values())):
+        job = get_job(job_id)
+        if job is None:
+            continue
+        p = job["progress"]
+        if job["status"] in ("queued", "running"):
+            n_pages = p.get("n_pages") or 0
+            st.progress(
+                min(1.0, p.get("pages_done", 0) / n_pages) if n_pages else 0.0,
+                text=(f"{job['name']}: {job['status']} {p.get('stage', '')} — page {p.get('pages_done', 0)}/{n_pages}, "
+                      f"{p.get('tables_found', 0)} tables, {p.get('chunks', 0)} chunks so far")
+            )
+        elif job["status"] == "failed":
+            st.error(f"{job['name']}: ingestion failed: {job['error']}")
+        else:
+            res = job["result"]
+            collection_name = res["collection_name"]
+            if res.get("digest_job"):
+                st.session_state["digest_jobs"].setdefault(collection_name, res["digest_job"])
+            if job_id not in st.session_state["seen_jobs"]:
+                # newest finished upload becomes the active document
+                st.session_state["seen_jobs"].add(job_id)
                 st.session_state["collection_name"] = collection_name
-                st.session_state["filename_hint"] = uploaded_file.name
-                st.success(f"Ingested {n_chunks} chunks into collection: {collection_name}")
-
-            except Exception as e:
-                st.error(f"Ingestion failed: {e}")
+                st.session_state["filename_hint"] = job["name"]
+                if not res["from_cache"]:
+                    st.session_state["ingest_stats"][collection_name] = res["stats"]
+            if res["from_cache"]:
+                st.write(f"{job['name']}: already ingested ({res['n_chunks']} chunks) — `{collection_name}`")
+            else:
+                st.write(f"{job['name']}: ingested {res['n_chunks']} chunks — `{collection_name}`")
+            if st.session_state["collection_name"] != collection_name:
+                if st.button("Use this document", key=f"use_{job_id}"):
+                    st.session_state["collection_name"] = collection_name
+                    st.session_state["filename_hint"] = job["name"]
+                    st.rerun()
 
 with col2:
     st.markdown("**Session**")
     if st.session_state["collection_name"]:
-        st.write(f"Active collection: `{st.session_state['collection_name']}`")
+        active = st.session_state["collection_name"]
+        st.write(f"Active collection: `{active}`")
+        digest_job = get_job(st.session_state["digest_jobs"].get(active, ""))
+        digest_data = load_digests(active)
+        if digest_job is not None and digest_job["status"] in ("queued", "running"):
+            p = digest_job["progress"]
+            st.caption(f"Building section digests… {p.get('sections_done', 0)}/{p.get('n_sections', '?')} sections")
+        elif digest_data and digest_data.get("sections"):
+            st.caption("Section digests: " + ", ".join(digest_data["sections"]) + " (used for summary questions)")
+        if digest_job is not None and digest_job["status"] == "failed":
+            st.caption(f"Digest build failed: {digest_job['error']}")
+        if not (digest_job and digest_job["status"] in ("queued", "running")):
+            if st.button("Build section digests" if not digest_data else "Refresh section digests"):
+                st.session_state["digest_jobs"][active] = submit_digests(active, name=st.session_state["filename_hint"])
+                st.rerun()
     else:
         st.write("_No document ingested yet_")
 
+    with st.expander("Ingest cache"):
+        cached = list_cached_ingests()
+        if not cached:
+            st.write("_Empty_")
+        for entry in cached:
+            st.write(f"`{entry['filename']}` — {entry['n_chunks']} chunks — `{entry['collection_name']}`")
+            if st.button("Evict", key=f"evict_{entry['key']}"):
+                evict_cached_ingest(entry["key"])
+                if st.session_state["collection_name"] == entry["collection_name"]:
+                    st.session_state["collection_name"] = None
+                st.rerun()
+
+    # per session: passed to each question rather than switching tracing for the whole process
+    st.checkbox("Trace timings", value=tracing.TRACE_ENABLED, key="trace_enabled")
+    if st.session_state["trace_enabled"]:
+        with st.expander("Metrics (Prometheus)"):
+            st.code(tracing.prometheus_text(), language="text")
+
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        c = answer_cache.stats()
+        st.caption(f"Answer cache: {c['exact_hits']} exact / {c['semantic_hits']} semantic hits, "
+                   f"{c['misses']} misses, {c['llm_calls_saved']} LLM calls saved")
+
+    emb_cache = get_embedding_cache()
+    if emb_cache is not None:
+        e = emb_cache.stats()
+        st.caption(f"Embedding cache: {e['entries']} vectors, {e['hit_rate']:.0%} hit rate")
+
+    w = warmup.warmup_status()
+    if w.get("done") and "total_s" in w:
+        st.caption(f"Model warm-up: {w['total_s']:.1f}s" + (" (over budget)" if w["over_budget"] else "")
+                   + (f" — {w['error']}" if w.get("error") else ""))
+
 st.markdown("---")
 
+asked = False
 if not st.session_state.get("collection_name"):
     st.info("Upload a PDF to begin.")
 else:
     # Show document readiness
     st.subheader("Document Readiness Report")
     tables_meta = load_tables_metadata(st.session_state["collection_name"])
-    st.write(f"- Chunks ingested: (see collection name; typical range: 100–200 for 10-Ks)")
+    try:
+        stats = store.collection_stats(st.session_state["collection_name"])
+        st.write(f"- Chunks ingested: {stats['count']}")
+        st.write(f"- Vector store: {stats['mode']} ({stats['store_disk_bytes'] / 1e6:.1f} MB on disk)")
+    except Exception:
+        st.write("- Chunks ingested: unknown (collection not found in store)")
     st.write(f"- Tables extracted: {len(tables_meta)}")
+    ingest_stats = st.session_state["ingest_stats"].get(st.session_state["collection_name"])
+    if ingest_stats:
+        st.write(f"- Ingest time: {ingest_stats['total_s']:.1f}s for {ingest_stats['n_pages']} pages "
+                 f"(parse {ingest_stats['extract_s']:.1f}s, embed {ingest_stats.get('embed_s', 0):.1f}s, "
+                 f"insert {ingest_stats.get('insert_s', 0):.1f}s, tables {ingest_stats['tables_s']:.1f}s)")
+        if ingest_stats.get("embed_cache_hits"):
+            st.write(f"- Chunks reused from the embedding cache: {ingest_stats['embed_cache_hits']}")
     if len(tables_meta) > 0:
         st.markdown("**Preview of extracted tables:**")
         for m in tables_meta[:5]:
@@ -63,6 +181,7 @@ else:
                         preview = json.load(f)
                     st.write(preview)
                 else:
+                    import pandas as pd
                     df = pd.read_csv(m["csv_path"])
                     st.dataframe(df.head(5))
             except Exception:
@@ -70,12 +189,24 @@ else:
 
     st.markdown("---")
     question = st.text_input("Ask a question about the uploaded document", key="question_input")
-    if st.button("Ask") and question:
-        with st.spinner("Retrieving and generating..."):
-            res = ask_question(st.session_state["collection_name"], question, k=8)
+    asked = st.button("Ask") and question
+    if asked:
+        with st.spinner("Retrieving..."):
+            res = ask_question_stream(st.session_state["collection_name"], question, k=8,
+                                      trace=st.session_state["trace_enabled"])
 
         st.subheader("Answer")
-        st.write(res["answer"])
+        # render tokens as they arrive, then swap in the final (number-guarded) answer
+        placeholder = st.empty()
+        streamed = ""
+        for token in res["answer_stream"]:
+            streamed += token
+            placeholder.markdown(streamed + "▌")
+        placeholder.markdown(res["answer"])
+        if res.get("cache"):
+            st.caption(f"Served from answer cache ({res['cache']} match)")
+        if res["llm"].get("ttft_s") is not None:
+            st.caption(f"First token after {res['llm']['ttft_s']:.2f}s · {res['llm'].get('tokens_per_s', 0):.1f} tokens/s")
 
         st.subheader("Retrieved source snippets (transparency)")
         for s in res["sources"]:
@@ -85,5 +216,13 @@ else:
 
         st.subheader("Readiness")
         st.write(res["readiness"])
+        if res.get("trace"):
+            with st.expander("Timings"):
+                show_trace(res["trace"])
 
         st.info("Design note: numeric extractions use deterministic table lookup first; if not possible, verbatim numeric matches from text are returned.")
+
+# poll background ingests; paused on a run that just showed an answer so it isn't wiped
+if get_job_registry().active() and not asked:
+    time.sleep(1.0)
+    st.rerun()
@@ -0,0 +1,50 @@
+# benchmarks/bench_chunking.py
+"""
+Peak memory and throughput of the streaming, page-aware chunker (iter_chunks)
+vs. the old path: build the whole document with `text += page_text`, then
+chunk_text. Pages are extracted up front and excluded from both numbers.
+
+    python -m benchmarks.bench_chunking path/to/10k.pdf
+"""
+import argparse
+import time
+import tracemalloc
+
+from ingest import CHUNK_OVERLAP, CHUNK_SIZE, extract_pages_from_pdf_path
+from utils import chunk_text, get_encoder, iter_chunks
+
+def old_path(pages):
+    text = ""
+    for _, page_text in pages:
+        if page_text:
+            text += page_text + "\n"
+    return len(chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP))
+
+def new_path(pages):
+    return sum(1 for _ in iter_chunks(iter(pages), chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP))
+
+def measure(fn, pages):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    n_chunks = fn(pages)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n_chunks, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf")
+    args = parser.parse_args()
+
+    pages = [(p["page"], p["text"]) for p in extract_pages_from_pdf_path(args.pdf)]
+    doc_bytes = sum(len(t.encode("utf-8")) for _, t in pages)
+    get_encoder()  # load once, outside the measurements
+    print(f"pages: {len(pages)}, document text: {doc_bytes / 1e6:.2f} MB")
+    for label, fn in (("text += / chunk_text", old_path), ("iter_chunks", new_path)):
+        n_chunks, elapsed, peak = measure(fn, pages)
+        print(f"{label:<22} chunks {n_chunks:5d}  {elapsed:6.2f}s  {len(pages) / elapsed:8.1f} pages/s  "
+              f"peak {peak / 1e6:7.2f} MB ({peak / max(doc_bytes, 1):.1f}x doc)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_classifier.py
+"""
+Compiled single-pass classifier vs. the old per-list `x in text` scans, on
+10k chunk-sized texts (synthetic by default, or the chunks of a PDF).
+Also checks that both give identical results.
+
+    python -m benchmarks.bench_classifier
+    python -m benchmarks.bench_classifier --pdf path/to/10k.pdf
+"""
+import argparse
+import random
+import time
+
+from classifier import (
+    BOILERPLATE_MARKERS,
+    NARRATIVE_MARKERS,
+    NUMERIC_INDICATORS,
+    SECTION_KEYWORDS,
+    SECTION_ORDER,
+    SUMMARY_KEYWORDS,
+    classify_section,
+    match_categories,
+    section_from_categories,
+)
+
+FILLER = ("the company reported higher net revenue and gross margin driven by demand across regions "
+          "while expenses increased due to investment in research and development and headcount").split()
+
+def legacy_classify_section(text):
+    t = text.lower()
+    for section in SECTION_ORDER:
+        if any(x in t for x in SECTION_KEYWORDS[section]):
+            return section
+    return "other"
+
+def legacy_flags(text):
+    t = text.lower()
+    return (
+        any(m in t for m in BOILERPLATE_MARKERS),
+        any(m in t for m in NARRATIVE_MARKERS),
+        any(x in t for x in NUMERIC_INDICATORS),
+        any(x in t for x in SUMMARY_KEYWORDS),
+    )
+
+def new_flags(text):
+    c = match_categories(text)
+    return ("boilerplate" in c, "narrative" in c, "numeric" in c, "summary" in c)
+
+def legacy_section_and_flags(text):
+    return (legacy_classify_section(text),) + legacy_flags(text)
+
+def new_section_and_flags(text):
+    c = match_categories(text)
+    return (section_from_categories(c),) + ("boilerplate" in c, "narrative" in c, "numeric" in c, "summary" in c)
+
+def synthetic_chunks(n, words=380, seed=0):
+    rng = random.Random(seed)
+    keywords = [kw for kws in SECTION_KEYWORDS.values() for kw in kws] + BOILERPLATE_MARKERS + NARRATIVE_MARKERS
+    chunks = []
+    for _ in range(n):
+        parts = [rng.choice(FILLER) for _ in range(words)]
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts)), rng.choice(keywords))
+        chunks.append(" ".join(parts))
+    return chunks
+
+def timed(fn, chunks):
+    t0 = time.perf_counter()
+    out = [fn(c) for c in chunks]
+    return time.perf_counter() - t0, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=10_000)
+    parser.add_argument("--pdf")
+    args = parser.parse_args()
+
+    if args.pdf:
+        from ingest import CHUNK_OVERLAP, CHUNK_SIZE, extract_text_from_pdf_path
+        from utils import chunk_text
+        base = chunk_text(extract_text_from_pdf_path(args.pdf), chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+        chunks = [base[i % len(base)] for i in range(args.n)]
+    else:
+        chunks = synthetic_chunks(args.n)
+
+    for label, old, new in (("classify_section", legacy_classify_section, classify_section),
+                            ("context flags", legacy_flags, new_flags),
+                            ("section + flags", legacy_section_and_flags, new_section_and_flags)):
+        t_old, r_old = timed(old, chunks)
+        t_new, r_new = timed(new, chunks)
+        print(f"{label:<17} old {t_old:6.3f}s  new {t_new:6.3f}s  ({t_old / t_new:4.1f}x)  "
+              f"identical: {r_old == r_new}")
+
+if __name__ == "__main__":
+    main()
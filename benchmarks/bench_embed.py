@@ -0,0 +1,81 @@
+# benchmarks/bench_embed.py
+"""
+Embedding + insert throughput for different batch sizes, with and without
+the embed/insert overlap thread. Chunks come from a real PDF. The batch
+sweep runs without the embedding cache; --cache-pdfs times a cold and a warm
+pass through a fresh cache, e.g. over two years of the same company's 10-K.
+
+    python -m benchmarks.bench_embed path/to/10k.pdf --batch-sizes 1 16 64 128
+    python -m benchmarks.bench_embed 10k_2023.pdf --cache-pdfs 10k_2024.pdf
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import embedding_cache
+import store
+from ingest import CHUNK_OVERLAP, CHUNK_SIZE, EMBED_BATCH_SIZE, add_chunks_batched, extract_text_from_pdf_path
+from utils import chunk_text
+
+
+def run(chunks, batch_size, pipeline):
+    name = f"bench_embed_{uuid.uuid4().hex[:8]}"
+    collection = store.get_or_create_collection(name)
+    ids = [f"{name}_{i}" for i in range(len(chunks))]
+    metadatas = [{"chunk_index": i} for i in range(len(chunks))]
+    stats = {}
+    t0 = time.perf_counter()
+    try:
+        add_chunks_batched(collection, chunks, ids, metadatas, batch_size=batch_size, pipeline=pipeline, stats=stats)
+        stats["wall_s"] = time.perf_counter() - t0
+    finally:
+        store.delete_collection(name)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 32, 64, 128])
+    parser.add_argument("--store-mode", choices=["memory", "persistent"], default="memory")
+    parser.add_argument("--cache-pdfs", nargs="*", default=None,
+                        help="after the sweep, ingest the pdf then these through an empty embedding cache")
+    args = parser.parse_args()
+    store.configure(mode=args.store_mode)
+    embedding_cache.EMBEDDING_CACHE_ENABLED = False
+
+    chunks = chunk_text(extract_text_from_pdf_path(args.pdf), chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+    # first call loads the ONNX model; keep it out of the numbers
+    store.get_embedding_function()(chunks[:1])
+    print(f"chunks: {len(chunks)}")
+    print(f"{'batch':>6} {'pipeline':>9} {'embed_s':>9} {'insert_s':>9} {'wall_s':>8} {'chunks/s':>9}")
+    for batch_size in args.batch_sizes:
+        for pipeline in (False, True):
+            s = run(chunks, batch_size, pipeline)
+            print(f"{batch_size:>6} {str(pipeline):>9} {s['embed_s']:>9.2f} {s['insert_s']:>9.2f} "
+                  f"{s['wall_s']:>8.2f} {len(chunks) / s['wall_s']:>9.1f}")
+
+    if args.cache_pdfs is not None:
+        run_cache([args.pdf] + args.cache_pdfs, chunks)
+
+
+def run_cache(pdfs, first_chunks):
+    embedding_cache.EMBEDDING_CACHE_ENABLED = True
+    with tempfile.TemporaryDirectory() as tmp:
+        embedding_cache._cache = embedding_cache.EmbeddingCache(path=os.path.join(tmp, "cache.sqlite"))
+        print(f"\n{'pdf':<32} {'chunks':>7} {'cache hits':>11} {'embed_s':>9} {'wall_s':>8}")
+        # the first pdf twice: cold, then an exact re-ingest
+        for i, pdf in enumerate([pdfs[0]] + pdfs):
+            chunks = first_chunks if i < 2 else chunk_text(
+                extract_text_from_pdf_path(pdf), chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+            s = run(chunks, EMBED_BATCH_SIZE, True)
+            print(f"{os.path.basename(pdf)[:32]:<32} {len(chunks):>7} {s['embed_cache_hits']:>11} "
+                  f"{s['embed_s']:>9.2f} {s['wall_s']:>8.2f}")
+        print(embedding_cache._cache.stats())
+        embedding_cache._cache = None
+
+
+if __name__ == "__main__":
+    main()
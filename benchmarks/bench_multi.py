@@ -0,0 +1,53 @@
+# benchmarks/bench_multi.py
+"""
+Latency of one question over N filings: N sequential single-collection
+queries (retrieval + table lookup per collection) vs. ask_question_multi,
+which fans out concurrently. Numeric questions only, so no LLM is involved.
+
+    python -m benchmarks.bench_multi financial_docs_a_pdf_1 financial_docs_b_pdf_2 ...
+"""
+import argparse
+import statistics
+import time
+
+import rag
+
+DEFAULT_QUESTIONS = [
+    "What was net sales in 2024?",
+    "What was operating income in 2023?",
+    "How much cash and cash equivalents at the end of 2024?",
+    "What was net income?",
+]
+
+def sequential(collection_names, question, k):
+    for name in collection_names:
+        rag.prepare_answer(name, question, k)
+
+def median_latency(fn, questions, rounds):
+    latencies = []
+    for _ in range(rounds):
+        for q in questions:
+            t0 = time.perf_counter()
+            fn(q)
+            latencies.append(time.perf_counter() - t0)
+    return statistics.median(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("collection_names", nargs="+")
+    parser.add_argument("-k", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # warm up the embedder and table indexes so the first row isn't penalised
+    rag.ask_question_multi(args.collection_names, DEFAULT_QUESTIONS[0], args.k)
+
+    print(f"{'filings':>7}  {'sequential':>12}  {'multi':>12}  speedup")
+    for n in range(1, len(args.collection_names) + 1):
+        names = args.collection_names[:n]
+        seq = median_latency(lambda q: sequential(names, q, args.k), DEFAULT_QUESTIONS, args.rounds)
+        multi = median_latency(lambda q: rag.ask_question_multi(names, q, args.k), DEFAULT_QUESTIONS, args.rounds)
+        print(f"{n:>7}  {seq * 1000:>10.1f}ms  {multi * 1000:>10.1f}ms  {seq / multi:6.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/bench_qindex.py
+"""
+Recall@k vs. memory for the two retrieval backends (store.RETRIEVAL_BACKEND):
+Chroma's HNSW index and the int8 memory-mapped index (quantized_index.py),
+with and without the exact float re-rank.
+
+Builds a persistent store of synthetic filings (clustered 384-d unit vectors,
+like MiniLM embeddings of boilerplate-heavy 10-Ks), then serves the same
+queries against every filing from a fresh process per backend and reports
+  - recall@k against exact float brute force
+  - RSS growth after every filing was queried once (what stays resident)
+  - on-disk bytes of the vector data and p50/p95 query latency
+
+    python -m benchmarks.bench_qindex --filings 50 --chunks 400 --queries 20
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SECTIONS = ["business", "risk", "mdna", "financials", "other"]
+
+def rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def synthetic_filing(rng, centers, n_chunks, dim):
+    """Chunk vectors drawn around shared topic centers, plus section labels."""
+    topics = rng.integers(0, len(centers), n_chunks)
+    vectors = centers[topics] + rng.normal(scale=0.6 / np.sqrt(dim), size=(n_chunks, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    sections = rng.choice(SECTIONS, n_chunks)
+    return vectors.astype(np.float32), sections
+
+def build(workdir, filings, chunks, dim, queries, seed):
+    import quantized_index
+    import store
+    store.configure(mode="persistent", path=os.path.join(workdir, "chroma"))
+    quantized_index.QINDEX_ROOT = os.path.join(workdir, "qindex")
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    truth = {}
+    for f in range(filings):
+        name = f"filing_{f:05d}"
+        vectors, sections = synthetic_filing(rng, centers, chunks, dim)
+        collection = store.get_client().create_collection(name)
+        for start in range(0, chunks, 1000):
+            end = min(chunks, start + 1000)
+            collection.add(
+                ids=[f"{name}_{i}" for i in range(start, end)],
+                embeddings=vectors[start:end].tolist(),
+                documents=[f"chunk {i}" for i in range(start, end)],
+                metadatas=[{"section": str(sections[i]), "chunk_index": i, "has_numbers": bool(i % 2)}
+                           for i in range(start, end)]
+            )
+        quantized_index.build_index(name)
+        # queries: perturbed chunks of the filing itself
+        qs = vectors[rng.integers(0, chunks, queries)] + rng.normal(scale=0.8 / np.sqrt(dim), size=(queries, dim))
+        qs /= np.linalg.norm(qs, axis=1, keepdims=True)
+        truth[name] = {"queries": qs.tolist(), "vectors": vectors, "sections": sections}
+    return truth
+
+def exact_top_k(vectors, sections, q, k, where_sections=None):
+    scores = vectors @ np.asarray(q, dtype=np.float32)
+    if where_sections is not None:
+        scores = np.where(np.isin(sections, where_sections), scores, -np.inf)
+    return set(np.argsort(-scores)[:k].tolist())
+
+def serve(workdir, backend, k, rerank, where_sections):
+    """Runs in a fresh process: queries every filing once, prints a JSON report."""
+    import quantized_index
+    import store
+    store.configure(mode="persistent", path=os.path.join(workdir, "chroma"), retrieval_backend=backend)
+    quantized_index.QINDEX_ROOT = os.path.join(workdir, "qindex")
+    quantized_index.MAX_OPEN_INDEXES = 1 << 30
+    with open(os.path.join(workdir, "queries.json")) as f:
+        queries = json.load(f)
+    where = {"section": {"$in": where_sections}} if where_sections else None
+
+    # the chromadb import itself is not what's being compared
+    store.get_client()
+    rss0 = rss_bytes()
+    latencies, results = [], {}
+    for name, qs in queries.items():
+        collection = store.get_collection(name) if backend == "chroma" else None
+        ids = []
+        for q in qs:
+            t0 = time.perf_counter()
+            if backend == "chroma":
+                res = collection.query(query_embeddings=[q], n_results=k, **({"where": where} if where else {}))
+            else:
+                res = quantized_index.query(name, q, k=k, where=where, rerank=rerank)
+            latencies.append(time.perf_counter() - t0)
+            ids.append([int(i.rsplit("_", 1)[1]) for i in res["ids"][0]])
+        results[name] = ids
+    print(json.dumps({"rss_growth": rss_bytes() - rss0, "latencies": latencies, "results": results}))
+
+def run_backend(workdir, backend, k, rerank, where_sections):
+    cmd = [sys.executable, "-m", "benchmarks.bench_qindex", "--serve", backend, "--workdir", workdir,
+           "--k", str(k), "--rerank", str(rerank)]
+    if where_sections:
+        cmd += ["--where-sections", *where_sections]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def _dir_bytes(path, names=None):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files if names is None or f in names)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filings", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=400, help="chunks per filing")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20, help="queries per filing")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rerank", type=int, default=4)
+    parser.add_argument("--where-sections", nargs="*", default=None,
+                        help="also filter on section, e.g. business mdna")
+    parser.add_argument("--serve", choices=["chroma", "quantized"], help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.workdir, args.serve, args.k, args.rerank, args.where_sections)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="findoc_qindex_")
+    try:
+        t0 = time.perf_counter()
+        truth = build(workdir, args.filings, args.chunks, args.dim, args.queries, args.seed)
+        with open(os.path.join(workdir, "queries.json"), "w") as f:
+            json.dump({name: t["queries"] for name, t in truth.items()}, f)
+        n = args.filings * args.chunks
+        print(f"{args.filings} filings x {args.chunks} chunks ({n} vectors, dim {args.dim}), "
+              f"built in {time.perf_counter() - t0:.1f}s; k={args.k}, where sections={args.where_sections}")
+
+        runs = [("chroma hnsw", "chroma", 0), ("int8", "quantized", 0),
+                (f"int8 + rerank x{args.rerank}", "quantized", args.rerank)]
+        print(f"{'backend':>18} {'recall@k':>9} {'rss MB':>8} {'p50 ms':>7} {'p95 ms':>7}")
+        for label, backend, rerank in runs:
+            report = run_backend(workdir, backend, args.k, rerank, args.where_sections)
+            hits = total = 0
+            for name, ids in report["results"].items():
+                t = truth[name]
+                for q, got in zip(t["queries"], ids):
+                    expected = exact_top_k(t["vectors"], t["sections"], q, args.k, args.where_sections)
+                    hits += len(expected & set(got))
+                    total += len(expected)
+            lat = np.asarray(report["latencies"]) * 1000
+            print(f"{label:>18} {hits / total:>9.3f} {report['rss_growth'] / 2**20:>8.1f} "
+                  f"{np.percentile(lat, 50):>7.2f} {np.percentile(lat, 95):>7.2f}")
+
+        print(f"float32 vectors: {n * args.dim * 4 / 2**20:.1f} MB; "
+              f"int8 codes + scales: {_dir_bytes(os.path.join(workdir, 'qindex'), {'codes.npy', 'scales.npy'}) / 2**20:.1f} MB; "
+              f"chroma store on disk: {_dir_bytes(os.path.join(workdir, 'chroma')) / 2**20:.1f} MB; "
+              f"qindex on disk: {_dir_bytes(os.path.join(workdir, 'qindex')) / 2**20:.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
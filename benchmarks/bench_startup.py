@@ -0,0 +1,96 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start cost: import time of the main modules in a fresh interpreter
+(median of N), the app's first render (streamlit AppTest), and the
+embedding model/tokenizer warm-up against FINDOC_COLD_START_BUDGET_S.
+
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --out startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["store", "ingest", "rag", "jobs", "app_imports"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app.py runs streamlit calls at import, so "app_imports" times its import lines instead
+_APP_IMPORTS = (
+    "import streamlit, ingest, jobs, rag, answer_cache, table_parser, store, tracing, warmup"
+)
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+{stmt}
+print(time.perf_counter() - t0)
+"""
+
+_WARMUP_SNIPPET = """
+import json, warmup
+print(json.dumps(warmup.warm_up()))
+"""
+
+_APP_SNIPPET = """
+import time
+from streamlit.testing.v1 import AppTest
+t0 = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120).run()
+print(time.perf_counter() - t0, len(at.exception))
+"""
+
+def _python(code: str, env=None) -> str:
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                         check=True, env=env)
+    return out.stdout.strip().splitlines()[-1]
+
+def import_time(module: str, repeat: int) -> dict:
+    stmt = _APP_IMPORTS if module == "app_imports" else f"import {module}"
+    times = [float(_python(_IMPORT_SNIPPET.format(stmt=stmt))) for _ in range(repeat)]
+    return {"median_s": statistics.median(times), "min_s": min(times), "max_s": max(times)}
+
+def app_first_render() -> dict:
+    # warm-up off so the render isn't competing with the model load
+    env = dict(os.environ, FINDOC_WARMUP="0")
+    seconds, n_exceptions = _python(_APP_SNIPPET, env=env).split()
+    return {"seconds": float(seconds), "exceptions": int(n_exceptions)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-app", action="store_true", help="don't time the streamlit first render")
+    parser.add_argument("--skip-warmup", action="store_true", help="don't load the embedding model")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    result = {"imports": {}}
+    print(f"{'module':<14} {'median_s':>9} {'min_s':>8} {'max_s':>8}")
+    for module in MODULES:
+        r = import_time(module, args.repeat)
+        result["imports"][module] = r
+        print(f"{module:<14} {r['median_s']:>9.3f} {r['min_s']:>8.3f} {r['max_s']:>8.3f}")
+
+    if not args.skip_app:
+        result["app_first_render"] = app_first_render()
+        print(f"\napp first render: {result['app_first_render']['seconds']:.2f}s "
+              f"({result['app_first_render']['exceptions']} exceptions)")
+
+    if not args.skip_warmup:
+        w = json.loads(_python(_WARMUP_SNIPPET))
+        result["warmup"] = w
+        print("\nwarm-up: " + ", ".join(f"{k} {v:.2f}s" for k, v in w.items() if k.endswith("_s")))
+        if w.get("error"):
+            print(f"warm-up failed: {w['error']}")
+        budget = float(os.getenv("FINDOC_COLD_START_BUDGET_S", "10"))
+        print(f"cold-start budget {budget:.1f}s: {'EXCEEDED' if w['over_budget'] else 'ok'}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nwrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_tables.py
+"""
+Numeric-lane questions/sec against an ingested collection, with the table
+index cold (rebuilt per question: every CSV re-read, as before the index)
+vs. warm (cached).
+
+    python -m benchmarks.bench_tables financial_docs_apple_10k_pdf_3f2a9c81d04e
+"""
+import argparse
+import time
+
+from table_parser import answer_numeric_question_from_tables, invalidate_table_index
+
+DEFAULT_QUESTIONS = [
+    "What was net sales in 2024?",
+    "What was operating income in 2023?",
+    "How much cash and cash equivalents at the end of 2024?",
+    "What was net income?",
+    "What was diluted EPS in 2022?",
+    "What was free cash flow?",
+    "Total revenue 2023",
+    "Research and development expense 2024",
+]
+
+
+def run(collection_name, questions, rounds, cold):
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for q in questions:
+            if cold:
+                invalidate_table_index(collection_name)
+            answer_numeric_question_from_tables(collection_name, q)
+            n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("collection_name")
+    parser.add_argument("--questions-file", help="one question per line")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions_file:
+        with open(args.questions_file, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    cold = run(args.collection_name, questions, args.rounds, cold=True)
+    warm = run(args.collection_name, questions, args.rounds, cold=False)
+    print(f"cold (re-read CSVs): {cold:8.1f} questions/sec")
+    print(f"warm (table index) : {warm:8.1f} questions/sec  ({warm / cold:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_triage.py
+"""
+Page triage (page_triage.py) on a labeled set: for each threshold, pages whose
+table detection is skipped, the time saved, and the recall lost, against
+  - labeled table pages: the generator's ground truth for synthetic filings
+  - detected tables: what full detection finds on every page (also for
+    real PDFs given on the command line)
+
+Synthetic filings mix fully ruled, header-ruled and unruled tables (the
+unruled ones are not found by pdfplumber even without triage).
+
+    python -m benchmarks.bench_triage --pages 80 --seeds 0 1 2
+    python -m benchmarks.bench_triage path/to/10k.pdf --thresholds 0.2 0.3 0.4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic_pdf import generate_10k_pdf
+from ingest import _extract_page_tables
+from page_triage import TABLE_TRIAGE_THRESHOLD, table_score
+
+def profile_pages(path, labeled_pages=None):
+    """Per page: triage score and its cost, full-detection cost and table count."""
+    import pdfplumber
+    rows = []
+    with pdfplumber.open(path) as pdf:
+        for pageno, page in enumerate(pdf.pages, start=1):
+            text = page.extract_text() or ""
+            t0 = time.perf_counter()
+            score = table_score(page, text)
+            score_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            n_tables = len(_extract_page_tables(page, pageno))
+            detect_s = time.perf_counter() - t0
+            rows.append({
+                "score": score, "score_s": score_s, "detect_s": detect_s, "n_tables": n_tables,
+                "labeled": None if labeled_pages is None else pageno in labeled_pages
+            })
+            page.close()
+    return rows
+
+def evaluate(rows, threshold):
+    kept = [r for r in rows if threshold <= 0 or r["score"] >= threshold]
+    skipped = [r for r in rows if not (threshold <= 0 or r["score"] >= threshold)]
+    labeled = [r for r in rows if r["labeled"]]
+    n_tables = sum(r["n_tables"] for r in rows)
+    full_s = sum(r["detect_s"] for r in rows)
+    # threshold 0 is how triage is switched off: nothing is scored
+    triaged_s = full_s if threshold <= 0 else sum(r["score_s"] for r in rows) + sum(r["detect_s"] for r in kept)
+    return {
+        "threshold": threshold,
+        "pages_skipped": len(skipped),
+        "tables_lost": sum(r["n_tables"] for r in skipped),
+        "table_recall": 1 - sum(r["n_tables"] for r in skipped) / n_tables if n_tables else None,
+        "labeled_recall": sum(bool(r["labeled"]) for r in kept) / len(labeled) if labeled else None,
+        "full_s": full_s,
+        "triaged_s": triaged_s,
+    }
+
+def _pct(x):
+    return "   n/a" if x is None else f"{x:6.1%}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", help="real filings (scored against full detection only)")
+    parser.add_argument("--pages", type=int, default=80, help="pages per synthetic filing (0 = none)")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=sorted({0.0, 0.2, 0.3, 0.4, 0.5, TABLE_TRIAGE_THRESHOLD}))
+    args = parser.parse_args()
+
+    rows = []
+    workdir = tempfile.mkdtemp(prefix="findoc_triage_")
+    try:
+        if args.pages:
+            for seed in args.seeds:
+                path = os.path.join(workdir, f"synthetic_{seed}.pdf")
+                facts = generate_10k_pdf(path, args.pages, seed, table_styles=("grid", "rules", "none"))
+                rows.extend(profile_pages(path, {f["page"] for f in facts}))
+        for path in args.pdfs:
+            rows.extend(profile_pages(path))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"pages: {len(rows)}, labeled table pages: {sum(bool(r['labeled']) for r in rows)}, "
+          f"detected tables: {sum(r['n_tables'] for r in rows)}")
+    print(f"{'threshold':>9} {'skipped':>8} {'tables lost':>12} {'table recall':>13} {'labeled recall':>15} "
+          f"{'detect_s':>9} {'triaged_s':>10}")
+    for threshold in args.thresholds:
+        e = evaluate(rows, threshold)
+        print(f"{threshold:>9.2f} {e['pages_skipped']:>8} {e['tables_lost']:>12} {_pct(e['table_recall']):>13} "
+              f"{_pct(e['labeled_recall']):>15} {e['full_s']:>9.3f} {e['triaged_s']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
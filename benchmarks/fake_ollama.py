@@ -0,0 +1,107 @@
+# benchmarks/fake_ollama.py
+"""
+Local stand-in for Ollama's /api/generate, for exercising the streaming
+client and load scripts without a model. Streams NDJSON like the real server.
+
+    python -m benchmarks.fake_ollama --port 11435 --ttft 0.3 --tokens-per-sec 40
+    OLLAMA_URL=http://127.0.0.1:11435/api/generate streamlit run app.py
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "- The company designs and sells consumer hardware, software and services.\n"
+    "- Management highlights services growth and supply-chain risk."
+)
+
+def make_handler(answer, ttft, tokens_per_sec, status=200, disconnect_after=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if status != 200:
+                self.send_error(status)
+                return
+            tokens = [w + " " for w in answer.split(" ")]
+            if not body.get("stream", True):
+                time.sleep(ttft + len(tokens) / tokens_per_sec)
+                self._send_json({"model": body.get("model"), "response": answer, "done": True})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            t0 = time.perf_counter()
+            time.sleep(ttft)
+            t_gen = time.perf_counter()
+            for i, tok in enumerate(tokens):
+                if disconnect_after is not None and i >= disconnect_after:
+                    # drop the connection mid-body, like a crashed model server
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                self._write_chunk({"model": body.get("model"), "response": tok, "done": False})
+                time.sleep(1.0 / tokens_per_sec)
+            self._write_chunk({
+                "model": body.get("model"), "response": "", "done": True,
+                "eval_count": len(tokens),
+                "eval_duration": int((time.perf_counter() - t_gen) * 1e9),
+                "total_duration": int((time.perf_counter() - t0) * 1e9)
+            })
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, obj):
+            data = (json.dumps(obj) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _send_json(self, obj):
+            data = json.dumps(obj).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+def start_fake_ollama(port=0, answer=DEFAULT_ANSWER, ttft=0.2, tokens_per_sec=50.0, status=200,
+                      disconnect_after=None):
+    """
+    Starts the server on a daemon thread; returns (server, url). `status`
+    other than 200 fails every request with it; `disconnect_after` drops the
+    connection after that many streamed tokens.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(answer, ttft, tokens_per_sec, status, disconnect_after))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    args = parser.parse_args()
+    server, url = start_fake_ollama(args.port, ttft=args.ttft, tokens_per_sec=args.tokens_per_sec)
+    print(f"fake Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
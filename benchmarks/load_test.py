@@ -0,0 +1,79 @@
+# benchmarks/load_test.py
+"""
+Question-answering throughput at N concurrent users against a stubbed LLM
+(benchmarks.fake_ollama). Compares serial ask_question with the async API.
+
+    python -m benchmarks.load_test financial_docs_apple_10k_pdf_3f2a9c81d04e --users 1 4 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import rag
+from benchmarks.fake_ollama import start_fake_ollama
+
+QUESTIONS = [
+    "Describe the company's business strategy.",
+    "What are the main risk factors?",
+    "What was net sales in 2024?",
+    "How did results of operations change?",
+    "What was operating income?",
+    "Describe the segments the company operates in.",
+]
+
+def run_serial(collection_name, questions):
+    latencies = []
+    t0 = time.perf_counter()
+    for q in questions:
+        t = time.perf_counter()
+        rag.ask_question(collection_name, q, use_cache=False)
+        latencies.append(time.perf_counter() - t)
+    return time.perf_counter() - t0, latencies
+
+async def run_async(collection_name, questions, users, max_concurrent_llm):
+    semaphore = asyncio.Semaphore(max_concurrent_llm)
+    queue = asyncio.Queue()
+    for q in questions:
+        queue.put_nowait(q)
+    latencies = []
+
+    async def user():
+        while not queue.empty():
+            q = queue.get_nowait()
+            t = time.perf_counter()
+            await rag.ask_question_async(collection_name, q, llm_semaphore=semaphore, use_cache=False)
+            latencies.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    return time.perf_counter() - t0, latencies
+
+def report(label, elapsed, latencies):
+    lat = sorted(latencies)
+    p95 = lat[min(len(lat) - 1, int(0.95 * len(lat)))]
+    print(f"{label:<22} {len(lat) / elapsed:8.2f} q/s   p50 {statistics.median(lat):6.2f}s   p95 {p95:6.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("collection_name")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--questions", type=int, default=48, help="total questions per run")
+    parser.add_argument("--max-concurrent-llm", type=int, default=rag.MAX_CONCURRENT_LLM)
+    parser.add_argument("--llm-ttft", type=float, default=0.3)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=40.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_ollama(ttft=args.llm_ttft, tokens_per_sec=args.llm_tokens_per_sec)
+    rag.OLLAMA_URL = url
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    try:
+        report("serial", *run_serial(args.collection_name, questions))
+        for users in args.users:
+            report(f"async users={users}", *asyncio.run(
+                run_async(args.collection_name, questions, users, args.max_concurrent_llm)))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
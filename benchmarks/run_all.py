@@ -0,0 +1,212 @@
+# benchmarks/run_all.py
+"""
+End-to-end benchmark on synthetic 10-K PDFs (benchmarks.synthetic_pdf):
+times every stage from extraction to ask_question (with the stubbed LLM from
+benchmarks.fake_ollama) for each page count and writes the results as JSON.
+
+    python -m benchmarks.run_all --pages 40 200 --out bench_results.json
+    python -m benchmarks.run_all --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+
+import checkpoints
+import embedding_cache
+import ingest
+import ingest_cache
+import rag
+import store
+from benchmarks.fake_ollama import start_fake_ollama
+from benchmarks.synthetic_pdf import generate_10k_pdf
+from table_parser import find_best_table_and_column, invalidate_table_index, lookup_value_in_table
+from utils import chunk_text, get_encoder
+
+NARRATIVE_QUESTIONS = [
+    "Describe the company's business strategy.",
+    "What are the main risk factors?",
+    "How did results of operations change?",
+    "Summarize the segments the company operates in.",
+]
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+def latency_stats(latencies):
+    lat = sorted(latencies)
+    return {
+        "n": len(lat),
+        "total_s": sum(lat),
+        "mean_ms": 1000 * statistics.fmean(lat),
+        "p50_ms": 1000 * statistics.median(lat),
+        "p95_ms": 1000 * lat[min(len(lat) - 1, int(0.95 * len(lat)))]
+    }
+
+def _digits(s) -> str:
+    return "".join(ch for ch in str(s) if ch.isdigit())
+
+def numeric_questions(facts, n, seed):
+    rng = random.Random(seed)
+    sample = rng.sample(facts, min(n, len(facts)))
+    return [(f"What was {f['label']} in {f['period']}?", f) for f in sample]
+
+def run_one(pages, args, llm_url):
+    stages = {}
+    workdir = tempfile.mkdtemp(prefix="findoc_bench_")
+    pdf_path = os.path.join(workdir, f"synthetic_{pages}p.pdf")
+    collection_name = None
+    try:
+        facts, dt = timed(generate_10k_pdf, pdf_path, pages, args.seed)
+        stages["generate"] = {"seconds": dt, "n_facts": len(facts)}
+
+        text, dt = timed(ingest.extract_text_from_pdf_path, pdf_path)
+        stages["extract_text_from_pdf_path"] = {"seconds": dt, "n_chars": len(text)}
+
+        tables, dt = timed(ingest.extract_tables_from_pdf_path, pdf_path)
+        stages["extract_tables_from_pdf_path"] = {"seconds": dt, "n_tables": len(tables)}
+
+        chunks, dt = timed(chunk_text, text, chunk_size=ingest.CHUNK_SIZE, overlap=ingest.CHUNK_OVERLAP)
+        stages["chunk_text"] = {"seconds": dt, "n_chunks": len(chunks)}
+
+        # embed + insert on its own, into a throwaway collection
+        scratch = f"bench_embed_{uuid.uuid4().hex[:8]}"
+        embed_stats = {}
+        try:
+            _, dt = timed(ingest.add_chunks_batched, store.get_or_create_collection(scratch), chunks,
+                          [f"{scratch}_{i}" for i in range(len(chunks))],
+                          [{"chunk_index": i} for i in range(len(chunks))], stats=embed_stats)
+        finally:
+            store.delete_collection(scratch)
+        stages["embed_insert"] = dict(embed_stats, seconds=dt, chunks_per_s=len(chunks) / dt if dt else None)
+
+        # full pipeline; its collection serves the query stages below
+        ingest_stats = {}
+        (collection_name, _), dt = timed(ingest.ingest_pdf_return_collection, pdf_path,
+                                         filename_hint=f"synthetic_{pages}p.pdf", stats=ingest_stats)
+        stages["ingest_pdf_return_collection"] = dict(ingest_stats, seconds=dt)
+
+        questions = numeric_questions(facts, args.questions, args.seed)
+        find_lat, lookup_lat, hits = [], [], 0
+        for q, fact in questions:
+            best, dt = timed(find_best_table_and_column, collection_name, q)
+            find_lat.append(dt)
+            if best is None:
+                continue
+            found, dt = timed(lookup_value_in_table, best, q)
+            lookup_lat.append(dt)
+            hits += bool(found) and _digits(found["value"]) == _digits(fact["raw"])
+        stages["find_best_table_and_column"] = latency_stats(find_lat)
+        stages["lookup_value_in_table"] = dict(latency_stats(lookup_lat) if lookup_lat else {"n": 0},
+                                              accuracy=hits / len(questions) if questions else None)
+
+        rag.OLLAMA_URL = llm_url
+        numeric_lat, narrative_lat, hits = [], [], 0
+        for q, fact in questions:
+            res, dt = timed(rag.ask_question, collection_name, q, use_cache=False)
+            numeric_lat.append(dt)
+            hits += _digits(fact["raw"]) in _digits(res["answer"].split("Source:")[0])
+        for q in NARRATIVE_QUESTIONS * args.rounds:
+            _, dt = timed(rag.ask_question, collection_name, q, use_cache=False)
+            narrative_lat.append(dt)
+        stages["ask_question_numeric"] = dict(latency_stats(numeric_lat), accuracy=hits / len(questions))
+        stages["ask_question_narrative"] = latency_stats(narrative_lat)
+
+        return {"pages": pages, "pdf_bytes": os.path.getsize(pdf_path), "stages": stages}
+    finally:
+        if collection_name:
+            with open(pdf_path, "rb") as f:
+                checkpoints.delete_manifest(ingest_cache.compute_cache_key(f.read(), ingest.ingest_config()))
+            store.delete_collection(collection_name)
+            shutil.rmtree(ingest.tables_dir_for(collection_name), ignore_errors=True)
+            invalidate_table_index(collection_name)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _headline(stage: dict):
+    """The number compared between runs: wall seconds, or p50 for per-question stages."""
+    return stage["seconds"] if "seconds" in stage else stage.get("p50_ms", 0) / 1000
+
+def compare(before_path, after_path):
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = {r["pages"]: r for r in json.load(f)["runs"]}
+    with open(after_path, "r", encoding="utf-8") as f:
+        after = {r["pages"]: r for r in json.load(f)["runs"]}
+    for pages in sorted(set(before) & set(after)):
+        print(f"\n{pages} pages")
+        print(f"  {'stage':<32} {'before_s':>10} {'after_s':>10} {'speedup':>8}")
+        for name, stage in after[pages]["stages"].items():
+            if name not in before[pages]["stages"]:
+                continue
+            b, a = _headline(before[pages]["stages"][name]), _headline(stage)
+            print(f"  {name:<32} {b:>10.4f} {a:>10.4f} {(b / a if a else float('inf')):>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[40, 120])
+    parser.add_argument("--questions", type=int, default=30, help="numeric questions sampled per run")
+    parser.add_argument("--rounds", type=int, default=2, help="passes over the narrative questions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store-mode", choices=["memory", "persistent"], default="memory")
+    parser.add_argument("--llm-ttft", type=float, default=0.0)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=1000.0)
+    parser.add_argument("--embedding-cache", action="store_true",
+                        help="keep the embedding cache on (the pipeline then reuses the embed stage's vectors)")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="print stage speedups and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    store.configure(mode=args.store_mode)
+    embedding_cache.EMBEDDING_CACHE_ENABLED = args.embedding_cache
+    # first calls load the ONNX model and tokenizer; keep them out of the numbers
+    store.get_embedding_function()(["warm up"])
+    get_encoder()
+    server, url = start_fake_ollama(ttft=args.llm_ttft, tokens_per_sec=args.llm_tokens_per_sec)
+    try:
+        runs = []
+        for pages in args.pages:
+            run = run_one(pages, args, url)
+            runs.append(run)
+            print(f"{pages} pages:")
+            for name, stage in run["stages"].items():
+                extra = f"  accuracy {stage['accuracy']:.0%}" if stage.get("accuracy") is not None else ""
+                print(f"  {name:<32} {_headline(stage):>9.4f}s{extra}")
+    finally:
+        server.shutdown()
+
+    result = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "compare"}
+        },
+        "runs": runs
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nwrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# benchmarks/synthetic_pdf.py
+"""
+Offline generator for 10-K-like PDFs: narrative sections (business, risk
+factors, MD&A), audit / internal-control boilerplate and ruled financial
+tables (income statement, balance sheet, cash flows, segments), at any page
+count. Output is deterministic for a given seed, and every table value is
+returned as ground truth so lookups can be scored.
+
+Needs reportlab (benchmark-only, not in requirements.txt):
+
+    pip install reportlab
+    python -m benchmarks.synthetic_pdf out.pdf --pages 120
+"""
+import argparse
+import random
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:  # optional: only the benchmarks need it
+    SimpleDocTemplate = None
+
+COMPANY = "Northwind Devices, Inc."
+
+# one unit per page; tables make up ~3/8 of the pages, like a real 10-K's back half
+PAGE_CYCLE = ["business", "risk", "mdna", "table", "mdna", "table", "audit", "table"]
+
+BUSINESS = [
+    "{c} designs, manufactures and markets consumer devices, software and related services.",
+    "Our business model combines hardware sales with recurring services revenue across our segments.",
+    "We operate in the Americas, Europe, Greater China, Japan and Rest of Asia Pacific.",
+    "Products are sold through our retail and online stores, direct sales force and resellers.",
+    "Our strategy focuses on integrated products and services that differentiate our customer experience.",
+    "Services include advertising, cloud, digital content, payment and extended warranty offerings.",
+]
+RISK = [
+    "The Company's business is subject to risks and uncertainties, including those described below.",
+    "Global economic conditions could materially adversely affect the Company's results.",
+    "The Company depends on component suppliers, many of which are single or limited sources.",
+    "Forward-looking statements in this report involve risks that could cause actual results to differ.",
+    "Changes in tax rates or exposure to additional tax liabilities could affect the Company's financial condition.",
+    "Competition in the markets the Company serves is intense and characterised by rapid technological change.",
+]
+MDNA = [
+    "Management's Discussion and Analysis of Financial Condition and Results of Operations.",
+    "Net sales increased {p}% compared to the prior year, driven by higher services and device revenue.",
+    "Gross margin percentage was {g}%, reflecting a favourable mix and cost savings.",
+    "Operating expenses grew {o}% due to higher research and development headcount.",
+    "Results of operations reflect continued growth in our installed base of active devices.",
+    "Foreign currency movements had an unfavourable impact on segment performance during the year.",
+]
+AUDIT = [
+    "Report of Independent Registered Public Accounting Firm.",
+    "We have audited the accompanying consolidated balance sheets of {c} and the related consolidated "
+    "statements of operations, comprehensive income, shareholders' equity and cash flows.",
+    "In our opinion, the financial statements present fairly, in all material respects, the financial position "
+    "of the Company in conformity with U.S. generally accepted accounting principles.",
+    "We also have audited the Company's internal control over financial reporting based on criteria established "
+    "in Internal Control - Integrated Framework issued by COSO.",
+    "These financial statements are the responsibility of the Company's management. The XBRL instance document "
+    "is filed as an exhibit to this Form 10-K.",
+]
+
+# (title, row labels, typical magnitude in millions)
+STATEMENTS = [
+    ("CONSOLIDATED STATEMENTS OF OPERATIONS", [
+        ("Net sales", 380000), ("Cost of sales", 210000), ("Gross margin", 170000),
+        ("Research and development", 30000), ("Selling, general and administrative", 25000),
+        ("Operating income", 115000), ("Other income/(expense), net", -500),
+        ("Income before provision for income taxes", 114000), ("Provision for income taxes", 19000),
+        ("Net income", 95000), ("Diluted earnings per share", 6.1),
+    ]),
+    ("CONSOLIDATED BALANCE SHEETS", [
+        ("Cash and cash equivalents", 30000), ("Marketable securities", 32000), ("Accounts receivable, net", 29000),
+        ("Inventories", 6500), ("Total current assets", 145000), ("Property, plant and equipment, net", 44000),
+        ("Total assets", 350000), ("Total current liabilities", 150000), ("Total liabilities", 290000),
+        ("Total shareholders' equity", 60000),
+    ]),
+    ("CONSOLIDATED STATEMENTS OF CASH FLOWS", [
+        ("Cash generated by operating activities", 115000), ("Payments for acquisition of property", -10000),
+        ("Free cash flow", 105000), ("Repurchases of common stock", -90000), ("Payments for dividends", -15000),
+        ("Cash used in financing activities", -105000),
+    ]),
+    ("SEGMENT INFORMATION", [
+        ("Americas", 165000), ("Europe", 100000), ("Greater China", 68000), ("Japan", 25000),
+        ("Rest of Asia Pacific", 30000),
+    ]),
+]
+
+def _fmt(value: float, per_share: bool, first_row: bool) -> str:
+    s = f"{abs(value):,.2f}" if per_share else f"{abs(round(value)):,}"
+    if value < 0:
+        s = f"({s})"
+    return f"$ {s}" if first_row else s
+
+def _narrative(rng, sentences, n=9):
+    picked = [rng.choice(sentences) for _ in range(n)]
+    return " ".join(s.format(c=COMPANY, p=rng.randint(2, 15), g=rng.randint(38, 46), o=rng.randint(3, 12))
+                    for s in picked)
+
+def _table_rows(rng, statement, years):
+    title, rows = statement
+    grid = [[""] + [str(y) for y in years]]
+    facts = []
+    for ri, (label, base) in enumerate(rows):
+        per_share = "per share" in label
+        cells = []
+        for y in years:
+            value = base * rng.uniform(0.85, 1.15)
+            value = round(value, 2) if per_share else round(value)
+            cell = _fmt(value, per_share, ri == 0)
+            cells.append(cell)
+            facts.append({"statement": title, "label": label, "period": y, "raw": cell})
+        grid.append([label] + cells)
+    return grid, facts
+
+# table rulings, cycled per table: full grid, header/total rules only (the
+# usual 10-K look), or whitespace-aligned columns with no lines at all
+TABLE_STYLES = {
+    "grid": [("GRID", (0, 0), (-1, -1), 0.5, colors.black)] if SimpleDocTemplate else [],
+    "rules": [("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.black),
+              ("LINEBELOW", (0, -1), (-1, -1), 1.0, colors.black)] if SimpleDocTemplate else [],
+    "none": [],
+}
+
+def build_story(pages: int, seed: int = 0, table_styles=("grid",)):
+    """Returns (reportlab flowables, ground-truth facts with the page they land on)."""
+    rng = random.Random(seed)
+    styles = getSampleStyleSheet()
+    body, heading = styles["BodyText"], styles["Heading2"]
+    story, facts = [], []
+    statement_instances = [0] * len(STATEMENTS)
+    n_tables = 0
+    for page in range(1, pages + 1):
+        kind = PAGE_CYCLE[(page - 1) % len(PAGE_CYCLE)]
+        if kind == "table":
+            si = n_tables % len(STATEMENTS)
+            n_tables += 1
+            # every table instance covers its own years so (label, year) is unique
+            latest = 2024 - 3 * statement_instances[si]
+            statement_instances[si] += 1
+            years = [latest, latest - 1, latest - 2]
+            grid, table_facts = _table_rows(rng, STATEMENTS[si], years)
+            style = table_styles[(n_tables - 1) % len(table_styles)]
+            for f in table_facts:
+                f["page"] = page
+                f["table_style"] = style
+            facts.extend(table_facts)
+            story.append(Paragraph(f"{COMPANY} {STATEMENTS[si][0]}", heading))
+            story.append(Paragraph("(In millions, except number of shares and per share amounts)", body))
+            story.append(Spacer(1, 8))
+            table = Table(grid, hAlign="LEFT")
+            table.setStyle(TableStyle(TABLE_STYLES[style] + [
+                ("FONTSIZE", (0, 0), (-1, -1), 8),
+                ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+            ]))
+            story.append(table)
+            story.append(Spacer(1, 8))
+            story.append(Paragraph(_narrative(rng, MDNA, n=4), body))
+        else:
+            title, sentences = {
+                "business": ("Item 1. Business", BUSINESS),
+                "risk": ("Item 1A. Risk Factors", RISK),
+                "mdna": ("Item 7. Management's Discussion and Analysis", MDNA),
+                "audit": ("Item 8. Report of Independent Registered Public Accounting Firm", AUDIT),
+            }[kind]
+            story.append(Paragraph(title, heading))
+            for _ in range(3):
+                story.append(Paragraph(_narrative(rng, sentences), body))
+        story.append(PageBreak())
+    return story, facts
+
+def generate_10k_pdf(path: str, pages: int = 40, seed: int = 0, table_styles=("grid",)):
+    """Writes a synthetic filing to `path` and returns its ground-truth table facts."""
+    if SimpleDocTemplate is None:
+        raise ImportError("reportlab is required for the synthetic PDF generator: pip install reportlab")
+    story, facts = build_story(pages, seed, table_styles)
+    SimpleDocTemplate(path, pagesize=letter, title=f"{COMPANY} Form 10-K").build(story)
+    return facts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--table-styles", nargs="+", choices=sorted(TABLE_STYLES), default=["grid"])
+    args = parser.parse_args()
+    facts = generate_10k_pdf(args.path, args.pages, args.seed, tuple(args.table_styles))
+    print(f"wrote {args.path}: {args.pages} pages, {len(facts)} table values")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# checkpoints.py
+"""
+Manifests for resumable ingestion, one small JSON file per job under
+data/ingest_jobs/, keyed like the ingest cache (sha256 of PDF bytes + config).
+A manifest records the target collection, how many pages are committed, the
+chunker carry-over state and the tables saved so far.
+"""
+import json
+import os
+
+JOBS_DIR = os.path.join("data", "ingest_jobs")
+
+def _path(key: str) -> str:
+    return os.path.join(JOBS_DIR, f"{key}.json")
+
+def get_manifest(key: str):
+    try:
+        with open(_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(manifest: dict):
+    """Atomic write: a crash leaves either the previous or the new checkpoint."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    tmp_path = _path(manifest["key"]) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, _path(manifest["key"]))
+
+def delete_manifest(key: str):
+    try:
+        os.remove(_path(key))
+    except FileNotFoundError:
+        pass
+
+def list_manifests():
+    if not os.path.isdir(JOBS_DIR):
+        return []
+    out = []
+    for fname in os.listdir(JOBS_DIR):
+        if fname.endswith(".json"):
+            manifest = get_manifest(fname[:-len(".json")])
+            if manifest:
+                out.append(manifest)
+    return out
+
+def summarize(manifest: dict) -> dict:
+    """Progress view of a manifest (drops the bulky chunker state and table list)."""
+    n_pages = manifest.get("n_pages") or 0
+    return {
+        "key": manifest["key"],
+        "collection_name": manifest["collection_name"],
+        "filename": manifest.get("filename"),
+        "status": manifest["status"],
+        "pages_committed": manifest["pages_committed"],
+        "n_pages": n_pages,
+        "progress": (manifest["pages_committed"] / n_pages) if n_pages else 0.0,
+        "n_chunks": manifest["n_chunks"],
+        "n_tables": len(manifest.get("tables", [])),
+        "updated_at": manifest.get("updated_at")
+    }
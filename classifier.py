@@ -0,0 +1,138 @@
+# classifier.py
+"""
+One compiled keyword matcher for section tagging, context analysis and
+question intent.
+
+All keyword lists are loaded into a single Aho-Corasick automaton
+(pyahocorasick), so one pass over the text returns every category hit, with
+the same results as the old per-list `x in text` scans. Section tagging alone
+(classify_section / classify_sections) keeps the ordered substring scan: it
+stops at the first matching section and measured faster than an automaton
+pass for that one answer. Without pyahocorasick, the plain substring scans
+are used instead. A pure-Python regex alternation was measured first and was
+~10x slower than `in` on chunk-sized text, so it is not used as the fallback.
+"""
+try:
+    import ahocorasick
+except ImportError:  # optional: falls back to substring scans
+    ahocorasick = None
+
+SECTION_KEYWORDS = {
+    "audit": [
+        "independent registered public accounting firm",
+        "internal control over financial reporting",
+        "audited",
+        "coso",
+        "xbrl",
+        "opinion of",
+        "independent auditors"
+    ],
+    "mdna": [
+        "management’s discussion",
+        "managements discussion",
+        "md&a",
+        "results of operations",
+        "analysis of results",
+        "financial performance"
+    ],
+    "business": [
+        "business", "business model", "our business", "segments", "products", "services", "we operate"
+    ],
+    "risk": [
+        "risk factors", "risks", "uncertain", "uncertainties", "forward-looking statements"
+    ]
+}
+# first matching section wins, in this order
+SECTION_ORDER = ["audit", "mdna", "business", "risk"]
+
+BOILERPLATE_MARKERS = [
+    "internal control over financial reporting",
+    "audited",
+    "coso",
+    "xbrl",
+    "form 10-k",
+    "opinion of",
+    "independent registered public accounting firm"
+]
+
+NARRATIVE_MARKERS = [
+    "business",
+    "strategy",
+    "operations",
+    "management",
+    "risk",
+    "performance",
+    "growth",
+    "segment",
+    "md&a",
+    "results of operations"
+]
+
+NUMERIC_INDICATORS = ["how much", "what is", "what was", "exact", "figure", "amount", "$",
+                      "net sales", "free cash flow", "revenue", "operating income", "net income",
+                      "eps", "ebitda", "cash"]
+SUMMARY_KEYWORDS = ["summarize", "summary", "overview", "tl;dr", "summarize the"]
+
+CATEGORY_KEYWORDS = dict(
+    SECTION_KEYWORDS,
+    boilerplate=BOILERPLATE_MARKERS,
+    narrative=NARRATIVE_MARKERS,
+    numeric=NUMERIC_INDICATORS,
+    summary=SUMMARY_KEYWORDS
+)
+
+def _automaton(category_keywords):
+    if ahocorasick is None:
+        return None
+    keyword_categories = {}
+    for category, keywords in category_keywords.items():
+        for kw in keywords:
+            keyword_categories.setdefault(kw, set()).add(category)
+    automaton = ahocorasick.Automaton()
+    for kw, cats in keyword_categories.items():
+        automaton.add_word(kw, frozenset(cats))
+    automaton.make_automaton()
+    return automaton
+
+_ALL_CATEGORIES = frozenset(CATEGORY_KEYWORDS)
+_ALL_AUTOMATON = _automaton(CATEGORY_KEYWORDS)
+
+def match_categories(text: str) -> frozenset:
+    """Every category with at least one keyword in `text` (case-insensitive), in one pass."""
+    t = text.lower()
+    if _ALL_AUTOMATON is None:
+        return frozenset(c for c, kws in CATEGORY_KEYWORDS.items() if any(k in t for k in kws))
+    hits = set()
+    for _, cats in _ALL_AUTOMATON.iter(t):
+        hits |= cats
+        if len(hits) == len(_ALL_CATEGORIES):
+            break
+    return frozenset(hits)
+
+def section_from_categories(categories) -> str:
+    for section in SECTION_ORDER:
+        if section in categories:
+            return section
+    return "other"
+
+# (section, keywords) in precedence order, for the section-only scan
+_SECTION_SCAN = tuple((section, tuple(SECTION_KEYWORDS[section])) for section in SECTION_ORDER)
+
+def classify_section(text: str) -> str:
+    # When only the section is needed, the ordered substring scan stops at the
+    # first hit and measured faster than a full automaton pass; use
+    # match_categories when other categories are wanted from the same text.
+    t = text.lower()
+    for section, keywords in _SECTION_SCAN:
+        if any(x in t for x in keywords):
+            return section
+    return "other"
+
+def classify_sections(texts):
+    """Bulk section tagging for ingest: the same ordered scan, with the lookups hoisted out of the loop."""
+    scan = _SECTION_SCAN
+    sections = []
+    for text in texts:
+        t = text.lower()
+        sections.append(next((section for section, keywords in scan if any(x in t for x in keywords)), "other"))
+    return sections
@@ -0,0 +1,167 @@
+# context_packer.py
+"""
+Builds the LLM context from retrieved chunks within a token budget.
+
+Chunks are cut with a token overlap, so neighbouring chunks (chunk_index i
+and i+1 of the same document) repeat text. The packer takes chunks in
+retrieval-distance order, drops exact/contained duplicates, charges each
+chunk only for the text its already-selected neighbours don't cover, and
+stops adding chunks once the budget is spent. Selected neighbours are then
+stitched into one passage each, and passages are ordered by their best rank.
+Every selected chunk keeps its own entry in `sources`.
+"""
+import os
+from utils import get_encoder
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("FINDOC_CONTEXT_TOKENS", "3000"))
+SEPARATOR = "\n\n"
+
+def count_tokens(text: str) -> int:
+    enc = get_encoder()
+    return len(enc.encode(text)) if enc is not None else len(text.split())
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    enc = get_encoder()
+    if enc is None:
+        return " ".join(text.split()[:max_tokens])
+    return enc.decode(enc.encode(text)[:max_tokens])
+
+def text_overlap(a: str, b: str, probe: int = 32) -> int:
+    """Length (in chars) of the longest suffix of `a` that is also a prefix of `b`."""
+    if not a or not b:
+        return 0
+    head = b[:probe]
+    pos = a.find(head, max(0, len(a) - len(b)))
+    while pos != -1:
+        if b.startswith(a[pos:]):
+            return len(a) - pos
+        pos = a.find(head, pos + 1)
+    return 0
+
+def hits_from_results(results, collection_name: str = None):
+    """Flattens one Chroma query result into hits {"collection", "document", "metadata", "distance"}."""
+    docs = results["documents"][0]
+    metadatas = (results.get("metadatas") or [[]])[0] or []
+    distances = (results.get("distances") or [[]])[0] or []
+    return [{
+        "collection": collection_name,
+        "document": doc or "",
+        "metadata": metadatas[i] if i < len(metadatas) and isinstance(metadatas[i], dict) else {},
+        "distance": distances[i] if i < len(distances) else None
+    } for i, doc in enumerate(docs)]
+
+def _doc_key(hit):
+    return hit.get("collection"), hit["metadata"].get("source")
+
+def pack_context(hits, token_budget: int = CONTEXT_TOKEN_BUDGET, label=None):
+    """
+    Returns (context, sources, stats). `label(hit)`, if given, is prefixed
+    to each passage (e.g. the filing name for multi-filing questions).
+    Sources are in rank order; "passage" gives each one's place in the context,
+    and "truncated_at" (only on a chunk cut to fit the budget) how many of its
+    characters were kept.
+    Labels and separators count against the budget like chunk text.
+    stats: tokens_in (naive concatenation), tokens_out, tokens_saved,
+    chunks_in, chunks_used, passages, duplicates_dropped, over_budget_dropped.
+    """
+    ranked = sorted(range(len(hits)), key=lambda i: (
+        hits[i]["distance"] if hits[i]["distance"] is not None else float("inf"), i))
+
+    selected = {}     # (doc key, chunk_index) -> {"hit", "text", "rank"}
+    # per collection: identical text from two filings still tells the LLM both say it
+    selected_texts = {}
+    used = 0
+    duplicates = over_budget = 0
+    separator_cost = count_tokens(SEPARATOR)
+    for rank, i in enumerate(ranked):
+        hit = hits[i]
+        text = hit["document"]
+        if not text.strip():
+            continue
+        if any(text in t for t in selected_texts.get(hit.get("collection"), ())):
+            duplicates += 1
+            continue
+        chunk_index = hit["metadata"].get("chunk_index")
+        # only pay for what the already-selected neighbours don't cover
+        marginal = text
+        left = right = None
+        if chunk_index is not None:
+            left = selected.get((_doc_key(hit), chunk_index - 1))
+            right = selected.get((_doc_key(hit), chunk_index + 1))
+            if left:
+                marginal = marginal[text_overlap(left["text"], marginal):]
+            if right:
+                marginal = marginal[:len(marginal) - text_overlap(marginal, right["text"])]
+        cost = count_tokens(marginal)
+        if not (left or right):
+            # starts a passage of its own: pays for its label and the separator before it
+            if label:
+                cost += count_tokens(label(hit) + "\n")
+            if selected:
+                cost += separator_cost
+        if used + cost > token_budget:
+            if selected:
+                over_budget += 1
+                continue
+            # the best chunk alone is over budget: keep its head
+            head_budget = token_budget - (count_tokens(label(hit) + "\n") if label else 0)
+            text = truncate_tokens(text, max(0, head_budget))
+            cost = token_budget
+        key = (_doc_key(hit), chunk_index if chunk_index is not None else ("rank", rank))
+        selected[key] = {"hit": hit, "text": text, "rank": rank}
+        selected_texts.setdefault(hit.get("collection"), []).append(text)
+        used += cost
+
+    # stitch neighbouring chunks into passages
+    passages = []
+    for key in sorted(selected, key=lambda k: (str(k[0]), k[1] if isinstance(k[1], int) else -1, str(k[1]))):
+        item = selected[key]
+        prev = passages[-1] if passages else None
+        if (prev is not None and isinstance(key[1], int) and prev["key"][0] == key[0]
+                and isinstance(prev["key"][1], int) and key[1] == prev["key"][1] + 1):
+            prev["text"] += item["text"][text_overlap(prev["text"], item["text"]):]
+            prev["key"] = key
+            prev["rank"] = min(prev["rank"], item["rank"])
+        else:
+            passages.append({"key": key, "text": item["text"], "rank": item["rank"], "hit": item["hit"]})
+        item["passage"] = passages[-1]
+    passages.sort(key=lambda p: p["rank"])
+    for i, p in enumerate(passages):
+        p["index"] = i
+
+    blocks = [(f"{label(p['hit'])}\n{p['text']}" if label else p["text"]) for p in passages]
+    context = SEPARATOR.join(blocks)
+
+    sources = []
+    for item in sorted(selected.values(), key=lambda it: it["rank"]):
+        hit, meta = item["hit"], item["hit"]["metadata"]
+        source = {
+            "source": meta.get("source", f"Source_{item['rank']}"),
+            "chunk_index": meta.get("chunk_index", item["rank"]),
+            "section": meta.get("section", "other"),
+            "page_start": meta.get("page_start"),
+            "page_end": meta.get("page_end"),
+            "distance": hit["distance"],
+            # position of the chunk's passage in the context
+            "passage": item["passage"]["index"],
+            "text_snippet": hit["document"][:400]
+        }
+        if hit.get("collection") is not None:
+            source["collection"] = hit["collection"]
+        if item["text"] != hit["document"]:
+            source["truncated_at"] = len(item["text"])
+        sources.append(source)
+
+    tokens_in = count_tokens(SEPARATOR.join(h["document"] for h in hits))
+    tokens_out = count_tokens(context)
+    stats = {
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": max(0, tokens_in - tokens_out),
+        "chunks_in": len(hits),
+        "chunks_used": len(selected),
+        "passages": len(passages),
+        "duplicates_dropped": duplicates,
+        "over_budget_dropped": over_budget
+    }
+    return context, sources, stats
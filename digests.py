@@ -0,0 +1,218 @@
+# digests.py
+"""
+Per-section digests of a collection, so summary questions can be answered
+without retrieval and without sending 8 raw chunks to the LLM.
+
+build_digests() is a map-reduce over each classify_section bucket: chunks
+(in chunk_index order) are summarized in fixed groups of DIGEST_GROUP_CHUNKS
+(map), and the partial summaries are merged DIGEST_FANIN at a time until one
+digest per section is left (reduce). Every LLM call is memoized on a hash of
+its inputs, so re-running after chunks are added or changed only redoes the
+groups, and the reduce steps above them, whose inputs changed. Digests are
+stored as digests.json next to the collection's tables.
+
+    FINDOC_DIGESTS = "1" to build digests in the background after each ingest (default "0")
+    FINDOC_DIGEST_SECTIONS = comma-separated sections to digest (default business,mdna,risk)
+    FINDOC_DIGEST_ANSWER = "prompt" (short LLM prompt over the digests, default) | "direct" (no LLM)
+"""
+import hashlib
+import json
+import os
+import time
+import answer_cache
+from classifier import match_categories
+from table_parser import TABLES_ROOT
+import store
+
+DIGESTS_AFTER_INGEST = os.getenv("FINDOC_DIGESTS", "0") == "1"
+DIGEST_SECTIONS = [s.strip() for s in os.getenv("FINDOC_DIGEST_SECTIONS", "business,mdna,risk").split(",") if s.strip()]
+DIGEST_ANSWER_MODE = os.getenv("FINDOC_DIGEST_ANSWER", "prompt")
+DIGEST_GROUP_CHUNKS = 6
+DIGEST_FANIN = 8
+DIGESTS_FILE = "digests.json"
+# sections a summary question gets when it names none (same as retrieve's summary filter)
+DEFAULT_SUMMARY_SECTIONS = ["business", "mdna"]
+
+SECTION_TITLES = {
+    "business": "Business",
+    "mdna": "Management's Discussion and Analysis",
+    "risk": "Risk Factors",
+    "audit": "Audit and Controls",
+    "other": "Other"
+}
+
+MAP_PROMPT = """
+Summarize the following excerpts from the {title} section of a financial filing.
+
+RULES:
+- Use ONLY the excerpts; do NOT invent facts or numbers
+- Keep numbers exactly as written
+- At most 5 sentences
+
+Excerpts:
+{text}
+
+Summary:
+"""
+
+REDUCE_PROMPT = """
+Combine these partial summaries of the {title} section of a financial filing into one summary.
+
+RULES:
+- Use ONLY the partial summaries; do NOT invent facts or numbers
+- Keep numbers exactly as written
+- At most 8 sentences
+
+Partial summaries:
+{text}
+
+Summary:
+"""
+
+DIGEST_ANSWER_PROMPT = """
+Answer the question using ONLY these section summaries of a single financial filing.
+Do NOT invent facts or numbers. If they don't cover the question, say "Not found in document".
+
+{context}
+
+Question:
+{question}
+
+Answer in clear, concise bullet points.
+"""
+
+def digests_path(collection_name: str) -> str:
+    return os.path.join(TABLES_ROOT, collection_name, DIGESTS_FILE)
+
+def load_digests(collection_name: str):
+    """{"sections": {section: {"digest", "n_chunks", "chunk_range", "updated_at"}}, "memo": {...}} or None."""
+    path = digests_path(collection_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_digests(collection_name: str, data: dict):
+    path = digests_path(collection_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _memo_key(kind: str, section: str, text: str) -> str:
+    h = hashlib.sha256(f"{kind}\0{section}\0".encode("utf-8"))
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+def _section_chunks(collection_name: str):
+    """{section: [(chunk_index, text), ...]} for the digested sections, in chunk order."""
+    collection = store.get_collection(collection_name)
+    out = {}
+    for section in DIGEST_SECTIONS:
+        got = collection.get(where={"section": section}, include=["documents", "metadatas"])
+        rows = sorted(((m or {}).get("chunk_index", 0), d or "") for d, m in zip(got["documents"], got["metadatas"]))
+        if rows:
+            out[section] = rows
+    return out
+
+def build_digests(collection_name: str, progress=None, stats: dict = None):
+    """
+    Builds or refreshes the section digests of a collection. Returns the
+    digests dict; `stats` gets llm_calls / memo_hits / total_s. An LLM error
+    leaves that section's previous digest in place.
+    """
+    from rag import call_ollama  # rag imports this module
+    progress = progress or (lambda **_: None)
+    stats = stats if stats is not None else {}
+    stats.update(llm_calls=0, memo_hits=0, failed_sections=[])
+    t_start = time.perf_counter()
+
+    previous = load_digests(collection_name) or {}
+    memo = previous.get("memo", {})
+    used = {}
+    sections = dict(previous.get("sections", {}))
+    chunks = _section_chunks(collection_name)
+
+    def summarize(kind, section, text):
+        key = _memo_key(kind, section, text)
+        if key in memo:
+            stats["memo_hits"] += 1
+            used[key] = memo[key]
+            return memo[key]
+        prompt = (MAP_PROMPT if kind == "map" else REDUCE_PROMPT).format(
+            title=SECTION_TITLES.get(section, section), text=text)
+        llm_stats = {}
+        out = call_ollama(prompt, llm_stats)
+        stats["llm_calls"] += 1
+        if llm_stats.get("error"):
+            raise RuntimeError(llm_stats["error"])
+        used[key] = out
+        return out
+
+    progress(stage="digesting", sections_done=0, n_sections=len(chunks))
+    for si, (section, rows) in enumerate(chunks.items()):
+        try:
+            level = [summarize("map", section, "\n\n".join(t for _, t in rows[i:i + DIGEST_GROUP_CHUNKS]))
+                     for i in range(0, len(rows), DIGEST_GROUP_CHUNKS)]
+            while len(level) > 1:
+                level = [summarize("reduce", section, "\n\n".join(level[i:i + DIGEST_FANIN]))
+                         for i in range(0, len(level), DIGEST_FANIN)]
+        except RuntimeError:
+            stats["failed_sections"].append(section)
+            # keep the memo entries of the previous digest so a retry stays incremental
+            for key, value in memo.items():
+                used.setdefault(key, value)
+        else:
+            sections[section] = {
+                "digest": level[0],
+                "n_chunks": len(rows),
+                "chunk_range": [rows[0][0], rows[-1][0]],
+                "updated_at": time.time()
+            }
+        progress(sections_done=si + 1)
+
+    for section in [s for s in sections if s not in chunks]:
+        del sections[section]
+    data = {"sections": sections, "memo": used}
+    _save_digests(collection_name, data)
+    # summary answers cached before these digests were answered from retrieval
+    answer_cache.invalidate_collection(collection_name)
+    stats["n_sections"] = len(sections)
+    stats["total_s"] = time.perf_counter() - t_start
+    return data
+
+def summary_sections(question: str, available, categories=None):
+    """Digested sections a summary question asks for (the default pair when it names none)."""
+    if categories is None:
+        categories = match_categories(question)
+    named = [s for s in DIGEST_SECTIONS if s in categories and s in available]
+    return named or [s for s in DEFAULT_SUMMARY_SECTIONS if s in available]
+
+def digest_context(collection_name: str, question: str, categories=None):
+    """
+    (context, sources) built from the digests for a summary question, or
+    (None, None) when the collection has no digest for the wanted sections.
+    `categories`: the question's match_categories, if already computed.
+    """
+    data = load_digests(collection_name)
+    if not data or not data.get("sections"):
+        return None, None
+    wanted = summary_sections(question, data["sections"], categories)
+    if not wanted:
+        return None, None
+    blocks, sources = [], []
+    for section in wanted:
+        d = data["sections"][section]
+        title = SECTION_TITLES.get(section, section)
+        blocks.append(f"{title}:\n{d['digest']}")
+        sources.append({
+            "source": f"{title} digest ({d['n_chunks']} chunks)",
+            "chunk_index": "{}-{}".format(*d["chunk_range"]),
+            "section": section,
+            "text_snippet": d["digest"][:400]
+        })
+    return "\n\n".join(blocks), sources
@@ -0,0 +1,140 @@
+# embedding_cache.py
+"""
+Persistent cache of chunk embeddings shared across documents.
+
+10-K boilerplate (auditor opinions, ICFR language, forward-looking statement
+disclaimers) repeats almost verbatim between filings, so each chunk's vector
+is stored under sha256(embedding model id + whitespace-normalized text) in a
+small sqlite file and looked up before the embedding function is called.
+Entries past max_entries are evicted least-recently-used first.
+
+    FINDOC_EMBEDDING_CACHE = "1" (default) | "0" to disable
+    FINDOC_EMBEDDING_CACHE_PATH = sqlite file (default data/embedding_cache.sqlite)
+    FINDOC_EMBEDDING_CACHE_MAX_ENTRIES = max cached vectors (default 500000)
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+EMBEDDING_CACHE_ENABLED = os.getenv("FINDOC_EMBEDDING_CACHE", "1") != "0"
+EMBEDDING_CACHE_PATH = os.getenv("FINDOC_EMBEDDING_CACHE_PATH", os.path.join("data", "embedding_cache.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("FINDOC_EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+# sqlite caps bound parameters per statement
+_SQL_BATCH = 500
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+def cache_key(text: str, model_id: str) -> str:
+    h = hashlib.sha256(model_id.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+class EmbeddingCache:
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # several ingest processes may share the file; wait on their write locks
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        self._n_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys):
+        """Returns {key: float32 vector} for the keys that are cached, and marks them used."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _SQL_BATCH):
+                part = unique[i:i + _SQL_BATCH]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update((k, np.frombuffer(v, dtype=np.float32)) for k, v in rows)
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(now, k) for k in found])
+                self._db.commit()
+            hits = sum(k in found for k in keys)
+            self.counters["hits"] += hits
+            self.counters["misses"] += len(keys) - hits
+        return found
+
+    def put_many(self, items):
+        """Stores (key, vector) pairs, then evicts the least recently used past max_entries."""
+        now = time.time()
+        rows = [(k, np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._n_entries += self._db.total_changes - before
+            excess = self._n_entries - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE key IN"
+                    " (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                # other processes may have written too; recount rather than trust our tally
+                self._n_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                self.counters["evictions"] += excess
+            self._db.commit()
+
+    def embed(self, texts, embedding_function, model_id: str):
+        """
+        Returns (vectors for `texts` in order, number of cache hits). Only
+        texts not cached yet go to `embedding_function`; repeats within
+        `texts` are embedded once.
+        """
+        keys = [cache_key(t, model_id) for t in texts]
+        found = self.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = embedding_function(list(missing.values()))
+            new = [(key, np.asarray(v, dtype=np.float32)) for key, v in zip(missing, vectors)]
+            found.update(new)
+            self.put_many(new)
+        # plain lists: what every chromadb version accepts for `embeddings`
+        return [found[key].tolist() for key in keys], len(keys) - len(missing)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return dict(self.counters, entries=self._n_entries,
+                        hit_rate=(self.counters["hits"] / lookups) if lookups else 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM embeddings")
+            self._db.commit()
+            self._n_entries = 0
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    """Process-wide cache, or None when disabled with FINDOC_EMBEDDING_CACHE=0."""
+    global _cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
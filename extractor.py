@@ -14,16 +14,18 @@ def extract_numbers_from_context(context, max_results=20):
             break
     return out
 
-def numeric_pipeline(collection_name, question, context):
+def table_lookup(collection_name, question):
     try:
-        table_result = answer_numeric_question_from_tables(collection_name, question)
+        return answer_numeric_question_from_tables(collection_name, question)
     except Exception:
-        table_result = None
+        return None
 
+def numeric_answer(table_result, context, numbers=None):
+    """`numbers`: the context's distinct numeric strings if already known (see numeric_spans)."""
     if table_result:
         return table_result["answer_text"] + f"\nSource: table {table_result['evidence']}"
     # fallback: regex
-    found = extract_numbers_from_context(context, max_results=50)
+    found = numbers[:50] if numbers is not None else extract_numbers_from_context(context, max_results=50)
     if not found:
         return "Not found in document."
     lines = ["Explicit numeric values found in the retrieved context (verbatim):"]
@@ -31,3 +33,6 @@ def numeric_pipeline(collection_name, question, context):
         lines.append(f"- {n}")
     lines.append("\n(These are verbatim matches from extracted text. Do not infer or calculate.)")
     return "\n".join(lines)
+
+def numeric_pipeline(collection_name, question, context):
+    return numeric_answer(table_lookup(collection_name, question), context)
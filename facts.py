@@ -0,0 +1,224 @@
+# facts.py
+"""
+Typed numeric facts extracted from tables at ingest time.
+
+Every numeric cell of every table becomes one fact: row label, column header,
+period (year), value as float, scale (thousand/million/billion), unit, sign
+(parentheses) and source page. Facts are kept per collection as dictionary-
+encoded NumPy columns in a compressed .npz next to the table CSVs, so the
+numeric lane can answer with an indexed filter instead of scanning strings.
+"""
+import os
+import re
+import threading
+import numpy as np
+from rapidfuzz import fuzz, process
+
+FACTS_FILE = "facts.npz"
+
+SCALES = {"thousand": 1e3, "million": 1e6, "billion": 1e9}
+SCALE_RE = re.compile(r"\bin\s+(thousands|millions|billions)\b", re.IGNORECASE)
+CELL_SCALE_RE = re.compile(r"\b(thousand|million|billion)s?\b|\b(bn|mm)\b", re.IGNORECASE)
+YEAR_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+NUMBER_RE = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?")
+
+# string columns are stored as (unique values, int32 codes)
+_CODED_COLUMNS = ("table_id", "label", "header", "unit", "raw")
+
+def _clean(cell) -> str:
+    if cell is None:
+        return ""
+    s = str(cell).strip()
+    return "" if s.lower() in ("nan", "none") else s
+
+def parse_number_cell(cell: str):
+    """
+    Parses a table cell that holds a single number, e.g. "$ 1,234.5", "(87)",
+    "12.4%", "3.1 billion". Returns (value, negative, unit, cell_scale) or None.
+    """
+    s = _clean(cell)
+    if not s or not any(ch.isdigit() for ch in s):
+        return None
+    negative = ("(" in s and ")" in s) or s.lstrip("$ ").startswith(("-", "−"))
+    unit = "%" if "%" in s else ("$" if "$" in s else "")
+    cell_scale = 1.0
+    m_scale = CELL_SCALE_RE.search(s)
+    if m_scale:
+        word = (m_scale.group(1) or m_scale.group(2)).lower()
+        cell_scale = {"bn": 1e9, "mm": 1e6}.get(word, SCALES.get(word, 1.0))
+        s = CELL_SCALE_RE.sub("", s)
+    body = s.strip("()$%-− ").replace("$", "").replace(" ", "")
+    m = NUMBER_RE.fullmatch(body)
+    if not m:
+        return None
+    value = float(m.group(1).replace(",", "") + (m.group(2) or ""))
+    return (-value if negative else value), negative, unit, cell_scale
+
+def _is_bare_year(cell: str) -> bool:
+    s = _clean(cell)
+    return bool(re.fullmatch(r"(?:19|20)\d{2}", s))
+
+def detect_scale(text: str) -> float:
+    m = SCALE_RE.search(text or "")
+    return SCALES[m.group(1).lower().rstrip("s")] if m else 1.0
+
+def extract_table_facts(df, table_id: str, page: int, page_text: str = ""):
+    """
+    Turns one raw table (DataFrame of strings/None, no header row) into a list
+    of fact dicts. Leading rows without any non-year number are treated as
+    column headers; the first non-numeric cell of each data row is its label.
+    """
+    grid = [[_clean(c) for c in row] for row in df.astype(object).values.tolist()]
+    if not grid:
+        return []
+    n_cols = max(len(r) for r in grid)
+
+    n_header_rows = 0
+    for row in grid[:3]:
+        if any(parse_number_cell(c) and not _is_bare_year(c) for c in row[1:]):
+            break
+        n_header_rows += 1
+    headers = [
+        " ".join(r[j] for r in grid[:n_header_rows] if j < len(r) and r[j]).strip()
+        for j in range(n_cols)
+    ]
+
+    table_text = " ".join(" ".join(r) for r in grid[:n_header_rows + 1])
+    scale = detect_scale(table_text)
+    if scale == 1.0:
+        scale = detect_scale(page_text)
+
+    facts = []
+    for ri in range(n_header_rows, len(grid)):
+        row = grid[ri]
+        label = next((c for c in row if c and parse_number_cell(c) is None), "")
+        if not label:
+            continue
+        label_year = YEAR_RE.search(label)
+        # "in millions, except per share amounts"
+        per_share = "per share" in label.lower()
+        for j, cell in enumerate(row):
+            if not cell or cell == label or _is_bare_year(cell):
+                continue
+            parsed = parse_number_cell(cell)
+            if parsed is None:
+                continue
+            value, negative, unit, cell_scale = parsed
+            header = headers[j] if j < len(headers) else ""
+            year = YEAR_RE.search(header) or label_year
+            facts.append({
+                "table_id": table_id,
+                "page": page,
+                "row": ri,
+                "col": j,
+                "label": label,
+                "header": header,
+                "period": int(year.group(1)) if year else 0,
+                "value": value,
+                "scale": cell_scale if cell_scale != 1.0 or unit == "%" or per_share else scale,
+                "unit": unit,
+                "negative": negative,
+                "raw": cell
+            })
+    return facts
+
+def save_facts(tables_dir: str, facts):
+    columns = {}
+    for name in _CODED_COLUMNS:
+        values, codes = np.unique(np.array([f[name] for f in facts], dtype=str), return_inverse=True)
+        columns[f"{name}_values"] = values
+        columns[f"{name}_codes"] = codes.astype(np.int32)
+    columns["page"] = np.array([f["page"] for f in facts], dtype=np.int32)
+    columns["row"] = np.array([f["row"] for f in facts], dtype=np.int32)
+    columns["col"] = np.array([f["col"] for f in facts], dtype=np.int32)
+    columns["period"] = np.array([f["period"] for f in facts], dtype=np.int16)
+    columns["value"] = np.array([f["value"] for f in facts], dtype=np.float64)
+    columns["scale"] = np.array([f["scale"] for f in facts], dtype=np.float64)
+    columns["negative"] = np.array([f["negative"] for f in facts], dtype=bool)
+    path = os.path.join(tables_dir, FACTS_FILE)
+    np.savez_compressed(path, **columns)
+    return path
+
+class FactStore:
+    """Columnar, read-only view over a collection's facts."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.n = len(columns["value"])
+        self.label_values = columns["label_values"]
+        # labels are matched case-insensitively
+        self.label_norm = [str(v).lower() for v in self.label_values]
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def __len__(self):
+        return self.n
+
+    def _decode(self, name, idx):
+        return str(self.columns[f"{name}_values"][self.columns[f"{name}_codes"][idx]])
+
+    def fact(self, idx) -> dict:
+        c = self.columns
+        out = {name: self._decode(name, idx) for name in _CODED_COLUMNS}
+        out.update({
+            "page": int(c["page"][idx]),
+            "row": int(c["row"][idx]),
+            "col": int(c["col"][idx]),
+            "period": int(c["period"][idx]) or None,
+            "value": float(c["value"][idx]),
+            "scale": float(c["scale"][idx]),
+            "negative": bool(c["negative"][idx])
+        })
+        out["scaled_value"] = out["value"] * out["scale"]
+        return out
+
+    def match_labels(self, text: str, min_score: float = 90, limit: int = 5):
+        """Label codes best matching `text`, as [(code, score)], longest label first on ties."""
+        if not self.label_norm:
+            return []
+        hits = process.extract(text.lower(), self.label_norm, scorer=fuzz.token_set_ratio,
+                               score_cutoff=min_score, limit=None)
+        hits.sort(key=lambda h: (h[1], len(h[0])), reverse=True)
+        return [(code, score) for _, score, code in hits[:limit]]
+
+    def query(self, label_codes=None, period=None):
+        """Indices of facts matching any of `label_codes` and (optionally) `period`."""
+        mask = np.ones(self.n, dtype=bool)
+        if label_codes is not None:
+            mask &= np.isin(self.columns["label_codes"], list(label_codes))
+        if period is not None:
+            mask &= self.columns["period"] == int(period)
+        return np.flatnonzero(mask)
+
+    def by_period(self, label: str, min_score: float = 90):
+        """Cross-table series for one line item, e.g. by_period("revenue") -> {2024: fact, 2023: fact}."""
+        matches = self.match_labels(label, min_score=min_score, limit=1)
+        if not matches:
+            return {}
+        out = {}
+        for idx in self.query(label_codes=[matches[0][0]]):
+            period = int(self.columns["period"][idx])
+            if period and period not in out:
+                out[period] = self.fact(idx)
+        return dict(sorted(out.items()))
+
+_store_cache = {}
+_store_lock = threading.Lock()
+
+def get_fact_store(tables_dir: str):
+    """Loads (and caches by mtime) the FactStore in `tables_dir`; None if there is none."""
+    path = os.path.join(tables_dir, FACTS_FILE)
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _store_lock:
+        cached = _store_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    fact_store = FactStore.load(path)
+    with _store_lock:
+        _store_cache[path] = (mtime, fact_store)
+    return fact_store
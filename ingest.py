@@ -2,16 +2,73 @@
 import os
 import time
 import json
-import pdfplumber
-import chromadb
-from chromadb.utils import embedding_functions
-from utils import chunk_text
-import pandas as pd
+import shutil
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from utils import TokenChunker
+from classifier import classify_sections
+import ingest_cache
+import checkpoints
+import answer_cache
+import embedding_cache
+import quantized_index
+from facts import extract_table_facts, save_facts
+from numeric_spans import span_metadata
+from table_parser import get_table_index, invalidate_table_index
+import store
+import tracing
+from page_triage import TABLE_TRIAGE_THRESHOLD, table_score
 
-embedding_function = embedding_functions.DefaultEmbeddingFunction()
-chroma_client = chromadb.Client()
+# pdfplumber and pandas are imported where PDFs are parsed, so importing this
+# module (e.g. from the app) stays cheap
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
+# bump when the stored chunks/tables change shape so cached ingests are redone
+PIPELINE_VERSION = 4
+
+# chunks embedded per ONNX call / written per collection.add
+EMBED_BATCH_SIZE = 64
+
+# pages per checkpoint: a failed ingest resumes from the last committed batch
+CHECKPOINT_PAGES = 64
+
+# pages handed to each worker process; small enough to balance load on
+# 300-page filings, large enough that re-opening the PDF per task is noise
+PAGES_PER_TASK = 16
+
+# extraction processes across all ingests running in this process (the app's
+# job pool runs several at once); a job that finds none free extracts in-thread
+MAX_EXTRACT_WORKERS = int(os.getenv("FINDOC_MAX_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# ingests run on threads next to ONNX/tornado/warm-up threads, which fork would copy mid-flight
+EXTRACT_START_METHOD = os.getenv("FINDOC_EXTRACT_START_METHOD", "spawn")
+
+_workers_lock = threading.Lock()
+_workers_in_use = 0
+
+def _acquire_workers(wanted: int) -> int:
+    """Reserves up to `wanted` extraction processes from MAX_EXTRACT_WORKERS; 0 or 1 means extract in-thread."""
+    global _workers_in_use
+    with _workers_lock:
+        granted = max(0, min(wanted, MAX_EXTRACT_WORKERS - _workers_in_use))
+        if granted <= 1:
+            return 0
+        _workers_in_use += granted
+        return granted
+
+def _release_workers(n: int):
+    global _workers_in_use
+    with _workers_lock:
+        _workers_in_use -= n
+
+def _extract_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(EXTRACT_START_METHOD))
 
 def extract_text_from_pdf_path(path):
+    import pdfplumber
     text = ""
     with pdfplumber.open(path) as pdf:
         for page in pdf.pages:
@@ -20,129 +77,554 @@ def extract_text_from_pdf_path(path):
                 text += page_text + "\n"
     return text
 
-def extract_tables_from_pdf_path(path):
+def _extract_page_tables(page, pageno):
+    import pandas as pd
+    # try page.extract_tables() first (returns list of table rows)
+    try:
+        raw_tables = page.extract_tables()
+    except Exception:
+        raw_tables = []
+    if not raw_tables:
+        # try find_tables
+        try:
+            found = page.find_tables()
+            raw_tables = [t.extract() for t in found] if found else []
+        except Exception:
+            raw_tables = []
+
+    tables = []
+    for ti, tbl in enumerate(raw_tables):
+        # normalize: get list of lists, convert to pandas DataFrame
+        try:
+            df = pd.DataFrame(tbl)
+        except Exception:
+            continue
+        # drop empty columns/rows heuristically
+        df = df.dropna(how='all')
+        df = df.loc[:, df.notna().any()]
+        if df.empty:
+            continue
+        tables.append({
+            "page": pageno,
+            "table_id": f"p{pageno}_t{ti}",
+            "df": df,
+            "preview": df.head(5).to_dict(orient="list")
+        })
+    return tables
 
+def extract_tables_from_pdf_path(path, triage_threshold=0):
+    """
+    Tables of every page. With a triage_threshold (e.g. TABLE_TRIAGE_THRESHOLD)
+    only pages whose page_triage score reaches it are searched; that costs an
+    extra text extraction per page, so it is opt-in here.
+    """
+    import pdfplumber
     tables = []
     with pdfplumber.open(path) as pdf:
         for pageno, page in enumerate(pdf.pages, start=1):
-            # try page.extract_tables() first (returns list of table rows)
-            try:
-                raw_tables = page.extract_tables()
-            except Exception:
-                raw_tables = []
-            if not raw_tables:
-                # try find_tables
-                try:
-                    found = page.find_tables()
-                    raw_tables = [t.extract() for t in found] if found else []
-                except Exception:
-                    raw_tables = []
-
-            for ti, tbl in enumerate(raw_tables):
-                # normalize: get list of lists, convert to pandas DataFrame
-                try:
-                    df = pd.DataFrame(tbl)
-                except Exception:
-                    continue
-                # drop empty columns/rows heuristically
-                df = df.dropna(how='all')
-                df = df.loc[:, df.notna().any()]
-                if df.empty:
-                    continue
-                tables.append({
-                    "page": pageno,
-                    "table_id": f"p{pageno}_t{ti}",
-                    "df": df,
-                    "preview": df.head(5).to_dict(orient="list")
-                })
+            if triage_threshold <= 0 or table_score(page) >= triage_threshold:
+                tables.extend(_extract_page_tables(page, pageno))
     return tables
 
-def classify_section(text: str) -> str:
-    t = text.lower()
-    if any(x in t for x in [
-        "independent registered public accounting firm",
-        "internal control over financial reporting",
-        "audited",
-        "coso",
-        "xbrl",
-        "opinion of",
-        "independent auditors"
-    ]):
-        return "audit"
-
-    if any(x in t for x in [
-        "management’s discussion",
-        "managements discussion",
-        "md&a",
-        "results of operations",
-        "analysis of results",
-        "financial performance"
-    ]):
-        return "mdna"
-
-    if any(x in t for x in [
-        "business", "business model", "our business", "segments", "products", "services", "we operate"
-    ]):
-        return "business"
-
-    if any(x in t for x in [
-        "risk factors", "risks", "uncertain", "uncertainties", "forward-looking statements"
-    ]):
-        return "risk"
-
-    return "other"
-
-def ingest_pdf_return_collection(file_path: str, filename_hint: str = "doc"):
-    raw_text = extract_text_from_pdf_path(file_path)
-    if not raw_text or raw_text.strip() == "":
-        raise ValueError("No text could be extracted from the PDF.")
+def _extract_page_range(path, start, end, triage_threshold=TABLE_TRIAGE_THRESHOLD):
+    """
+    Worker for the single-pass extractor: opens the PDF once and returns
+    text + tables for pages [start, end) as a list of per-page dicts. Table
+    detection only runs on pages whose triage score reaches the threshold.
+    """
+    import pdfplumber
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for idx in range(start, end):
+            page = pdf.pages[idx]
+            pageno = idx + 1
+            text = page.extract_text() or ""
+            skip_tables = triage_threshold > 0 and table_score(page, text) < triage_threshold
+            pages.append({
+                "page": pageno,
+                "text": text,
+                "tables": [] if skip_tables else _extract_page_tables(page, pageno),
+                "tables_skipped": skip_tables
+            })
+            # release the parsed layout objects, we only keep text + DataFrames
+            page.close()
+    return pages
 
-    chunks = chunk_text(raw_text, chunk_size=500, overlap=100)
+def count_pdf_pages(path):
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
 
-    safe_name = filename_hint.replace(" ", "_").replace(".", "_")
-    collection_name = f"financial_docs_{safe_name}_{int(time.time())}"
-
-    collection = chroma_client.get_or_create_collection(
-        name=collection_name,
-        embedding_function=embedding_function
-    )
-
-    # Add text chunks with section metadata
-    for i, chunk in enumerate(chunks):
-        section = classify_section(chunk)
-        meta = {"chunk_index": i, "source": filename_hint, "section": section}
-        collection.add(
-            documents=[chunk],
-            ids=[f"{collection_name}_chunk_{i}"],
-            metadatas=[meta]
+def iter_pdf_pages(path, workers=None, pages_per_task=PAGES_PER_TASK, start_page=0, end_page=None, executor=None,
+                   triage_threshold=None):
+    """
+    Single extraction pass over the PDF: yields {"page", "text", "tables",
+    "tables_skipped"} for every page in [start_page, end_page) (0-based), in
+    page order. Page
+    ranges are fanned out across a process pool (`executor` if given, else a
+    pool of `workers`); results are consumed in submission order so chunk
+    indices and table_ids are identical to the serial path.
+    """
+    if end_page is None:
+        end_page = count_pdf_pages(path)
+    if triage_threshold is None:
+        # resolved here: worker processes may not share a configured value
+        triage_threshold = TABLE_TRIAGE_THRESHOLD
+    n = end_page - start_page
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # spread short ranges (e.g. one checkpoint batch) across all workers
+    pages_per_task = max(1, min(pages_per_task, -(-n // max(workers, 1))))
+    starts = list(range(start_page, end_page, pages_per_task))
+    ends = [min(s + pages_per_task, end_page) for s in starts]
+
+    if executor is None and (workers <= 1 or len(starts) <= 1):
+        for s, e in zip(starts, ends):
+            yield from _extract_page_range(path, s, e, triage_threshold)
+        return
+
+    reserved = 0
+    if executor is None:
+        reserved = _acquire_workers(min(workers, len(starts)))
+        if not reserved:
+            for s, e in zip(starts, ends):
+                yield from _extract_page_range(path, s, e, triage_threshold)
+            return
+        executor = _extract_pool(reserved)
+    try:
+        for batch in executor.map(_extract_page_range, repeat(path), starts, ends, repeat(triage_threshold)):
+            yield from batch
+    finally:
+        if reserved:
+            executor.shutdown()
+            _release_workers(reserved)
+
+def extract_pages_from_pdf_path(path, workers=None, pages_per_task=PAGES_PER_TASK):
+    return list(iter_pdf_pages(path, workers=workers, pages_per_task=pages_per_task))
+
+def add_chunks_batched(collection, documents, ids, metadatas, batch_size=EMBED_BATCH_SIZE, pipeline=True, stats=None):
+    """
+    Embeds and inserts chunks in batches of `batch_size`. With `pipeline=True`
+    the embedding of batch N+1 runs on a worker thread while batch N is being
+    written (ONNX releases the GIL). Chunks already in the embedding cache
+    (embedding_cache.py) are not re-embedded. Accumulates embed/insert seconds
+    and cache hits into `stats` if given.
+    """
+    stats = stats if stats is not None else {}
+    starts = list(range(0, len(documents), batch_size))
+    cache = embedding_cache.get_embedding_cache()
+
+    def embed(start):
+        t0 = time.perf_counter()
+        batch = documents[start:start + batch_size]
+        if cache is not None:
+            vectors, hits = cache.embed(batch, store.get_embedding_function(), EMBEDDING_MODEL_ID)
+        else:
+            vectors, hits = store.get_embedding_function()(batch), 0
+        return vectors, hits, time.perf_counter() - t0
+
+    def insert(start, vectors):
+        t0 = time.perf_counter()
+        end = start + batch_size
+        # upsert: replaying a batch after a crash (resumed ingest) is a no-op
+        collection.upsert(
+            documents=documents[start:end],
+            embeddings=vectors,
+            ids=ids[start:end],
+            metadatas=metadatas[start:end]
         )
+        return time.perf_counter() - t0
 
-    # Extract tables and save them to disk for deterministic queries
-    tables = extract_tables_from_pdf_path(file_path)
-    tables_dir = os.path.join("data", "tables", collection_name)
-    os.makedirs(tables_dir, exist_ok=True)
-    tables_meta = []
-    for t in tables:
-        # save CSV
-        csv_path = os.path.join(tables_dir, f"{t['table_id']}.csv")
-        try:
-            t['df'].to_csv(csv_path, index=False, header=True)
-        except Exception:
-            # fallback: write as JSON preview
-            with open(csv_path + ".json", "w", encoding="utf-8") as f:
-                json.dump(t['preview'], f)
-            csv_path = csv_path + ".json"
-
-        tables_meta.append({
-            "table_id": t["table_id"],
-            "page": t["page"],
-            "csv_path": csv_path,
-            "preview": t["preview"]
-        })
+    embed_s = 0.0
+    insert_s = 0.0
+    cache_hits = 0
+    if pipeline and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(embed, starts[0])
+            for bi, start in enumerate(starts):
+                vectors, hits, dt = pending.result()
+                embed_s += dt
+                cache_hits += hits
+                if bi + 1 < len(starts):
+                    pending = executor.submit(embed, starts[bi + 1])
+                insert_s += insert(start, vectors)
+    else:
+        for start in starts:
+            vectors, hits, dt = embed(start)
+            embed_s += dt
+            cache_hits += hits
+            insert_s += insert(start, vectors)
+
+    tr = tracing.current_trace()
+    if tr is not None:
+        # embeddings run on a worker thread, so record the totals here
+        tr.add("embedding", embed_s, len(starts))
+        tr.add("chroma_insert", insert_s, len(starts))
+        tr.count("chunks_embedded", len(documents) - cache_hits)
+        tr.count("embedding_cache_hits", cache_hits)
+    stats["embed_s"] = stats.get("embed_s", 0.0) + embed_s
+    stats["insert_s"] = stats.get("insert_s", 0.0) + insert_s
+    stats["n_batches"] = stats.get("n_batches", 0) + len(starts)
+    stats["batch_size"] = batch_size
+    stats["embed_cache_hits"] = stats.get("embed_cache_hits", 0) + cache_hits
+    return stats
+
+def tables_dir_for(collection_name: str) -> str:
+    return os.path.join("data", "tables", collection_name)
 
-    # Save tables metadata
+def _save_table(tables_dir, t):
+    csv_path = os.path.join(tables_dir, f"{t['table_id']}.csv")
+    try:
+        t['df'].to_csv(csv_path, index=False, header=True)
+    except Exception:
+        # fallback: write as JSON preview
+        with open(csv_path + ".json", "w", encoding="utf-8") as f:
+            json.dump(t['preview'], f)
+        csv_path = csv_path + ".json"
+    return {
+        "table_id": t["table_id"],
+        "page": t["page"],
+        "csv_path": csv_path,
+        "preview": t["preview"]
+    }
+
+def _write_tables_meta(tables_dir, tables_meta):
     meta_path = os.path.join(tables_dir, "tables_meta.json")
-    with open(meta_path, "w", encoding="utf-8") as f:
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
         json.dump(tables_meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+
+FACT_PARTS_FILE = "facts_parts.jsonl"
+
+def _finalize_facts(tables_dir):
+    """Merges the per-checkpoint fact parts into the columnar facts file."""
+    parts_path = os.path.join(tables_dir, FACT_PARTS_FILE)
+    facts = {}
+    if os.path.exists(parts_path):
+        with open(parts_path, "r", encoding="utf-8") as f:
+            for line in f:
+                fact = json.loads(line)
+                # a replayed checkpoint may have appended the same facts twice
+                facts[(fact["table_id"], fact["row"], fact["col"])] = fact
+    save_facts(tables_dir, list(facts.values()))
+    if os.path.exists(parts_path):
+        os.remove(parts_path)
+    return len(facts)
+
+def _new_manifest(key, file_path, filename_hint):
+    safe_name = filename_hint.replace(" ", "_").replace(".", "_")
+    return {
+        "key": key,
+        # named by content, not start time: same-named filings ingested in the
+        # same second (a/10k.pdf, b/10k.pdf) must not share a collection
+        "collection_name": f"financial_docs_{safe_name}_{key[:12]}",
+        "source": file_path,
+        "filename": filename_hint,
+        "n_pages": count_pdf_pages(file_path),
+        "pages_committed": 0,
+        "n_chunks": 0,
+        "has_text": False,
+        "tables": [],
+        "chunker_state": None,
+        "status": "in_progress",
+        "started_at": time.time(),
+        "updated_at": time.time()
+    }
+
+def ingest_pdf_return_collection(file_path: str, filename_hint: str = "doc", workers=None,
+                                 batch_size: int = EMBED_BATCH_SIZE, pipeline: bool = True, stats: dict = None,
+                                 checkpoint_pages: int = CHECKPOINT_PAGES, progress=None):
+    """
+    Ingests a PDF into a collection and returns (collection_name, n_chunks).
+
+    Work is committed every `checkpoint_pages` pages (chunks upserted, tables
+    saved, then the manifest updated), so re-running after a failure resumes
+    from the last committed batch of the same file; see ingest_status().
+    Pass a dict as `stats` to receive per-stage timings (seconds) and counts,
+    plus a "trace" entry when tracing is enabled (see tracing.py).
+    `progress(**fields)`, if given, is called as pages are processed with
+    stage, pages_done, n_pages, tables_found and chunks (see jobs.py).
+    """
+    stats = stats if stats is not None else {}
+    with tracing.trace("ingest") as tr:
+        out = _ingest_pdf(file_path, filename_hint, workers, batch_size, pipeline, stats, checkpoint_pages,
+                          progress or (lambda **fields: None))
+        if tr is not None:
+            for span_name, key in (("pdf_parse", "extract_s"), ("chunking", "chunk_s"),
+                                   ("classify", "classify_s"), ("tables", "tables_s")):
+                tr.add(span_name, stats.get(key, 0.0))
+            for key in ("n_pages", "n_chunks", "n_tables", "n_facts"):
+                tr.count(key[2:], stats.get(key, 0))
+            tr.count("pages_tables_skipped", stats.get("pages_tables_skipped", 0))
+    if tr is not None:
+        stats["trace"] = tr.to_dict()
+    return out
+
+def _ingest_pdf(file_path, filename_hint, workers, batch_size, pipeline, stats, checkpoint_pages, progress):
+    t_start = time.perf_counter()
+    for k in ("extract_s", "chunk_s", "classify_s", "tables_s"):
+        stats[k] = 0.0
+    stats["pages_tables_skipped"] = 0
+
+    with open(file_path, "rb") as f:
+        key = ingest_cache.compute_cache_key(f.read(), ingest_config())
+    manifest = checkpoints.get_manifest(key)
+    if manifest and not store.collection_exists(manifest["collection_name"]):
+        # e.g. in-memory store restarted: nothing to resume into
+        manifest = None
+    if manifest and manifest["status"] == "complete":
+        stats.update(n_pages=manifest["n_pages"], n_chunks=manifest["n_chunks"], n_tables=len(manifest["tables"]),
+                     resumed_from_page=manifest["pages_committed"], total_s=time.perf_counter() - t_start)
+        return manifest["collection_name"], manifest["n_chunks"]
+    if manifest is None:
+        manifest = _new_manifest(key, file_path, filename_hint)
+        # an earlier ingest of the same bytes may have left chunks or tables under this name
+        if store.collection_exists(manifest["collection_name"]):
+            store.delete_collection(manifest["collection_name"])
+        shutil.rmtree(tables_dir_for(manifest["collection_name"]), ignore_errors=True)
+        checkpoints.save_manifest(manifest)
 
-    return collection_name, len(chunks)
+    collection_name = manifest["collection_name"]
+    n_pages = manifest["n_pages"]
+    collection = store.get_or_create_collection(collection_name)
+    # answers cached against an earlier ingest under this name are stale now,
+    # and so is its quantized index
+    answer_cache.invalidate_collection(collection_name)
+    quantized_index.delete_index(collection_name)
+    tables_dir = tables_dir_for(collection_name)
+    os.makedirs(tables_dir, exist_ok=True)
+    stats["resumed_from_page"] = manifest["pages_committed"]
+    progress(stage="extracting", pages_done=manifest["pages_committed"], n_pages=n_pages,
+             tables_found=len(manifest["tables"]), chunks=manifest["n_chunks"])
+
+    chunker = TokenChunker(CHUNK_SIZE, CHUNK_OVERLAP, state=manifest["chunker_state"])
+    if workers is None:
+        workers = os.cpu_count() or 1
+    remaining = n_pages - manifest["pages_committed"]
+    reserved = _acquire_workers(workers) if workers > 1 and remaining > 1 else 0
+    executor = _extract_pool(reserved) if reserved else None
+    # with no pool, iter_pdf_pages must not start one of its own
+    workers = reserved or 1
+    try:
+        for start in range(manifest["pages_committed"], n_pages, checkpoint_pages):
+            end = min(start + checkpoint_pages, n_pages)
+
+            # one streaming pass over this page range: pages are chunked as
+            # they arrive; only tables (and the text of their pages) are kept
+            records, tables, table_page_texts = [], [], {}
+            page_iter = iter_pdf_pages(file_path, workers=workers, start_page=start, end_page=end, executor=executor)
+            while True:
+                t0 = time.perf_counter()
+                page = next(page_iter, None)
+                stats["extract_s"] += time.perf_counter() - t0
+                if page is None:
+                    break
+                stats["pages_tables_skipped"] += page["tables_skipped"]
+                if page["tables"]:
+                    tables.extend(page["tables"])
+                    table_page_texts[page["page"]] = page["text"]
+                t0 = time.perf_counter()
+                records.extend(chunker.feed(page["page"], page["text"]))
+                stats["chunk_s"] += time.perf_counter() - t0
+                progress(pages_done=page["page"], tables_found=len(manifest["tables"]) + len(tables),
+                         chunks=manifest["n_chunks"] + len(records))
+            if end == n_pages:
+                records.extend(chunker.flush())
+
+            # Add text chunks with section metadata
+            t0 = time.perf_counter()
+            chunks = [c["text"] for c in records]
+            first = manifest["n_chunks"]
+            ids = [f"{collection_name}_chunk_{first + i}" for i in range(len(chunks))]
+            sections = classify_sections(chunks)
+            # numeric spans are indexed once here so the regex fallback lane can skip its scan
+            metadatas = [
+                {"chunk_index": first + i, "source": filename_hint, "section": sections[i],
+                 "page_start": c["page_start"], "page_end": c["page_end"], "n_tokens": c["n_tokens"],
+                 **span_metadata(c["text"])}
+                for i, c in enumerate(records)
+            ]
+            stats["classify_s"] += time.perf_counter() - t0
+            progress(stage="embedding")
+            if chunks:
+                add_chunks_batched(collection, chunks, ids, metadatas, batch_size=batch_size, pipeline=pipeline,
+                                   stats=stats)
+
+            # Save tables (already extracted in the same pass) to disk for deterministic
+            # queries, plus their typed numeric facts
+            t0 = time.perf_counter()
+            tables_meta = manifest["tables"] + [_save_table(tables_dir, t) for t in tables]
+            _write_tables_meta(tables_dir, tables_meta)
+            with open(os.path.join(tables_dir, FACT_PARTS_FILE), "a", encoding="utf-8") as f:
+                for t in tables:
+                    for fact in extract_table_facts(t["df"], t["table_id"], t["page"],
+                                                    table_page_texts.get(t["page"], "")):
+                        f.write(json.dumps(fact) + "\n")
+            stats["tables_s"] += time.perf_counter() - t0
+
+            # checkpoint
+            manifest.update(
+                pages_committed=end,
+                n_chunks=first + len(chunks),
+                has_text=manifest["has_text"] or any(c.strip() for c in chunks),
+                tables=tables_meta,
+                chunker_state=chunker.state(),
+                updated_at=time.time()
+            )
+            checkpoints.save_manifest(manifest)
+            stats["n_checkpoints"] = stats.get("n_checkpoints", 0) + 1
+            progress(stage="extracting", chunks=manifest["n_chunks"])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+            _release_workers(reserved)
+
+    if not manifest["has_text"]:
+        store.delete_collection(collection_name)
+        shutil.rmtree(tables_dir, ignore_errors=True)
+        checkpoints.delete_manifest(key)
+        raise ValueError("No text could be extracted from the PDF.")
+
+    progress(stage="finalizing")
+    t0 = time.perf_counter()
+    stats["n_facts"] = _finalize_facts(tables_dir)
+    # parse the saved tables once now so the first question doesn't pay for it
+    get_table_index(collection_name)
+    stats["tables_s"] += time.perf_counter() - t0
+    if store.RETRIEVAL_BACKEND == "quantized":
+        quantized_index.build_index(collection_name, stats=stats)
+
+    manifest.update(status="complete", chunker_state=None, updated_at=time.time())
+    checkpoints.save_manifest(manifest)
+    stats["n_pages"] = n_pages
+    stats["n_chunks"] = manifest["n_chunks"]
+    stats["n_tables"] = len(manifest["tables"])
+    stats["total_s"] = time.perf_counter() - t_start
+
+    return collection_name, manifest["n_chunks"]
+
+def ingest_status(file_path: str = None, key: str = None):
+    """
+    Progress of a (possibly interrupted) ingest, looked up by file or key:
+    {"status", "pages_committed", "n_pages", "progress", "n_chunks", ...}.
+    None if the file was never ingested with the current config.
+    """
+    if key is None:
+        with open(file_path, "rb") as f:
+            key = ingest_cache.compute_cache_key(f.read(), ingest_config())
+    manifest = checkpoints.get_manifest(key)
+    return checkpoints.summarize(manifest) if manifest else None
+
+def list_ingest_jobs():
+    return [checkpoints.summarize(m) for m in checkpoints.list_manifests()]
+
+# -----------------------
+# Content-addressed ingest cache
+# -----------------------
+def ingest_config():
+    return {
+        "chunk_size": CHUNK_SIZE,
+        "overlap": CHUNK_OVERLAP,
+        "embedding_model": EMBEDDING_MODEL_ID,
+        "pipeline_version": PIPELINE_VERSION,
+        "table_triage_threshold": TABLE_TRIAGE_THRESHOLD
+    }
+
+UPLOAD_DIR = os.path.join("data", "uploads")
+
+def ingest_pdf_bytes_cached(data: bytes, filename_hint: str = "doc", upload_dir: str = UPLOAD_DIR,
+                            stats: dict = None, progress=None):
+    """
+    Ingest a PDF given its raw bytes, reusing a previous ingest of identical
+    bytes + config. Returns (collection_name, n_chunks, from_cache).
+    """
+    key = ingest_cache.compute_cache_key(data, ingest_config())
+    entry = get_cached_ingest(key)
+    if entry:
+        return entry["collection_name"], entry["n_chunks"], True
+
+    os.makedirs(upload_dir, exist_ok=True)
+    # key prefix: concurrent uploads with the same file name must not overwrite each other
+    saved_path = os.path.join(upload_dir, f"{key[:12]}_{filename_hint}")
+    with open(saved_path, "wb") as f:
+        f.write(data)
+
+    collection_name, n_chunks = ingest_pdf_return_collection(saved_path, filename_hint=filename_hint, stats=stats,
+                                                             progress=progress)
+    _put_cached_ingest(key, collection_name, n_chunks, filename_hint, saved_path, len(data), uploaded=True)
+    return collection_name, n_chunks, False
+
+def ingest_pdf_path_cached(file_path: str, filename_hint: str = None, workers=None, stats: dict = None,
+                           progress=None):
+    """
+    Like ingest_pdf_bytes_cached for a PDF already on disk (batch ingestion):
+    the file is ingested in place, not copied. Returns (collection_name,
+    n_chunks, from_cache).
+    """
+    filename_hint = filename_hint or os.path.basename(file_path)
+    with open(file_path, "rb") as f:
+        data = f.read()
+    key = ingest_cache.compute_cache_key(data, ingest_config())
+    entry = get_cached_ingest(key)
+    if entry:
+        return entry["collection_name"], entry["n_chunks"], True
+    collection_name, n_chunks = ingest_pdf_return_collection(file_path, filename_hint=filename_hint, workers=workers,
+                                                             stats=stats, progress=progress)
+    _put_cached_ingest(key, collection_name, n_chunks, filename_hint, os.path.abspath(file_path), len(data))
+    return collection_name, n_chunks, False
+
+def get_cached_ingest(key: str):
+    """The cache entry for `key` if its collection still exists, else None."""
+    entry = ingest_cache.get_entry(key)
+    if entry:
+        if store.collection_exists(entry["collection_name"]):
+            return entry
+        # the store lost the collection (e.g. restart of an in-memory client)
+        ingest_cache.delete_entry(key)
+    return None
+
+def _put_cached_ingest(key, collection_name, n_chunks, filename_hint, path, size_bytes, uploaded=False):
+    # uploaded: `path` is our own copy of the upload, deleted with the entry;
+    # files ingested in place (batch CLI) are never deleted
+    ingest_cache.put_entry(key, {
+        "collection_name": collection_name,
+        "n_chunks": n_chunks,
+        "filename": filename_hint,
+        "path": path,
+        "uploaded": uploaded,
+        "size_bytes": size_bytes,
+        "config": ingest_config()
+    })
+
+def list_cached_ingests():
+    return ingest_cache.list_entries()
+
+def evict_cached_ingest(key: str):
+    """
+    Drops a cached ingest: its Chroma collection, quantized index, saved
+    tables, the stored upload (unless another entry still uses it) and the
+    cache entry.
+    """
+    entry = ingest_cache.get_entry(key)
+    if not entry:
+        return False
+    collection_name = entry["collection_name"]
+    try:
+        store.delete_collection(collection_name)
+    except Exception:
+        pass
+    quantized_index.delete_index(collection_name)
+    shutil.rmtree(tables_dir_for(collection_name), ignore_errors=True)
+    invalidate_table_index(collection_name)
+    answer_cache.invalidate_collection(collection_name)
+    checkpoints.delete_manifest(key)
+    ingest_cache.delete_entry(key)
+    path = entry.get("path")
+    # entries written before the "uploaded" flag: copies live in UPLOAD_DIR
+    uploaded = entry.get("uploaded", bool(path) and os.path.dirname(path) == UPLOAD_DIR)
+    if uploaded and path and not any(e.get("path") == path for e in ingest_cache.list_entries()):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return True
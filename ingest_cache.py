@@ -0,0 +1,60 @@
+# ingest_cache.py
+"""
+Content-addressed index of ingested documents.
+
+Each entry is keyed by sha256(pdf bytes + ingest config) and stored as its own
+small JSON file under data/ingest_cache/, so concurrent writers never have to
+rewrite a shared index.
+"""
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = os.path.join("data", "ingest_cache")
+
+def compute_cache_key(data: bytes, config: dict) -> str:
+    h = hashlib.sha256(data)
+    h.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def get_entry(key: str):
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def put_entry(key: str, entry: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = dict(entry, key=key, created_at=entry.get("created_at", time.time()))
+    tmp_path = _entry_path(key) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, _entry_path(key))
+    return entry
+
+def delete_entry(key: str):
+    try:
+        os.remove(_entry_path(key))
+        return True
+    except FileNotFoundError:
+        return False
+
+def list_entries():
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    entries = []
+    for fname in os.listdir(CACHE_DIR):
+        if not fname.endswith(".json"):
+            continue
+        entry = get_entry(fname[:-len(".json")])
+        if entry:
+            entries.append(entry)
+    return sorted(entries, key=lambda e: e.get("created_at", 0), reverse=True)
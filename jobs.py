@@ -0,0 +1,145 @@
+# jobs.py
+"""
+Local background job queue for long-running work (ingestion), so the app
+stays responsive: submit() returns a job id right away, the work runs on a
+small thread pool (extraction itself still fans out to worker processes),
+and get_job() returns a snapshot with status and progress to poll.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import digests
+import ingest
+import ingest_cache
+
+# ingests running at the same time; more are queued
+MAX_CONCURRENT_JOBS = int(os.getenv("FINDOC_MAX_CONCURRENT_JOBS", "2"))
+# finished jobs kept for the UI
+MAX_FINISHED_JOBS = 50
+
+class JobRegistry:
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="findoc-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, fn, *args, name: str = "", dedupe_key: str = None, **kwargs):
+        """
+        Runs fn(*args, progress=callback, **kwargs) in the background and
+        returns the job id. If a queued/running job has the same
+        `dedupe_key`, its id is returned instead of starting a second one.
+        """
+        with self._lock:
+            if dedupe_key is not None:
+                for job in self._jobs.values():
+                    if job["dedupe_key"] == dedupe_key and job["status"] in ("queued", "running"):
+                        return job["id"]
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                "id": job_id,
+                "name": name,
+                "dedupe_key": dedupe_key,
+                "status": "queued",
+                "progress": {},
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None
+            }
+            self._prune()
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status="running", started_at=time.time())
+
+        def progress(**fields):
+            with self._lock:
+                self._jobs[job_id]["progress"].update(fields)
+
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+        except Exception as e:
+            self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}",
+                         traceback=traceback.format_exc(), finished_at=time.time())
+        else:
+            self._update(job_id, status="done", result=result, finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j["status"] in ("done", "failed")]
+        finished.sort(key=lambda j: j["finished_at"] or 0)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job["id"]]
+
+    def get(self, job_id: str):
+        """Snapshot of one job (safe to read while it runs), or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, progress=dict(job["progress"])) if job else None
+
+    def list(self):
+        with self._lock:
+            jobs = [dict(j, progress=dict(j["progress"])) for j in self._jobs.values()]
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+    def active(self) -> int:
+        with self._lock:
+            return sum(j["status"] in ("queued", "running") for j in self._jobs.values())
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_job_registry() -> JobRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobRegistry()
+    return _registry
+
+def get_job(job_id: str):
+    return get_job_registry().get(job_id)
+
+def list_jobs():
+    return get_job_registry().list()
+
+def submit_ingest(data: bytes, filename_hint: str, build_digests: bool = None) -> str:
+    """
+    Queues ingest_pdf_bytes_cached for an uploaded PDF. Job progress carries
+    pages_done / n_pages / tables_found / chunks; the result is
+    {"collection_name", "n_chunks", "from_cache", "stats", "digest_job"}.
+    With `build_digests` (default FINDOC_DIGESTS) a digest job is queued once
+    the ingest is done; its id is the result's "digest_job".
+    """
+    if build_digests is None:
+        build_digests = digests.DIGESTS_AFTER_INGEST
+
+    def run(progress):
+        stats = {}
+        collection_name, n_chunks, from_cache = ingest.ingest_pdf_bytes_cached(
+            data, filename_hint=filename_hint, stats=stats, progress=progress
+        )
+        digest_job = submit_digests(collection_name, name=filename_hint) if build_digests else None
+        return {"collection_name": collection_name, "n_chunks": n_chunks, "from_cache": from_cache, "stats": stats,
+                "digest_job": digest_job}
+
+    key = ingest_cache.compute_cache_key(data, ingest.ingest_config())
+    return get_job_registry().submit(run, name=filename_hint, dedupe_key=key)
+
+def submit_digests(collection_name: str, name: str = None) -> str:
+    """Queues digests.build_digests for a collection; the result is its stats."""
+    def run(progress):
+        stats = {}
+        digests.build_digests(collection_name, progress=progress, stats=stats)
+        return stats
+
+    return get_job_registry().submit(run, name=f"{name or collection_name} (digests)",
+                                     dedupe_key=f"digests:{collection_name}")
@@ -0,0 +1,385 @@
+# main.py
+"""
+Headless entry point for batch work (e.g. nightly loads of hundreds of filings).
+
+Ingest PDFs, one file per worker process, skipping files already in the
+ingest cache, then print per-file and aggregate throughput. Workers extract,
+chunk and embed; every Chroma call they make runs on the parent's client
+(Chroma's persistent store must not be opened by several processes):
+
+    python main.py ingest filings/ --workers 4
+    python main.py ingest --manifest filings.txt --workers 8 --max-tasks-per-child 4 --report ingest_report.json
+
+A manifest is a text file with one PDF path per line, or a .jsonl file of
+{"path": ..., "filename": ...} objects; relative paths are taken from the
+manifest's directory.
+
+Answer a question file against ingested collections and write JSON answers:
+
+    python main.py ask questions.txt --collection apple_10k_2024.pdf --out answers.json
+    python main.py ask questions.jsonl --out answers.json
+
+A .txt question file has one question per line, asked of every --collection
+(several collections make it a multi-filing question). A .jsonl file has
+{"question": ..., "collections": [...]} objects. Collections are given by
+Chroma name or by the file name they were ingested from.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ingest
+import ingest_cache
+import store
+
+# -----------------------
+# Batch ingestion
+# -----------------------
+def collect_pdfs(inputs, manifest=None):
+    """[(path, filename)] from files/directories (searched recursively) and an optional manifest."""
+    items = []
+    for inp in inputs:
+        if os.path.isdir(inp):
+            for root, _, files in os.walk(inp):
+                items.extend((os.path.join(root, f), f) for f in sorted(files) if f.lower().endswith(".pdf"))
+        else:
+            items.append((inp, os.path.basename(inp)))
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if manifest.endswith(".jsonl"):
+                    row = json.loads(line)
+                    path, filename = row["path"], row.get("filename")
+                else:
+                    path, filename = line, None
+                path = path if os.path.isabs(path) else os.path.join(base, path)
+                items.append((path, filename or os.path.basename(path)))
+    return sorted(set(items), key=items.index)
+
+def _init_worker(store_mode, store_path, max_memory_mb):
+    store.configure(mode=store_mode, path=store_path)
+    if max_memory_mb:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+class _StoreProxy:
+    """Chroma client stand-in for worker processes: each call runs on the parent's client (see _serve_store)."""
+
+    def __init__(self, requests, replies):
+        self._requests = requests
+        self._replies = replies
+
+    def call(self, collection, method, *args, **kwargs):
+        self._requests.put((self._replies, collection, method, args, kwargs))
+        ok, value = self._replies.get()
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+    def get_collection(self, name, embedding_function=None):
+        self.call(None, "get_collection", name)
+        return _CollectionProxy(self, name)
+
+    def get_or_create_collection(self, name, embedding_function=None):
+        self.call(None, "get_or_create_collection", name)
+        return _CollectionProxy(self, name)
+
+    def delete_collection(self, name):
+        self.call(None, "delete_collection", name)
+
+    def list_collections(self):
+        return [_CollectionProxy(self, name) for name in self.call(None, "list_collection_names")]
+
+class _CollectionProxy:
+    def __init__(self, client, name):
+        self._client = client
+        self.name = name
+
+    def __getattr__(self, method):
+        # upsert, get, count, ... on the parent's collection of this name
+        return lambda *args, **kwargs: self._client.call(self.name, method, *args, **kwargs)
+
+def _serve_store(requests):
+    """Parent thread: runs the workers' store calls one at a time until a None request."""
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        replies, collection, method, args, kwargs = request
+        try:
+            if collection is not None:
+                value = getattr(store.get_collection(collection), method)(*args, **kwargs)
+            elif method == "list_collection_names":
+                value = store.list_collection_names()
+            else:
+                getattr(store, method)(*args)
+                value = None
+            replies.put((True, value))
+        except Exception as e:
+            replies.put((False, f"{type(e).__name__}: {e}"))
+
+def _ingest_one(path, filename, extract_workers, requests=None, replies=None):
+    """Worker: ingests one PDF; never raises, so one bad filing doesn't stop the batch."""
+    t0 = time.perf_counter()
+    stats = {}
+    if requests is not None:
+        store.use_client(_StoreProxy(requests, replies))
+    try:
+        collection_name, n_chunks, from_cache = ingest.ingest_pdf_path_cached(
+            path, filename_hint=filename, workers=extract_workers, stats=stats
+        )
+        status = "cached" if from_cache else "ingested"
+        error = None
+    except Exception as e:
+        collection_name, n_chunks, status = None, 0, "failed"
+        error = f"{type(e).__name__}: {e}"
+        stats["traceback"] = traceback.format_exc()
+    return {
+        "path": path,
+        "filename": filename,
+        "status": status,
+        "collection_name": collection_name,
+        "n_pages": stats.get("n_pages", 0),
+        "n_chunks": n_chunks,
+        "n_tables": stats.get("n_tables", 0),
+        "seconds": time.perf_counter() - t0,
+        "error": error,
+        "stats": {k: v for k, v in stats.items() if k not in ("trace", "traceback")},
+        "traceback": stats.get("traceback")
+    }
+
+def _rate(n, seconds):
+    return n / seconds if seconds > 0 else 0.0
+
+def run_ingest(args):
+    items = collect_pdfs(args.inputs, args.manifest)
+    if not items:
+        print("no PDFs found", file=sys.stderr)
+        return 1
+    # Chroma creates/migrates its sqlite file on first open; do it once here
+    # so worker processes don't race on it
+    store.configure(mode="persistent", path=args.store_path)
+    store.get_client()
+
+    results, todo, seen_keys = [], [], {}
+    for path, filename in items:
+        try:
+            with open(path, "rb") as f:
+                key = ingest_cache.compute_cache_key(f.read(), ingest.ingest_config())
+        except OSError as e:
+            results.append({"path": path, "filename": filename, "status": "failed", "error": str(e),
+                            "n_pages": 0, "n_chunks": 0, "seconds": 0.0})
+            continue
+        entry = None if args.force else ingest.get_cached_ingest(key)
+        if entry:
+            results.append({"path": path, "filename": filename, "status": "cached",
+                            "collection_name": entry["collection_name"], "n_pages": 0,
+                            "n_chunks": entry["n_chunks"], "seconds": 0.0})
+        elif key in seen_keys:
+            # same bytes listed twice: ingest once
+            results.append({"path": path, "filename": filename, "status": "duplicate",
+                            "duplicate_of": seen_keys[key], "n_pages": 0, "n_chunks": 0, "seconds": 0.0})
+        else:
+            if args.force and ingest_cache.get_entry(key):
+                ingest.evict_cached_ingest(key)
+            seen_keys[key] = path
+            todo.append((path, filename))
+
+    counts = {status: sum(r["status"] == status for r in results) for status in ("cached", "duplicate", "failed")}
+    print(f"{len(items)} PDFs: {len(todo)} to ingest, {counts['cached']} cached, {counts['duplicate']} duplicate, "
+          f"{counts['failed']} unreadable")
+    t_start = time.perf_counter()
+    if todo:
+        ctx = multiprocessing.get_context("spawn")
+        manager = ctx.Manager()
+        requests = manager.Queue()
+        server = threading.Thread(target=_serve_store, args=(requests,), daemon=True)
+        server.start()
+        pool_kwargs = {}
+        # ProcessPoolExecutor only takes max_tasks_per_child from Python 3.11
+        if sys.version_info >= (3, 11):
+            pool_kwargs["max_tasks_per_child"] = args.max_tasks_per_child
+        elif args.max_tasks_per_child:
+            print("--max-tasks-per-child needs Python 3.11+; workers are not replaced", file=sys.stderr)
+        # spawn: workers start clean instead of inheriting this process's Chroma client
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(todo)),
+                                 mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=("persistent", args.store_path, args.max_memory_mb),
+                                 **pool_kwargs) as executor:
+            futures = [executor.submit(_ingest_one, path, filename, args.extract_workers, requests, manager.Queue())
+                       for path, filename in todo]
+            for i, future in enumerate(as_completed(futures), start=1):
+                try:
+                    r = future.result()
+                except Exception as e:
+                    # the worker died (e.g. killed over its memory limit); the pool can't be trusted after that
+                    path, filename = todo[futures.index(future)]
+                    r = {"path": path, "filename": filename, "status": "failed", "error": f"{type(e).__name__}: {e}",
+                         "n_pages": 0, "n_chunks": 0, "seconds": 0.0}
+                results.append(r)
+                print(f"[{i}/{len(todo)}] {r['status']:<8} {r['filename']}  {r['n_pages']} pages, "
+                      f"{r['n_chunks']} chunks, {r['seconds']:.1f}s" + (f"  {r['error']}" if r.get("error") else ""))
+        requests.put(None)
+        server.join()
+        manager.shutdown()
+    wall_s = time.perf_counter() - t_start
+
+    report = throughput_report(results, wall_s)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.report}")
+    return 1 if report["aggregate"]["failed"] else 0
+
+def throughput_report(results, wall_s):
+    ingested = [r for r in results if r["status"] == "ingested"]
+    pages = sum(r["n_pages"] for r in ingested)
+    chunks = sum(r["n_chunks"] for r in ingested)
+    for r in results:
+        r["pages_per_s"] = _rate(r["n_pages"], r["seconds"])
+        r["chunks_per_s"] = _rate(r["n_chunks"], r["seconds"])
+    return {
+        "files": results,
+        "aggregate": {
+            "wall_s": wall_s,
+            "ingested": len(ingested),
+            "skipped": sum(r["status"] in ("cached", "duplicate") for r in results),
+            "failed": sum(r["status"] == "failed" for r in results),
+            "pages": pages,
+            "chunks": chunks,
+            "docs_per_s": _rate(len(ingested), wall_s),
+            "pages_per_s": _rate(pages, wall_s),
+            "chunks_per_s": _rate(chunks, wall_s)
+        }
+    }
+
+def print_report(report):
+    print(f"\n{'file':<40} {'status':<9} {'pages':>6} {'chunks':>7} {'secs':>7} {'pages/s':>8} {'chunks/s':>9}")
+    for r in report["files"]:
+        print(f"{r['filename'][:40]:<40} {r['status']:<9} {r['n_pages']:>6} {r['n_chunks']:>7} {r['seconds']:>7.1f} "
+              f"{r['pages_per_s']:>8.1f} {r['chunks_per_s']:>9.1f}")
+    a = report["aggregate"]
+    print(f"\n{a['ingested']} ingested, {a['skipped']} skipped, {a['failed']} failed in {a['wall_s']:.1f}s: "
+          f"{a['docs_per_s']:.2f} docs/s, {a['pages_per_s']:.1f} pages/s, {a['chunks_per_s']:.1f} chunks/s")
+    for r in report["files"]:
+        if r["status"] == "failed":
+            print(f"  FAILED {r['path']}: {r['error']}")
+
+# -----------------------
+# Batch questions
+# -----------------------
+def resolve_collection(name_or_filename: str) -> str:
+    if store.collection_exists(name_or_filename):
+        return name_or_filename
+    # newest ingest of that file name wins
+    matches = [e for e in ingest_cache.list_entries() if e.get("filename") == name_or_filename]
+    matches.sort(key=lambda e: e.get("created_at", 0), reverse=True)
+    for entry in matches:
+        if store.collection_exists(entry["collection_name"]):
+            return entry["collection_name"]
+    raise KeyError(f"no collection or ingested file named {name_or_filename!r}")
+
+def load_questions(path, collections):
+    """[{"question", "collections"}] from a .txt (asked of every collection) or .jsonl file."""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                row = json.loads(line)
+                names = row.get("collections") or ([row["collection"]] if row.get("collection") else collections)
+                items.append({"question": row["question"], "collections": names})
+            else:
+                items.append({"question": line, "collections": collections})
+    return items
+
+async def _answer_all(items, k, max_concurrent_llm, use_cache):
+    import rag
+    semaphore = asyncio.Semaphore(max_concurrent_llm)
+
+    async def answer(item):
+        t0 = time.perf_counter()
+        out = {"question": item["question"], "collections": item["collections"]}
+        try:
+            names = [resolve_collection(c) for c in item["collections"]]
+            if not names:
+                raise ValueError("no collection given")
+            if len(names) == 1:
+                res = await rag.ask_question_async(names[0], item["question"], k, semaphore, use_cache)
+            else:
+                res = await rag.ask_question_multi_async(names, item["question"], k, semaphore)
+            res.pop("answer_stream", None)
+            out.update(res)
+        except Exception as e:
+            out["error"] = f"{type(e).__name__}: {e}"
+        out["seconds"] = time.perf_counter() - t0
+        return out
+
+    return await asyncio.gather(*(answer(item) for item in items))
+
+def run_ask(args):
+    store.configure(mode="persistent", path=args.store_path)
+    items = load_questions(args.questions, args.collection or [])
+    t0 = time.perf_counter()
+    answers = asyncio.run(_answer_all(items, args.k, args.max_concurrent_llm, not args.no_cache))
+    wall_s = time.perf_counter() - t0
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(answers, f, indent=2, default=str)
+    failed = sum("error" in a for a in answers)
+    print(f"{len(answers)} questions in {wall_s:.1f}s ({_rate(len(answers), wall_s):.2f} questions/s), "
+          f"{failed} failed; wrote {args.out}")
+    return 1 if failed else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store-path", default=store.STORE_PATH, help="persistent Chroma directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="ingest PDFs from files, directories or a manifest")
+    p.add_argument("inputs", nargs="*", help="PDF files or directories")
+    p.add_argument("--manifest", help="text file of PDF paths, or .jsonl of {path, filename}")
+    p.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                   help="files ingested in parallel (one process each)")
+    p.add_argument("--extract-workers", type=int, default=1,
+                   help="page-extraction processes per file (keep at 1 when --workers > 1)")
+    p.add_argument("--max-tasks-per-child", type=int, default=8,
+                   help="files a worker ingests before it is replaced, releasing its memory (Python 3.11+)")
+    p.add_argument("--max-memory-mb", type=int, default=None,
+                   help="address-space (RLIMIT_AS) limit per worker; counts mapped libraries, "
+                        "so leave headroom (a few GB)")
+    p.add_argument("--force", action="store_true", help="re-ingest files already in the ingest cache")
+    p.add_argument("--report", help="write the throughput report as JSON")
+    p.set_defaults(func=run_ingest)
+
+    p = sub.add_parser("ask", help="answer a question file against ingested collections")
+    p.add_argument("questions", help=".txt (one question per line) or .jsonl file")
+    p.add_argument("--collection", action="append", help="collection name or ingested file name (repeatable)")
+    p.add_argument("--out", default="answers.json")
+    p.add_argument("--k", type=int, default=8)
+    p.add_argument("--max-concurrent-llm", type=int, default=4)
+    p.add_argument("--no-cache", action="store_true", help="bypass the answer cache")
+    p.set_defaults(func=run_ask)
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest" and not args.inputs and not args.manifest:
+        parser.error("ingest needs PDF paths, a directory or --manifest")
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# numeric_spans.py
+"""
+Numeric spans of each text chunk, extracted once at ingest and stored in the
+chunk's Chroma metadata:
+
+    numeric_spans = JSON list of {"text", "start", "end", "value", "scale", "unit", "label"}
+    has_numbers   = bool
+    n_numbers     = int
+
+`text` is the verbatim NUMERIC_RE match (what find_numeric_strings returns),
+`start`/`end` its offsets in the chunk, `value`/`scale`/`unit` the parsed
+number (None when it doesn't parse) and `label` the words before it on the
+same line ("Net sales", "Total assets"). The regex fallback lane and the
+has_numbers check read these instead of re-scanning the retrieved context.
+Chunks ingested before the index existed are scanned on the fly.
+"""
+import json
+import re
+from facts import parse_number_cell
+from utils import NUMERIC_RE
+
+LABEL_WORDS = 6
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z&'’/.-]*")
+
+def extract_numeric_spans(text: str):
+    spans = []
+    for m in NUMERIC_RE.finditer(text):
+        raw = m.group(0)
+        value_text = raw.strip()
+        if not value_text:
+            continue
+        start = m.start() + (len(raw) - len(raw.lstrip()))
+        parsed = parse_number_cell(value_text)
+        end = start + len(value_text)
+        line_start = text.rfind("\n", 0, start) + 1
+        # NUMERIC_RE stops before a trailing "%"
+        unit = "%" if text[end:end + 1] == "%" else ((parsed[2] or None) if parsed else None)
+        spans.append({
+            "text": value_text,
+            "start": start,
+            "end": end,
+            "value": parsed[0] if parsed else None,
+            "scale": parsed[3] if parsed else None,
+            "unit": unit,
+            "label": " ".join(_WORD_RE.findall(text[line_start:start])[-LABEL_WORDS:])
+        })
+    return spans
+
+def span_metadata(text: str) -> dict:
+    """Metadata fields for one chunk (Chroma metadata values must be scalars)."""
+    spans = extract_numeric_spans(text)
+    return {
+        "numeric_spans": json.dumps(spans, separators=(",", ":")),
+        "has_numbers": bool(spans),
+        "n_numbers": len(spans)
+    }
+
+def hit_spans(hit):
+    """Spans of one retrieved hit (see context_packer.hits_from_results)."""
+    stored = hit["metadata"].get("numeric_spans")
+    if stored is not None:
+        try:
+            return json.loads(stored)
+        except ValueError:
+            pass
+    return extract_numeric_spans(hit["document"])
+
+def context_spans(hits, sources):
+    """
+    Spans of the chunks that made it into the packed context (`sources` from
+    pack_context), in the order their text appears there. A chunk the packer
+    truncated only contributes the spans inside the text it kept. None if a
+    source can't be matched to its hit (chunks without source/chunk_index
+    metadata); callers then scan the context text instead.
+    """
+    by_chunk = {(h.get("collection"), h["metadata"].get("source"), h["metadata"].get("chunk_index")): h
+                for h in hits}
+    spans = []
+    for s in sorted(sources, key=lambda s: (s.get("passage", 0), s["chunk_index"])):
+        hit = by_chunk.get((s.get("collection"), s["source"], s["chunk_index"]))
+        if hit is None:
+            return None
+        kept = s.get("truncated_at")
+        spans.extend(span for span in hit_spans(hit) if kept is None or span["end"] <= kept)
+    return spans
+
+def unique_numbers(spans, max_results: int = 20):
+    """Distinct span texts in order, like extractor.extract_numbers_from_context."""
+    seen = set()
+    out = []
+    for span in spans:
+        if span["text"] not in seen:
+            seen.add(span["text"])
+            out.append(span["text"])
+            if len(out) >= max_results:
+                break
+    return out
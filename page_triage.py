@@ -0,0 +1,64 @@
+# page_triage.py
+"""
+Cheap "could this page hold a table?" score, computed before the full
+pdfplumber table detection (extract_tables + find_tables), which is skipped
+on pages scoring below the threshold.
+
+Signals, all available without another layout pass:
+  - ruling: line/rect/curve edges on the page (page.edges)
+  - digit density: share of digits in the page text
+  - numeric rows: the longest run of consecutive text lines carrying two or
+    more numeric tokens, i.e. numbers lined up in columns
+
+    FINDOC_TABLE_TRIAGE_THRESHOLD = score in [0, 1] a page needs for table
+        detection (default 0.3; 0 runs detection on every page)
+"""
+import os
+import re
+
+TABLE_TRIAGE_THRESHOLD = float(os.getenv("FINDOC_TABLE_TRIAGE_THRESHOLD", "0.3"))
+
+# one table cell: "$ 1,234", "(567)", "12.5%", "2024", "—"
+_NUMERIC_TOKEN_RE = re.compile(r"^[$(]*-?\d[\d,]*(?:\.\d+)?[)%]*$|^[—–-]$")
+
+# signal value at which each sub-score saturates, and its weight
+RULING_EDGES = 8
+DIGIT_DENSITY = 0.10
+NUMERIC_ROW_RUN = 3
+WEIGHTS = {"ruling": 0.25, "digits": 0.25, "numeric_rows": 0.5}
+
+_DIGIT_RE = re.compile(r"\d")
+_SPACE_RE = re.compile(r"\s")
+
+def _longest_numeric_run(text: str) -> int:
+    best = run = 0
+    for line in text.splitlines():
+        # prose lines rarely hold a digit at all; skip the token scan for them
+        if _DIGIT_RE.search(line) and sum(bool(_NUMERIC_TOKEN_RE.match(tok)) for tok in line.split()) >= 2:
+            run += 1
+            best = max(best, run)
+        else:
+            run = 0
+    return best
+
+def score_signals(text: str, n_edges: int) -> dict:
+    """Sub-scores and the weighted total ("score") for one page."""
+    non_space = len(_SPACE_RE.sub("", text))
+    digits = sum(map(text.count, "0123456789"))
+    parts = {
+        "ruling": min(1.0, n_edges / RULING_EDGES),
+        "digits": min(1.0, (digits / non_space if non_space else 0.0) / DIGIT_DENSITY),
+        "numeric_rows": min(1.0, _longest_numeric_run(text) / NUMERIC_ROW_RUN),
+    }
+    parts["score"] = sum(WEIGHTS[k] * v for k, v in parts.items())
+    return parts
+
+def table_score(page, text: str = None) -> float:
+    """Score of a pdfplumber page; pass `text` if extract_text() already ran."""
+    if text is None:
+        text = page.extract_text() or ""
+    try:
+        n_edges = len(page.edges)
+    except Exception:
+        n_edges = 0
+    return score_signals(text, n_edges)["score"]
@@ -0,0 +1,278 @@
+# quantized_index.py
+"""
+Compact on-disk vector index per collection, an alternative to querying
+Chroma's in-memory HNSW index (FINDOC_RETRIEVAL_BACKEND=quantized).
+
+Each collection's embeddings are unit-normalized and stored as int8 codes
+with one float32 scale per vector (~4x smaller than float32), plus the
+float32 vectors for an optional exact re-rank of the best candidates. Both
+are memory-mapped NumPy arrays, so the OS pages them in and out instead of
+every open collection pinning its vectors in RAM. Section and has_numbers
+live in small side arrays for `where` filtering; chunk text and metadata
+sit in a JSON-lines file and only the top-k rows are read.
+
+    FINDOC_QINDEX_PATH = root directory (default data/qindex)
+    FINDOC_QINDEX_RERANK = candidates re-ranked in float per result (default 4; 0 = int8 scores only)
+    FINDOC_QINDEX_MAX_OPEN = open indexes kept (default 64)
+
+Distances are squared L2 between unit vectors (2 - 2*cos), the same scale
+Chroma's default l2 space reports for the normalized MiniLM embeddings.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import store
+
+QINDEX_ROOT = os.getenv("FINDOC_QINDEX_PATH", os.path.join("data", "qindex"))
+RERANK_FACTOR = int(os.getenv("FINDOC_QINDEX_RERANK", "4"))
+MAX_OPEN_INDEXES = int(os.getenv("FINDOC_QINDEX_MAX_OPEN", "64"))
+
+# rows scored per block: bounds the float32 temporary to BLOCK_ROWS x dim
+BLOCK_ROWS = 8192
+# rows fetched per collection.get while building
+BUILD_PAGE = 2000
+INDEX_FILE = "index.json"
+FILTER_FIELDS = ("section", "has_numbers")
+
+_open = OrderedDict()
+_lock = threading.Lock()
+_build_locks = {}
+
+def index_dir(collection_name: str) -> str:
+    return os.path.join(QINDEX_ROOT, collection_name)
+
+def index_exists(collection_name: str) -> bool:
+    return os.path.exists(os.path.join(index_dir(collection_name), INDEX_FILE))
+
+def quantize(vectors):
+    """Unit-normalizes float vectors and returns (int8 codes, float32 scales, normalized float32)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+    scales = np.abs(unit).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(unit / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32), unit
+
+def build_index(collection_name: str, stats: dict = None) -> dict:
+    """
+    (Re)builds the index of a Chroma collection from its stored embeddings.
+    Written to a temporary directory and swapped in, so readers never see a
+    half-built index. Returns the index info (n, dim, sections, ...).
+    """
+    with _build_lock(collection_name):
+        t0 = time.perf_counter()
+        collection = store.get_collection(collection_name)
+        n = collection.count()
+        final_dir = index_dir(collection_name)
+        tmp_dir = f"{final_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        codes = vectors = None
+        scales = np.zeros(n, dtype=np.float32)
+        section_codes = np.zeros(n, dtype=np.int16)
+        has_numbers = np.zeros(n, dtype=bool)
+        sections = {}
+        offsets = [0]
+        dim = 0
+        row = 0
+        with open(os.path.join(tmp_dir, "rows.jsonl"), "wb") as rows_file:
+            for offset in range(0, n, BUILD_PAGE):
+                page = collection.get(limit=BUILD_PAGE, offset=offset,
+                                      include=["embeddings", "documents", "metadatas"])
+                if not page["ids"]:
+                    break
+                page_codes, page_scales, page_unit = quantize(page["embeddings"])
+                if codes is None:
+                    dim = page_codes.shape[1]
+                    codes = np.lib.format.open_memmap(os.path.join(tmp_dir, "codes.npy"), mode="w+",
+                                                      dtype=np.int8, shape=(n, dim))
+                    vectors = np.lib.format.open_memmap(os.path.join(tmp_dir, "vectors.npy"), mode="w+",
+                                                        dtype=np.float32, shape=(n, dim))
+                end = row + len(page["ids"])
+                codes[row:end] = page_codes
+                vectors[row:end] = page_unit
+                scales[row:end] = page_scales
+                for i, (chunk_id, doc, meta) in enumerate(zip(page["ids"], page["documents"], page["metadatas"])):
+                    meta = meta or {}
+                    section_codes[row + i] = sections.setdefault(meta.get("section", "other"), len(sections))
+                    has_numbers[row + i] = bool(meta.get("has_numbers", False))
+                    line = json.dumps({"id": chunk_id, "document": doc, "metadata": meta}).encode("utf-8") + b"\n"
+                    rows_file.write(line)
+                    offsets.append(offsets[-1] + len(line))
+                row = end
+
+        if codes is not None:
+            codes.flush()
+            vectors.flush()
+            del codes, vectors
+        np.save(os.path.join(tmp_dir, "scales.npy"), scales[:row])
+        np.save(os.path.join(tmp_dir, "sections.npy"), section_codes[:row])
+        np.save(os.path.join(tmp_dir, "has_numbers.npy"), has_numbers[:row])
+        np.save(os.path.join(tmp_dir, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        info = {
+            "collection_name": collection_name,
+            "n": row,
+            "dim": dim,
+            "sections": sorted(sections, key=sections.get),
+            "built_at": time.time()
+        }
+        with open(os.path.join(tmp_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+        drop_open(collection_name)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp_dir, final_dir)
+        if stats is not None:
+            stats["qindex_rows"] = row
+            stats["qindex_s"] = time.perf_counter() - t0
+        return info
+
+def _build_lock(collection_name: str):
+    with _lock:
+        return _build_locks.setdefault(collection_name, threading.Lock())
+
+def delete_index(collection_name: str):
+    drop_open(collection_name)
+    shutil.rmtree(index_dir(collection_name), ignore_errors=True)
+
+def drop_open(collection_name: str = None):
+    """Forgets an open index (all with no name) so the next query re-opens it."""
+    with _lock:
+        if collection_name is None:
+            _open.clear()
+        else:
+            _open.pop(collection_name, None)
+
+class QuantizedIndex:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.n = self.info["n"]
+        self.sections = {name: i for i, name in enumerate(self.info["sections"])}
+        if self.n:
+            self.codes = np.load(os.path.join(path, "codes.npy"), mmap_mode="r")
+            self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        else:
+            self.codes = self.vectors = np.zeros((0, 0), dtype=np.int8)
+        self.scales = np.load(os.path.join(path, "scales.npy"))
+        self.section_codes = np.load(os.path.join(path, "sections.npy"))
+        self.has_numbers = np.load(os.path.join(path, "has_numbers.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+
+    def search(self, query_embedding, k: int = 8, where: dict = None, rerank: int = RERANK_FACTOR):
+        """Returns (row indices, distances) of the k nearest rows matching `where`, nearest first."""
+        q = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+        rows = self._filter_rows(where) if where else None
+        n = self.n if rows is None else len(rows)
+        if n == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, BLOCK_ROWS):
+            idx = slice(start, min(n, start + BLOCK_ROWS)) if rows is None else rows[start:start + BLOCK_ROWS]
+            scores[start:start + BLOCK_ROWS] = (self.codes[idx].astype(np.float32) @ q) * self.scales[idx]
+
+        n_candidates = min(n, k * rerank if rerank else k)
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        candidate_rows = candidates if rows is None else rows[candidates]
+        if rerank:
+            order = np.argsort(candidate_rows)
+            candidate_rows = candidate_rows[order]
+            # sorted fancy indexing touches the memmap in file order
+            cand_scores = self.vectors[candidate_rows] @ q
+        else:
+            cand_scores = scores[candidates]
+        top = np.argsort(-cand_scores, kind="stable")[:k]
+        return candidate_rows[top], 2.0 - 2.0 * cand_scores[top]
+
+    def _filter_rows(self, where: dict):
+        return np.flatnonzero(self._mask(where))
+
+    def _mask(self, where: dict):
+        masks = []
+        for key, cond in where.items():
+            if key in ("$and", "$or"):
+                sub = [self._mask(c) for c in cond]
+                masks.append(np.logical_and.reduce(sub) if key == "$and" else np.logical_or.reduce(sub))
+            elif key in FILTER_FIELDS:
+                masks.append(self._field_mask(key, cond))
+            else:
+                raise ValueError(f"Unsupported filter for the quantized index: {key}")
+        return np.logical_and.reduce(masks) if masks else np.ones(self.n, dtype=bool)
+
+    def _field_mask(self, field: str, cond):
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        ((op, value),) = cond.items()
+        if op == "$eq":
+            values, negate = [value], False
+        elif op == "$ne":
+            values, negate = [value], True
+        elif op == "$in":
+            values, negate = list(value), False
+        elif op == "$nin":
+            values, negate = list(value), True
+        else:
+            raise ValueError(f"Unsupported operator for the quantized index: {op}")
+        if field == "section":
+            codes = [self.sections[v] for v in values if v in self.sections]
+            mask = np.isin(self.section_codes, codes)
+        else:
+            mask = np.isin(self.has_numbers, [bool(v) for v in values])
+        return ~mask if negate else mask
+
+    def rows(self, indices):
+        """(ids, documents, metadatas) for the given row indices, read from the rows file."""
+        ids, docs, metas = [], [], []
+        with open(os.path.join(self.path, "rows.jsonl"), "rb") as f:
+            for i in indices:
+                f.seek(int(self.offsets[i]))
+                row = json.loads(f.read(int(self.offsets[i + 1] - self.offsets[i])))
+                ids.append(row["id"])
+                docs.append(row["document"])
+                metas.append(row["metadata"])
+        return ids, docs, metas
+
+    def nbytes(self) -> int:
+        """On-disk size of the index files."""
+        return sum(os.path.getsize(os.path.join(self.path, f)) for f in os.listdir(self.path))
+
+def get_index(collection_name: str) -> QuantizedIndex:
+    """Opens (building it first if missing) a collection's index; recently used ones stay open."""
+    with _lock:
+        index = _open.get(collection_name)
+        if index is not None:
+            _open.move_to_end(collection_name)
+            return index
+    if not index_exists(collection_name):
+        build_index(collection_name)
+    index = QuantizedIndex(index_dir(collection_name))
+    with _lock:
+        _open[collection_name] = index
+        _open.move_to_end(collection_name)
+        while len(_open) > MAX_OPEN_INDEXES:
+            _open.popitem(last=False)
+    return index
+
+def query(collection_name: str, query_embedding, k: int = 8, where: dict = None, rerank: int = RERANK_FACTOR):
+    """Drop-in for collection.query(query_embeddings=[q], n_results=k, where=...) on one query."""
+    index = get_index(collection_name)
+    indices, distances = index.search(query_embedding, k=k, where=where, rerank=rerank)
+    ids, docs, metas = index.rows(indices)
+    return {
+        "ids": [ids],
+        "documents": [docs],
+        "metadatas": [metas],
+        "distances": [[float(d) for d in distances]]
+    }
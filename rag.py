@@ -1,16 +1,39 @@
 # rag.py
-import chromadb
-import requests
+import asyncio
+import contextlib
+import contextvars
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import re
-from extractor import numeric_pipeline
-from table_parser import load_tables_metadata
+from typing import TYPE_CHECKING
+from extractor import numeric_answer, table_lookup
+from table_parser import count_tables
+from answer_cache import get_answer_cache
+from classifier import match_categories
+from context_packer import CONTEXT_TOKEN_BUDGET, count_tokens, hits_from_results, pack_context
+from digests import DIGEST_ANSWER_MODE, DIGEST_ANSWER_PROMPT, digest_context
+from numeric_spans import context_spans, hit_spans, unique_numbers
+import quantized_index
+import store
+import tracing
+
+if TYPE_CHECKING:
+    # only for the get_http_session annotation; imported lazily at runtime
+    import requests
 
 # -----------------------
 # Configuration
 # -----------------------
-chroma_client = chromadb.Client()
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "gemma:7b"
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma:7b")
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+# max seconds between streamed chunks (not for the whole answer)
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "90"))
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", "2"))
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
 
 UNIFIED_PROMPT = """
 You are answering a question about a SINGLE financial document.
@@ -33,109 +56,247 @@ Question:
 Answer in clear, concise bullet points.
 """
 
-def call_ollama(prompt: str) -> str:
+MULTI_PROMPT = """
+You are comparing SEVERAL financial documents (filings).
+
+CRITICAL RULES:
+- Each context block is labelled with the filing it comes from
+- Attribute every statement and number to its filing; never mix filings up
+- Use ONLY the provided context
+- Do NOT invent facts or numbers
+- If a filing does not support the question, say "Not found in <filing>"
+- Be conservative and professional
+
+Context:
+{context}
+
+Question:
+{question}
+
+Answer in clear, concise bullet points, grouped by filing.
+"""
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session() -> "requests.Session":
+    """Keep-alive session shared by all LLM calls; retries connection failures and 502/503/504."""
+    global _http_session
+    if _http_session is None:
+        # requests/urllib3 are loaded on the first LLM call, not at import
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        with _http_session_lock:
+            if _http_session is None:
+                retry = Retry(
+                    total=OLLAMA_RETRIES,
+                    backoff_factor=0.5,
+                    status_forcelist=[502, 503, 504],
+                    allowed_methods=frozenset(["POST"])
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OLLAMA_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+def stream_ollama(prompt: str, stats: dict = None):
+    """
+    Yields response tokens as Ollama generates them. If `stats` is given it is
+    filled with ttft_s (time to first token), n_tokens, total_s and tokens_per_s.
+    Raises on HTTP/connection errors, after setting stats["error"]; see
+    call_ollama for the non-raising form.
+    """
+    stats = stats if stats is not None else {}
+    try:
+        yield from _stream_ollama(prompt, stats)
+    except Exception as e:
+        stats["error"] = f"{type(e).__name__}: {e}"
+        raise
+
+def _stream_ollama(prompt: str, stats: dict):
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": False
+        "stream": True
     }
+    t0 = time.perf_counter()
+    t_first = None
+    n_tokens = 0
     try:
-        r = requests.post(OLLAMA_URL, json=payload, timeout=90)
-        r.raise_for_status()
-        return r.json().get("response", "").strip()
+        with get_http_session().post(OLLAMA_URL, json=payload, stream=True,
+                                     timeout=(OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT)) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                msg = json.loads(line)
+                if msg.get("error"):
+                    raise RuntimeError(msg["error"])
+                token = msg.get("response", "")
+                if token:
+                    if t_first is None:
+                        t_first = time.perf_counter()
+                        stats["ttft_s"] = t_first - t0
+                    n_tokens += 1
+                    yield token
+                if msg.get("done"):
+                    # prefer the server's own generation counters when present
+                    if msg.get("eval_count") and msg.get("eval_duration"):
+                        stats["tokens_per_s"] = msg["eval_count"] / (msg["eval_duration"] / 1e9)
+                    # keep reading to the end of the body so the connection goes back to the pool
+    finally:
+        # also when the caller stops early, so the generation still gets timed
+        stats["total_s"] = time.perf_counter() - t0
+        stats["n_tokens"] = n_tokens
+        if "tokens_per_s" not in stats and t_first is not None and stats["total_s"] > stats["ttft_s"]:
+            stats["tokens_per_s"] = n_tokens / (stats["total_s"] - stats["ttft_s"])
+
+def call_ollama(prompt: str, stats: dict = None) -> str:
+    stats = stats if stats is not None else {}
+    try:
+        return "".join(stream_ollama(prompt, stats)).strip()
     except Exception as e:
+        stats.setdefault("error", f"{type(e).__name__}: {e}")
         return f"LLM error: {e}"
+    finally:
+        record_llm(tracing.current_trace(), stats)
 
-def build_context_from_results(results):
-    docs = results["documents"][0]
-    metadatas = results.get("metadatas", [[]])[0]
-
-    context_blocks = []
-    sources = []
+def record_llm(trace, stats: dict):
+    """Adds one generation's timing/token count (from stream_ollama stats) to `trace`."""
+    if trace is not None and stats.get("total_s") is not None:
+        trace.add("llm_generation", stats["total_s"])
+        trace.count("llm_tokens", stats.get("n_tokens", 0))
 
-    for i, doc in enumerate(docs):
-        meta = metadatas[i] if i < len(metadatas) else None
-        if meta and isinstance(meta, dict):
-            source = meta.get("source", f"Source_{i}")
-            section = meta.get("section", "other")
-        else:
-            source = f"Source_{i}"
-            section = "other"
-
-        context_blocks.append(doc)
-        sources.append({
-            "source": source,
-            "chunk_index": i,
-            "section": section,
-            "text_snippet": doc[:400]
-        })
-
-    context = "\n\n".join(context_blocks)
+def build_context_from_results(results, token_budget: int = CONTEXT_TOKEN_BUDGET):
+    """Token-budgeted, de-duplicated context (see context_packer); returns (context, sources)."""
+    context, sources, _ = pack_context(hits_from_results(results), token_budget)
     return context, sources
 
-def analyze_context(context: str):
-    has_numbers = bool(re.search(r"\d", context))
-
-    boilerplate_markers = [
-        "internal control over financial reporting",
-        "audited",
-        "coso",
-        "xbrl",
-        "form 10-k",
-        "opinion of",
-        "independent registered public accounting firm"
-    ]
-
-    narrative_markers = [
-        "business",
-        "strategy",
-        "operations",
-        "management",
-        "risk",
-        "performance",
-        "growth",
-        "segment",
-        "md&a",
-        "results of operations"
-    ]
-
-    lower_ctx = context.lower()
-    is_boilerplate = any(m in lower_ctx for m in boilerplate_markers)
-    has_narrative = any(m in lower_ctx for m in narrative_markers)
+def analyze_context(context: str, spans=None):
+    """`spans`: the context's numeric spans if known; saves the digit scan."""
+    has_numbers = bool(spans) if spans is not None else bool(re.search(r"\d", context))
+    categories = match_categories(context)
 
     return {
         "has_numbers": has_numbers,
-        "is_boilerplate": is_boilerplate,
-        "has_narrative": has_narrative
+        "is_boilerplate": "boilerplate" in categories,
+        "has_narrative": "narrative" in categories
     }
 
-def ask_question(collection_name: str, question: str, k: int = 8):
-    collection = chroma_client.get_collection(collection_name)
-    q_lower = question.lower()
-    want_summary = any(x in q_lower for x in ["summarize", "summary", "overview", "tl;dr", "summarize the"])
+# default cap on concurrent generations for the async API
+MAX_CONCURRENT_LLM = int(os.getenv("FINDOC_MAX_CONCURRENT_LLM", "4"))
+# numeric questions only retrieve chunks that contain numbers (has_numbers metadata)
+NUMERIC_RETRIEVAL_FILTER = os.getenv("FINDOC_NUMERIC_RETRIEVAL_FILTER", "0") == "1"
+
+def is_numeric_question(question: str, categories=None) -> bool:
+    """`categories`: the question's match_categories, if already computed."""
+    if categories is None:
+        categories = match_categories(question)
+    return "numeric" in categories
+
+@tracing.traced("query_embedding")
+def embed_query(question: str):
+    return store.get_embedding_function()([question])[0]
+
+@tracing.traced("chroma_query")
+def retrieve(collection_name: str, question: str, k: int = 8, query_embedding=None, categories=None):
+    if categories is None:
+        categories = match_categories(question)
+    if store.RETRIEVAL_BACKEND == "quantized":
+        if query_embedding is None:
+            query_embedding = embed_query(question)
+
+        def query(where=None):
+            return quantized_index.query(collection_name, query_embedding, k=k, where=where)
+    else:
+        collection = store.get_collection(collection_name)
+        # reuse the embedding computed for the answer cache instead of embedding twice
+        q = {"query_embeddings": [query_embedding]} if query_embedding is not None else {"query_texts": [question]}
 
-    if want_summary:
+        def query(where=None):
+            return collection.query(**q, n_results=k, **({"where": where} if where else {}))
+
+    filters = []
+    if "summary" in categories:
+        filters.append({"section": {"$in": ["business", "mdna"]}})
+    if NUMERIC_RETRIEVAL_FILTER and "numeric" in categories:
+        filters.append({"has_numbers": True})
+
+    if filters:
         try:
-            results = collection.query(
-                query_texts=[question],
-                n_results=k,
-                where={"section": {"$in": ["business", "mdna"]}}
-            )
+            results = query(filters[0] if len(filters) == 1 else {"$and": filters})
+            # e.g. no business/mdna chunks, or a collection ingested before has_numbers existed
             if not results["documents"][0] or all(not d for d in results["documents"][0]):
-                results = collection.query(query_texts=[question], n_results=k)
+                results = query()
         except Exception:
-            results = collection.query(query_texts=[question], n_results=k)
+            results = query()
     else:
-        results = collection.query(query_texts=[question], n_results=k)
+        results = query()
+    return results
+
+_NOT_LOOKED_UP = object()
+
+def prepare_answer(collection_name: str, question: str, k: int = 8, query_embedding=None):
+    """
+    Retrieval + routing shared by ask_question and ask_question_stream.
+    Returns a dict with context, sources, evidence and either a final
+    `answer` (numeric / boilerplate lanes) or an LLM `prompt`.
+    """
+    # the question is classified once; every routing step below reads these
+    categories = match_categories(question)
+    prepared = prepare_from_digests(collection_name, question, categories)
+    if prepared is not None:
+        return prepared
+    results = retrieve(collection_name, question, k, query_embedding, categories)
+    return route_answer(collection_name, question, results, categories=categories)
 
-    context, sources = build_context_from_results(results)
-    evidence = analyze_context(context)
+def prepare_from_digests(collection_name: str, question: str, categories=None):
+    """
+    Summary questions on a collection with section digests (digests.py) skip
+    retrieval: the digests are the context, answered with a short prompt or,
+    with FINDOC_DIGEST_ANSWER=direct, returned as they are. None otherwise.
+    """
+    if categories is None:
+        categories = match_categories(question)
+    if "summary" not in categories or "numeric" in categories:
+        return None
+    with tracing.span("digest_lookup"):
+        context, sources = digest_context(collection_name, question, categories)
+    if context is None:
+        return None
+    tracing.count("digest_answers")
+    direct = DIGEST_ANSWER_MODE == "direct"
+    return {
+        "context": context,
+        "sources": sources,
+        "evidence": analyze_context(context),
+        "answer": context if direct else None,
+        "prompt": None if direct else DIGEST_ANSWER_PROMPT.format(context=context, question=question),
+        "packing": {"chunks_in": 0, "chunks_used": 0, "tokens_out": count_tokens(context), "tokens_saved": 0},
+        "from_digests": True
+    }
 
+def route_answer(collection_name: str, question: str, results, table_result=_NOT_LOOKED_UP, categories=None):
+    """Routing half of prepare_answer; `table_result` may be looked up ahead of time (see ask_question_async)."""
+    hits = hits_from_results(results)
+    with tracing.span("context_packing"):
+        context, sources, packing = pack_context(hits)
+    spans = context_spans(hits, sources)
+    evidence = analyze_context(context, spans)
+    tracing.count("retrieved_chunks", packing["chunks_in"])
+    tracing.count("prompt_tokens_saved", packing["tokens_saved"])
+
+    answer = None
+    prompt = None
     # If numeric-style question: try table-first numeric pipeline (deterministic)
-    numeric_indicators = ["how much", "what is", "what was", "exact", "figure", "amount", "$",
-                          "net sales", "free cash flow", "revenue", "operating income", "net income", "eps", "ebitda", "cash"]
-    if any(x in q_lower for x in numeric_indicators):
-        answer = numeric_pipeline(collection_name, question, context)
+    if is_numeric_question(question, categories):
+        if table_result is _NOT_LOOKED_UP:
+            table_result = table_lookup(collection_name, question)
+        numbers = unique_numbers(spans, max_results=50) if spans is not None else None
+        answer = numeric_answer(table_result, context, numbers)
     elif evidence["is_boilerplate"] and not evidence["has_narrative"]:
         answer = (
             "The retrieved sections primarily contain audit/ compliance disclosures. "
@@ -143,24 +304,369 @@ def ask_question(collection_name: str, question: str, k: int = 8):
         )
     else:
         prompt = UNIFIED_PROMPT.format(context=context, question=question)
-        answer = call_ollama(prompt)
 
+    return {"context": context, "sources": sources, "evidence": evidence, "answer": answer, "prompt": prompt,
+            "packing": packing}
+
+def guard_numbers(answer: str, evidence: dict) -> str:
     # Safety: if model returned numbers but evidence says none -> refuse
     if not evidence["has_numbers"] and any(ch.isdigit() for ch in answer):
-        answer = (
+        return (
             "The document discusses this topic qualitatively. "
             "Exact numerical values are not explicitly stated in the retrieved context."
         )
+    return answer
 
+def _result(collection_name: str, prepared: dict, answer: str, llm_stats: dict):
     # Also attach readiness info: how many tables exist for this collection
-    tables_meta = load_tables_metadata(collection_name)
     readiness = {
-        "num_tables": len(tables_meta),
-        "num_retrieved_chunks": len(sources)
+        "num_tables": count_tables(collection_name),
+        "num_retrieved_chunks": prepared["packing"]["chunks_in"],
+        "num_context_chunks": prepared["packing"]["chunks_used"],
+        "context_tokens": prepared["packing"]["tokens_out"],
+        "context_tokens_saved": prepared["packing"]["tokens_saved"],
+        "from_digests": prepared.get("from_digests", False)
     }
+    return {
+        "answer": answer,
+        "sources": prepared["sources"],
+        "readiness": readiness,
+        "llm": llm_stats
+    }
+
+def lookup_cached_answer(collection_name: str, question: str, k: int):
+    """
+    Consults the answer cache: exact question text first, then (after
+    embedding the question) near-duplicates. Returns (result_or_None,
+    query_embedding); the embedding is reused for retrieval on a miss.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return None, None
+    cached, tier = cache.get_exact(collection_name, question, k)
+    query_embedding = None
+    if cached is None:
+        query_embedding = embed_query(question)
+        cached, tier = cache.get_semantic(collection_name, question, k, query_embedding)
+    if cached is not None:
+        return dict(cached, cache=tier), query_embedding
+    return None, query_embedding
+
+def store_cached_answer(collection_name: str, question: str, k: int, result: dict, query_embedding, used_llm: bool):
+    cache = get_answer_cache()
+    # a failed generation must not be served for the cache TTL, whatever the guard made of it
+    if cache is None or (result.get("llm") or {}).get("error"):
+        return
+    cacheable = {key: result[key] for key in ("answer", "sources", "readiness", "llm")}
+    cache.put(collection_name, question, k, cacheable, embedding=query_embedding, used_llm=used_llm)
+
+def ask_question(collection_name: str, question: str, k: int = 8, use_cache: bool = True, trace: bool = None):
+    """
+    Answers `question` from one collection. Returns {"answer", "sources",
+    "readiness", "llm", "cache"}, plus "trace" (per-stage spans and counters)
+    when tracing is enabled (FINDOC_TRACE, or `trace` for this call).
+    """
+    with tracing.trace("ask_question", enabled=trace) as tr:
+        result = _ask_question(collection_name, question, k, use_cache)
+    if tr is not None:
+        result["trace"] = tr.to_dict()
+    return result
+
+def _ask_question(collection_name: str, question: str, k: int, use_cache: bool):
+    query_embedding = None
+    if use_cache:
+        cached, query_embedding = lookup_cached_answer(collection_name, question, k)
+        if cached is not None:
+            return cached
+
+    prepared = prepare_answer(collection_name, question, k, query_embedding)
+    llm_stats = {}
+    answer = prepared["answer"]
+    if answer is None:
+        answer = call_ollama(prepared["prompt"], llm_stats)
+    result = _result(collection_name, prepared, guard_numbers(answer, prepared["evidence"]), llm_stats)
+    if use_cache:
+        store_cached_answer(collection_name, question, k, result, query_embedding, prepared["prompt"] is not None)
+        result["cache"] = None
+    return result
+
+def ask_question_stream(collection_name: str, question: str, k: int = 8, use_cache: bool = True,
+                        trace: bool = None):
+    """
+    Like ask_question, but the LLM answer is delivered incrementally:
+    iterate result["answer_stream"] for tokens. Once the stream is exhausted
+    result["answer"] holds the final (number-guarded) answer, which can differ
+    from the streamed text, and result["llm"] holds ttft/tokens-per-sec.
+    When the context has no numbers, generation stops at the first token with
+    a digit: that token is never yielded, the number-guard refusal is instead.
+    """
+    # the trace covers retrieval/routing here; generation is added, and the
+    # trace finished, once the stream is drained
+    with tracing.trace("ask_question_stream", enabled=trace, defer_finish=True) as tr:
+        query_embedding = None
+        cached = None
+        if use_cache:
+            cached, query_embedding = lookup_cached_answer(collection_name, question, k)
+        if cached is None:
+            prepared = prepare_answer(collection_name, question, k, query_embedding)
+    if cached is not None:
+        cached["answer_stream"] = iter([cached["answer"]])
+        if tr is not None:
+            tracing.finish(tr)
+            cached["trace"] = tr.to_dict()
+        return cached
+
+    result = _result(collection_name, prepared, prepared["answer"], {})
+    result["cache"] = None
+    if tr is not None:
+        result["trace"] = tr.to_dict()
+
+    def answer_stream():
+        try:
+            yield from generate()
+        finally:
+            # also when the consumer stops early
+            if tr is not None:
+                record_llm(tr, result["llm"])
+                tr.total_s += result["llm"].get("total_s", 0.0)
+                tracing.finish(tr)
+                result["trace"] = tr.to_dict()
+
+    def generate():
+        if prepared["answer"] is not None:
+            result["answer"] = guard_numbers(prepared["answer"], prepared["evidence"])
+            yield result["answer"]
+        else:
+            parts = []
+            guard = not prepared["evidence"]["has_numbers"]
+            refused = False
+            tokens = stream_ollama(prepared["prompt"], result["llm"])
+            try:
+                for token in tokens:
+                    parts.append(token)
+                    if guard and any(ch.isdigit() for ch in token):
+                        # guard_numbers would refuse this answer: don't show the figure
+                        refused = True
+                        result["llm"]["stopped_on_number"] = True
+                        break
+                    yield token
+            except Exception as e:
+                result["llm"]["error"] = f"{type(e).__name__}: {e}"
+                error = f"LLM error: {e}"
+                parts.append(error)
+                yield error
+            finally:
+                tokens.close()
+            result["answer"] = guard_numbers("".join(parts).strip(), prepared["evidence"])
+            if refused:
+                yield "\n\n" + result["answer"]
+        if use_cache:
+            store_cached_answer(collection_name, question, k, result, query_embedding, prepared["prompt"] is not None)
+
+    result["answer_stream"] = answer_stream()
+    return result
+
+# -----------------------
+# Async / concurrent API
+# -----------------------
+async def ask_question_async(collection_name: str, question: str, k: int = 8,
+                             llm_semaphore: asyncio.Semaphore = None, use_cache: bool = True):
+    """
+    Async ask_question: the Chroma query and the table-first numeric lookup run
+    concurrently on worker threads, and the LLM call waits on `llm_semaphore`
+    so callers can cap in-flight generations. Returns the same result dict.
+    """
+    with tracing.trace("ask_question") as tr:
+        result = await _ask_question_async(collection_name, question, k, llm_semaphore, use_cache)
+    if tr is not None:
+        result["trace"] = tr.to_dict()
+    return result
+
+async def _ask_question_async(collection_name, question, k, llm_semaphore, use_cache):
+    query_embedding = None
+    if use_cache:
+        cached, query_embedding = await asyncio.to_thread(lookup_cached_answer, collection_name, question, k)
+        if cached is not None:
+            return cached
+
+    categories = match_categories(question)
+    prepared = await asyncio.to_thread(prepare_from_digests, collection_name, question, categories)
+    if prepared is None:
+        retrieval = asyncio.to_thread(retrieve, collection_name, question, k, query_embedding, categories)
+        if is_numeric_question(question, categories):
+            results, table_result = await asyncio.gather(
+                retrieval, asyncio.to_thread(table_lookup, collection_name, question)
+            )
+            prepared = route_answer(collection_name, question, results, table_result, categories)
+        else:
+            prepared = route_answer(collection_name, question, await retrieval, categories=categories)
+
+    llm_stats = {}
+    answer = prepared["answer"]
+    if answer is None:
+        async with (llm_semaphore or contextlib.nullcontext()):
+            answer = await asyncio.to_thread(call_ollama, prepared["prompt"], llm_stats)
+    result = await asyncio.to_thread(
+        _result, collection_name, prepared, guard_numbers(answer, prepared["evidence"]), llm_stats
+    )
+    if use_cache:
+        await asyncio.to_thread(store_cached_answer, collection_name, question, k, result,
+                                query_embedding, prepared["prompt"] is not None)
+        result["cache"] = None
+    return result
+
+async def ask_questions_async(items, k: int = 8, max_concurrent_llm: int = MAX_CONCURRENT_LLM, use_cache: bool = True):
+    """
+    Answers a batch of (collection_name, question) pairs concurrently, with at
+    most `max_concurrent_llm` LLM requests in flight. Results keep input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent_llm)
+    return await asyncio.gather(*(
+        ask_question_async(collection_name, question, k, semaphore, use_cache)
+        for collection_name, question in items
+    ))
+
+def ask_questions(collection_name: str, questions, k: int = 8, max_concurrent_llm: int = MAX_CONCURRENT_LLM,
+                  use_cache: bool = True):
+    """Blocking wrapper: answer many questions about one collection concurrently."""
+    items = [(collection_name, q) for q in questions]
+    return asyncio.run(ask_questions_async(items, k, max_concurrent_llm, use_cache))
+
+# -----------------------
+# Multi-collection (multi-filing) queries
+# -----------------------
+# shared by all multi-filing queries, so the blocking wrapper doesn't spin up
+# a fresh thread pool per call (asyncio.run gives every call a new loop)
+FANOUT_WORKERS = int(os.getenv("FINDOC_FANOUT_WORKERS", "16"))
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="findoc-fanout")
+    return _fanout_executor
+
+def merge_results(per_collection, k: int):
+    """
+    Global top-k over several Chroma query results ({collection_name: results})
+    by distance. All collections share one embedding model, so distances are
+    comparable. Returns hits as {"collection", "document", "metadata", "distance"}.
+    """
+    hits = [hit for collection_name, results in per_collection.items()
+            for hit in hits_from_results(results, collection_name)]
+    hits.sort(key=lambda h: h["distance"] if h["distance"] is not None else float("inf"))
+    return hits[:k]
+
+def _filing_label(collection_name: str, per_collection: dict) -> str:
+    metadatas = (per_collection.get(collection_name, {}).get("metadatas") or [[]])[0] or []
+    source = metadatas[0].get("source") if metadatas and metadatas[0] else None
+    return source or collection_name
+
+async def ask_question_multi_async(collection_names, question: str, k: int = 8,
+                                   llm_semaphore: asyncio.Semaphore = None):
+    """
+    Answers one question across several collections (e.g. five 10-Ks).
+
+    The question is embedded once; the Chroma query and, for numeric
+    questions, the table-first lookup of every collection run concurrently
+    on worker threads, so latency grows with the slowest filing rather than
+    the number of filings. Retrieved chunks are merged globally by distance.
+    Numeric questions are answered per filing without the LLM; other
+    questions get one LLM call over the merged, filing-labelled context.
+
+    Returns {"answer", "sources", "per_filing", "readiness", "llm"} where
+    per_filing maps collection_name -> {"filing", "answer", "table_evidence",
+    "num_retrieved_chunks", "best_distance"}, plus "trace" when tracing is on.
+    """
+    with tracing.trace("ask_question_multi") as tr:
+        result = await _ask_question_multi_async(collection_names, question, k, llm_semaphore)
+    if tr is not None:
+        result["trace"] = tr.to_dict()
+    return result
+
+def _fanout(loop, fn, *args):
+    # run_in_executor doesn't carry contextvars over; copy them so spans reach the trace
+    return loop.run_in_executor(_get_fanout_executor(), contextvars.copy_context().run, fn, *args)
+
+async def _ask_question_multi_async(collection_names, question, k, llm_semaphore):
+    loop = asyncio.get_running_loop()
+    collection_names = list(dict.fromkeys(collection_names))
+    query_embedding = await _fanout(loop, embed_query, question)
+    categories = match_categories(question)
+    numeric = is_numeric_question(question, categories)
+
+    retrievals = [_fanout(loop, retrieve, name, question, k, query_embedding, categories)
+                  for name in collection_names]
+    lookups = [_fanout(loop, table_lookup, name, question) for name in collection_names] if numeric else []
+    done = await asyncio.gather(*retrievals, *lookups, return_exceptions=True)
+    per_collection = {}
+    errors = {}
+    for name, results in zip(collection_names, done[:len(collection_names)]):
+        if isinstance(results, Exception):
+            errors[name] = str(results)
+        else:
+            per_collection[name] = results
+    table_results = dict(zip(collection_names, done[len(collection_names):])) if numeric else {}
+
+    hits = merge_results(per_collection, k)
+    tracing.count("retrieved_chunks", len(hits))
+    labels = {name: _filing_label(name, per_collection) for name in collection_names}
+
+    per_filing = {}
+    for name in collection_names:
+        filing_hits = [h for h in hits if h["collection"] == name]
+        table_result = table_results.get(name)
+        if isinstance(table_result, Exception):
+            table_result = None
+        entry = {
+            "filing": labels[name],
+            "answer": None,
+            "table_evidence": table_result["evidence"] if table_result else None,
+            "num_retrieved_chunks": len(filing_hits),
+            "best_distance": filing_hits[0]["distance"] if filing_hits else None
+        }
+        if name in errors:
+            entry["error"] = errors[name]
+        elif numeric:
+            # per-filing numeric lane: table facts first, then this filing's own chunks
+            filing_spans = [span for h in hits_from_results(per_collection[name]) for span in hit_spans(h)]
+            entry["answer"] = numeric_answer(table_result, None, unique_numbers(filing_spans, max_results=50))
+        per_filing[name] = entry
+
+    with tracing.span("context_packing"):
+        context, sources, packing = pack_context(hits, label=lambda h: f"[Filing: {labels[h['collection']]}]")
+    tracing.count("prompt_tokens_saved", packing["tokens_saved"])
+    evidence = analyze_context(context, context_spans(hits, sources))
+
+    llm_stats = {}
+    if numeric:
+        answer = "\n\n".join(
+            f"{entry['filing']}:\n{entry['answer'] or 'Not found in document.'}" for entry in per_filing.values()
+        )
+    elif evidence["is_boilerplate"] and not evidence["has_narrative"]:
+        answer = (
+            "The retrieved sections primarily contain audit/ compliance disclosures. "
+            "A business or performance-focused summary is not present in the retrieved content."
+        )
+    else:
+        prompt = MULTI_PROMPT.format(context=context, question=question)
+        async with (llm_semaphore or contextlib.nullcontext()):
+            answer = await asyncio.to_thread(call_ollama, prompt, llm_stats)
+        answer = guard_numbers(answer, evidence)
 
     return {
         "answer": answer,
         "sources": sources,
-        "readiness": readiness
+        "per_filing": per_filing,
+        "readiness": {"num_filings": len(collection_names), "num_retrieved_chunks": len(hits),
+                      "num_context_chunks": packing["chunks_used"], "context_tokens": packing["tokens_out"],
+                      "context_tokens_saved": packing["tokens_saved"]},
+        "llm": llm_stats
     }
+
+def ask_question_multi(collection_names, question: str, k: int = 8):
+    """Blocking wrapper around ask_question_multi_async."""
+    return asyncio.run(ask_question_multi_async(collection_names, question, k))
@@ -0,0 +1,118 @@
+# store.py
+"""
+Single vector-store layer shared by ingest.py and rag.py.
+
+The Chroma client and embedding function are created lazily on first use, so
+importing a module that depends on the store costs nothing until a collection
+is actually touched. Configure with env vars or configure():
+    FINDOC_STORE_MODE = "persistent" (default, on disk) | "memory"
+    FINDOC_STORE_PATH = directory for the persistent store (default data/chroma)
+    FINDOC_RETRIEVAL_BACKEND = "chroma" (default, Chroma's HNSW index) |
+        "quantized" (int8 memory-mapped index, see quantized_index.py)
+"""
+import os
+import threading
+
+STORE_MODE = os.getenv("FINDOC_STORE_MODE", "persistent")
+STORE_PATH = os.getenv("FINDOC_STORE_PATH", os.path.join("data", "chroma"))
+RETRIEVAL_BACKEND = os.getenv("FINDOC_RETRIEVAL_BACKEND", "chroma")
+
+_client = None
+_embedding_function = None
+_lock = threading.Lock()
+
+def configure(mode: str = None, path: str = None, retrieval_backend: str = None):
+    """Switch mode/path/backend. Drops the current client; the next access re-creates it."""
+    global STORE_MODE, STORE_PATH, RETRIEVAL_BACKEND, _client
+    if mode is not None:
+        if mode not in ("persistent", "memory"):
+            raise ValueError(f"Unknown store mode: {mode}")
+        STORE_MODE = mode
+    if path is not None:
+        STORE_PATH = path
+    if retrieval_backend is not None:
+        if retrieval_backend not in ("chroma", "quantized"):
+            raise ValueError(f"Unknown retrieval backend: {retrieval_backend}")
+        RETRIEVAL_BACKEND = retrieval_backend
+    with _lock:
+        _client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                import chromadb
+                if STORE_MODE == "persistent":
+                    os.makedirs(STORE_PATH, exist_ok=True)
+                    _client = chromadb.PersistentClient(path=STORE_PATH)
+                else:
+                    _client = chromadb.Client()
+    return _client
+
+def use_client(client):
+    """
+    Installs a ready-made client, e.g. a stand-in that forwards every call to
+    the one process allowed to open the persistent store (main.py ingest).
+    """
+    global _client
+    with _lock:
+        _client = client
+
+def get_embedding_function():
+    global _embedding_function
+    if _embedding_function is None:
+        with _lock:
+            if _embedding_function is None:
+                from chromadb.utils import embedding_functions
+                _embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    return _embedding_function
+
+def get_collection(name: str):
+    return get_client().get_collection(name, embedding_function=get_embedding_function())
+
+def get_or_create_collection(name: str):
+    return get_client().get_or_create_collection(name=name, embedding_function=get_embedding_function())
+
+def delete_collection(name: str):
+    get_client().delete_collection(name)
+
+def collection_exists(name: str) -> bool:
+    try:
+        get_client().get_collection(name)
+        return True
+    except Exception:
+        return False
+
+def list_collection_names():
+    return [c.name for c in get_client().list_collections()]
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for fname in files:
+            try:
+                total += os.path.getsize(os.path.join(root, fname))
+            except OSError:
+                pass
+    return total
+
+def store_disk_bytes() -> int:
+    """Total on-disk footprint of the persistent store (0 in memory mode)."""
+    if STORE_MODE != "persistent" or not os.path.isdir(STORE_PATH):
+        return 0
+    return _dir_size(STORE_PATH)
+
+def collection_stats(name: str) -> dict:
+    """
+    Chunk count for a collection plus on-disk footprint. Chroma keeps all
+    collections in one sqlite file plus per-segment index dirs, so disk usage
+    is reported for the whole store rather than per collection.
+    """
+    collection = get_client().get_collection(name)
+    return {
+        "name": name,
+        "count": collection.count(),
+        "mode": STORE_MODE,
+        "store_disk_bytes": store_disk_bytes()
+    }
@@ -1,12 +1,22 @@
 # table_parser.py
 import os
 import json
-import pandas as pd
 import re
+import threading
+import numpy as np
+from collections import OrderedDict
 from rapidfuzz import fuzz, process
+from facts import get_fact_store
+import tracing
+
+# pandas is imported inside the functions that parse tables: it is the slowest
+# import on the app's startup path and most questions never need it
 
 TABLES_ROOT = os.path.join("data", "tables")
 
+# memory budget for parsed tables kept across questions (all collections)
+TABLE_INDEX_BUDGET_BYTES = int(os.getenv("FINDOC_TABLE_INDEX_MB", "256")) * 1024 * 1024
+
 def load_tables_metadata(collection_name: str):
     dir_path = os.path.join(TABLES_ROOT, collection_name)
     meta_path = os.path.join(dir_path, "tables_meta.json")
@@ -19,6 +29,134 @@ def load_tables_metadata(collection_name: str):
         m["dir"] = dir_path
     return meta
 
+# -----------------------
+# Per-collection table index (LRU, memory-budgeted)
+# -----------------------
+class TableIndex:
+    """
+    Everything the numeric lane needs from a collection's tables, parsed once:
+    metadata, DataFrames (raw and stringified), headers and row text.
+    """
+    def __init__(self, collection_name, meta, entries, meta_mtime):
+        self.collection_name = collection_name
+        self.meta = meta
+        self.entries = entries
+        self.meta_mtime = meta_mtime
+        self.nbytes = sum(e["nbytes"] for e in entries)
+        # all headers of all tables in one flat list so a question is scored
+        # against every table with a single process.cdist call
+        self.all_headers = [str(h) for e in entries for h in e["headers"]]
+        self.header_offsets = np.cumsum([0] + [len(e["headers"]) for e in entries])
+
+    def __len__(self):
+        return len(self.entries)
+
+def _meta_path(collection_name: str):
+    return os.path.join(TABLES_ROOT, collection_name, "tables_meta.json")
+
+def _build_entry(meta_item):
+    import pandas as pd
+    path = meta_item["csv_path"]
+    df = None
+    try:
+        if path.endswith(".json"):
+            # preview only
+            headers = list(meta_item.get("preview", {}).keys())
+        else:
+            df = pd.read_csv(path)
+            headers = list(df.columns.astype(str))
+    except Exception:
+        df = None
+        headers = list(meta_item.get("preview", {}).keys())
+
+    entry = {
+        "meta": meta_item,
+        "df": df,
+        "df_str": None,
+        "headers": headers,
+        "row_texts": [],
+        "row_text_series": None,
+        "nbytes": 0
+    }
+    if df is not None:
+        df_str = df.astype(str)
+        entry["df_str"] = df_str
+        entry["row_texts"] = [" ".join(row) for row in df_str.values.tolist()]
+        entry["row_text_series"] = pd.Series(entry["row_texts"], dtype=object)
+        entry["nbytes"] = int(df.memory_usage(deep=True).sum() + df_str.memory_usage(deep=True).sum()
+                              + sum(len(t) for t in entry["row_texts"]))
+    return entry
+
+def build_table_index(collection_name: str) -> TableIndex:
+    meta_path = _meta_path(collection_name)
+    meta_mtime = os.path.getmtime(meta_path) if os.path.exists(meta_path) else None
+    meta = load_tables_metadata(collection_name)
+    return TableIndex(collection_name, meta, [_build_entry(m) for m in meta], meta_mtime)
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+def get_table_index(collection_name: str) -> TableIndex:
+    """
+    Returns the cached TableIndex for a collection, building it on first use
+    (or when tables_meta.json changed on disk). Least-recently-used indexes
+    are dropped once the total exceeds TABLE_INDEX_BUDGET_BYTES.
+    """
+    meta_path = _meta_path(collection_name)
+    mtime = os.path.getmtime(meta_path) if os.path.exists(meta_path) else None
+    with _index_lock:
+        index = _index_cache.get(collection_name)
+        if index is not None and index.meta_mtime == mtime:
+            _index_cache.move_to_end(collection_name)
+            return index
+
+    index = build_table_index(collection_name)
+    with _index_lock:
+        _index_cache[collection_name] = index
+        _index_cache.move_to_end(collection_name)
+        total = sum(i.nbytes for i in _index_cache.values())
+        while total > TABLE_INDEX_BUDGET_BYTES and len(_index_cache) > 1:
+            _, dropped = _index_cache.popitem(last=False)
+            total -= dropped.nbytes
+    return index
+
+def invalidate_table_index(collection_name: str = None):
+    with _index_lock:
+        if collection_name is None:
+            _index_cache.clear()
+        else:
+            _index_cache.pop(collection_name, None)
+
+def count_tables(collection_name: str) -> int:
+    # from the metadata file: narrative answers must not pay for parsing every table CSV
+    return len(load_tables_metadata(collection_name))
+
+def score_tables(index: TableIndex, question: str):
+    """
+    Scores every table in the index against the question in one bulk
+    process.cdist pass over all headers. Returns per-table (best_score,
+    best_header_position) arrays; position is -1 when no header scored > 0.
+    """
+    n_tables = len(index.entries)
+    table_scores = np.zeros(n_tables, dtype=np.float64)
+    best_pos = np.full(n_tables, -1, dtype=np.int64)
+    if not index.all_headers:
+        return table_scores, best_pos
+
+    scores = process.cdist([question.lower()], index.all_headers, scorer=fuzz.token_set_ratio)[0]
+    offsets = index.header_offsets
+    for ti in range(n_tables):
+        start, end = offsets[ti], offsets[ti + 1]
+        if end == start:
+            continue
+        # first maximum, matching the old strict ">" scan
+        pos = int(np.argmax(scores[start:end]))
+        if scores[start + pos] > 0:
+            table_scores[ti] = scores[start + pos]
+            best_pos[ti] = pos
+    return table_scores, best_pos
+
+@tracing.traced("table_scoring")
 def find_best_table_and_column(collection_name: str, question: str, top_k_tables=3, header_score_threshold=55):
     """
     Returns best match result or None:
@@ -26,53 +164,45 @@ def find_best_table_and_column(collection_name: str, question: str, top_k_tables
       "meta": table_meta,
       "df": df,
       "best_header": header,
-      "score": score
+      "score": score,
+      "candidates": [{"table_id", "best_header", "score"}, ...]  # top_k_tables
     }
     """
-    meta = load_tables_metadata(collection_name)
-    if not meta:
+    index = get_table_index(collection_name)
+    if not index.entries:
         return None
 
-    q = question.lower()
-
-    # helper to compute header match score
-    def score_table(meta_item):
-        # load df
-        path = meta_item["csv_path"]
-        try:
-            if path.endswith(".json"):
-                # preview only
-                headers = list(meta_item.get("preview", {}).keys())
-                df = None
-            else:
-                df = pd.read_csv(path)
-                headers = list(df.columns.astype(str))
-        except Exception:
-            df = None
-            headers = list(meta_item.get("preview", {}).keys())
+    table_scores, best_pos = score_tables(index, question)
+    # stable sort keeps the original table order on ties
+    order = np.argsort(-table_scores, kind="stable")
+
+    def result_for(ti):
+        entry = index.entries[ti]
+        best_h = entry["headers"][best_pos[ti]] if best_pos[ti] >= 0 else None
+        return {"meta": entry["meta"], "df": entry["df"], "df_str": entry["df_str"],
+                "row_texts": entry["row_texts"], "row_text_series": entry["row_text_series"],
+                "best_header": best_h, "score": float(table_scores[ti]), "headers": entry["headers"]}
 
-        # compute best header match to question
-        best_h = None
-        best_score = 0
-        for h in headers:
-            s = fuzz.token_set_ratio(q, str(h))
-            if s > best_score:
-                best_score = s
-                best_h = h
-        return {"meta": meta_item, "df": df, "best_header": best_h, "score": best_score, "headers": headers}
-
-    scored = [score_table(m) for m in meta]
-    scored_sorted = sorted(scored, key=lambda x: x["score"], reverse=True)
-    best = scored_sorted[0] if scored_sorted else None
-    if best and best["score"] >= header_score_threshold:
-        return best
-    # No strong header match — return top candidate if we have any
-    return scored_sorted[0] if scored_sorted else None
+    candidates = []
+    for ti in order[:top_k_tables]:
+        entry = index.entries[ti]
+        candidates.append({
+            "table_id": entry["meta"].get("table_id"),
+            "best_header": entry["headers"][best_pos[ti]] if best_pos[ti] >= 0 else None,
+            "score": float(table_scores[ti])
+        })
+
+    # best candidate whether or not it clears header_score_threshold:
+    # with no strong header match the top candidate is still returned
+    best = result_for(order[0])
+    best["candidates"] = candidates
+    return best
 
 def find_year_in_question(question: str):
     yrs = re.findall(r"(?<!\d)(20\d{2})(?!\d)", question)
     return yrs  # list of years as strings, e.g., ['2024']
 
+@tracing.traced("value_lookup")
 def lookup_value_in_table(best_table_info, question: str):
     """
     Tries to find a numeric value in the matched table for the question.
@@ -81,6 +211,7 @@ def lookup_value_in_table(best_table_info, question: str):
       - else, if header contains 'total' or 'Q' or year-like columns, pick the first numeric column.
       - return formatted answer with source.
     """
+    import pandas as pd
     meta = best_table_info["meta"]
     df = best_table_info["df"]
     header = best_table_info["best_header"]
@@ -90,16 +221,25 @@ def lookup_value_in_table(best_table_info, question: str):
     if df is None:
         return None
 
-    # standardize columns to string
-    df = df.astype(str)
+    # standardize columns to string (precomputed by the table index)
+    df = best_table_info.get("df_str")
+    if df is None:
+        df = best_table_info["df"].astype(str)
+    row_texts = best_table_info.get("row_texts")
+    if not row_texts:
+        row_texts = [" ".join(row) for row in df.values.tolist()]
+    row_series = best_table_info.get("row_text_series")
+    if row_series is None:
+        row_series = pd.Series(row_texts, dtype=object)
 
     years = find_year_in_question(question)
     if years:
         year = years[0]
-        # find any row that contains the year in any cell
-        mask_rows = df.apply(lambda row: row.astype(str).str.contains(year, na=False).any(), axis=1)
-        if mask_rows.any():
-            row_idx = df[mask_rows].index[0]
+        # find any row that contains the year in any cell (cells are space-joined,
+        # so a 4-digit year can't straddle two cells)
+        hits = np.flatnonzero(row_series.str.contains(year, regex=False).to_numpy(dtype=bool))
+        if len(hits):
+            row_idx = df.index[hits[0]]
             # prefer header column if header exists in df
             if header in df.columns:
                 val = df.at[row_idx, header]
@@ -112,14 +252,14 @@ def lookup_value_in_table(best_table_info, question: str):
                         return {"value": cell, "row": df.loc[row_idx].to_dict(), "meta": meta, "header": col}
     # no year found: attempt to find the row which best matches question using fuzzy matching
     # compute best row by matching concatenated row text to question
-    row_scores = []
-    for idx, row in df.iterrows():
-        text = " ".join(row.astype(str).tolist())
-        s = fuzz.token_set_ratio(question, text)
-        row_scores.append((s, idx))
-    row_scores.sort(reverse=True)
-    if row_scores and row_scores[0][0] > 60:
-        best_idx = row_scores[0][1]
+    best_score = 0
+    if row_texts:
+        row_scores = process.cdist([question], row_texts, scorer=fuzz.token_set_ratio)[0]
+        # last maximum: ties went to the highest row index in the old sorted scan
+        best_pos = len(row_scores) - 1 - int(np.argmax(row_scores[::-1]))
+        best_score = row_scores[best_pos]
+    if best_score > 60:
+        best_idx = df.index[best_pos]
         # get numeric in header column or first numeric column
         if header and header in df.columns:
             val = df.at[best_idx, header]
@@ -132,11 +272,52 @@ def lookup_value_in_table(best_table_info, question: str):
     # nothing found
     return None
 
+SCALE_NAMES = {1e3: "thousands", 1e6: "millions", 1e9: "billions"}
+
+@tracing.traced("fact_lookup")
+def lookup_fact(collection_name: str, question: str, min_label_score=90):
+    """
+    Indexed lookup in the collection's numeric fact store: match the question
+    to a row label, then filter by the year in the question (or take the
+    latest period). Returns a fact dict or None.
+    """
+    fact_store = get_fact_store(os.path.join(TABLES_ROOT, collection_name))
+    if fact_store is None or not len(fact_store):
+        return None
+    years = find_year_in_question(question)
+    for code, _ in fact_store.match_labels(question, min_score=min_label_score):
+        idx = fact_store.query(label_codes=[code], period=years[0] if years else None)
+        if not len(idx):
+            continue
+        if not years:
+            periods = fact_store.columns["period"][idx]
+            idx = idx[periods == periods.max()]
+        return fact_store.fact(idx[0])
+    return None
+
+def facts_by_period(collection_name: str, label: str):
+    """Cross-table series for one line item, e.g. facts_by_period(name, "revenue") -> {2022: fact, ...}."""
+    fact_store = get_fact_store(os.path.join(TABLES_ROOT, collection_name))
+    return fact_store.by_period(label) if fact_store is not None else {}
+
 def answer_numeric_question_from_tables(collection_name: str, question: str):
     """
-    High-level function: find best table, then lookup value.
+    High-level function: indexed fact lookup first, then best table + value lookup.
     Returns dict with answer_text and evidence or None
     """
+    fact = lookup_fact(collection_name, question)
+    if fact:
+        header = f"{fact['label']} / {fact['header']}" if fact["header"] else fact["label"]
+        scale = SCALE_NAMES.get(fact["scale"])
+        answer_text = (
+            f"Found value for '{header}' from table {fact['table_id']} on page {fact['page']}: "
+            f"{fact['raw']} (verbatim from table{', in ' + scale if scale else ''})."
+        )
+        # metadata only: the fact lane must not build the table index it exists to avoid
+        meta = next((m for m in load_tables_metadata(collection_name) if m["table_id"] == fact["table_id"]), {})
+        evidence = {"table_id": fact["table_id"], "page": fact["page"], "csv_path": meta.get("csv_path")}
+        return {"answer_text": answer_text, "evidence": evidence, "row": None, "fact": fact}
+
     best = find_best_table_and_column(collection_name, question)
     if not best:
         return None
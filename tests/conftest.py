@@ -0,0 +1,31 @@
+# tests/conftest.py
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# the app's modules are flat top-level files in the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class HashEmbedding:
+    """Deterministic stand-in for the ONNX model."""
+
+    def __call__(self, input):
+        return [np.frombuffer(hashlib.sha256(t.encode("utf-8")).digest() * 12, dtype=np.uint8)[:384]
+                .astype(float).tolist() for t in input]
+
+@pytest.fixture
+def ingest_env(tmp_path, monkeypatch):
+    """Ingest in a scratch directory: in-memory store, HashEmbedding, answer and embedding caches off."""
+    import answer_cache
+    import embedding_cache
+    import store
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(store, "STORE_MODE", "memory")
+    monkeypatch.setattr(store, "_client", None)
+    monkeypatch.setattr(store, "_embedding_function", HashEmbedding())
+    monkeypatch.setattr(answer_cache, "ANSWER_CACHE_ENABLED", False)
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_ENABLED", False)
+    return tmp_path
@@ -0,0 +1,60 @@
+# tests/test_answer_cache.py
+import pytest
+
+import answer_cache
+import rag
+from answer_cache import AnswerCache
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "answers.sqlite")
+
+def test_entries_written_by_another_process_are_seen(db_path):
+    a, b = AnswerCache(db_path), AnswerCache(db_path)
+    assert b.get_exact("filing", "What was revenue?", 8) == (None, None)
+    a.put("filing", "What was revenue?", 8, {"answer": "x"})
+    assert b.get_exact("filing", "what was revenue", 8) == ({"answer": "x"}, "exact")
+
+def test_invalidation_by_another_process_is_seen(db_path):
+    a, b = AnswerCache(db_path), AnswerCache(db_path)
+    a.put("filing", "q", 8, {"answer": "old"})
+    assert a.get_exact("filing", "q", 8)[0] == {"answer": "old"}
+    b.invalidate_collection("filing")
+    assert a.get_exact("filing", "q", 8) == (None, None)
+
+def _result(answer, llm):
+    return {"answer": answer, "sources": [], "readiness": {}, "llm": llm}
+
+@pytest.mark.parametrize("answer", [
+    "Revenue grew on LLM error: connection reset",
+    "The document discusses this topic qualitatively. Exact numerical values are not explicitly stated "
+    "in the retrieved context."
+])
+def test_failed_generations_are_not_cached(db_path, monkeypatch, answer):
+    cache = AnswerCache(db_path)
+    monkeypatch.setattr(answer_cache, "_cache", cache)
+    monkeypatch.setattr(answer_cache, "ANSWER_CACHE_ENABLED", True)
+    rag.store_cached_answer("filing", "q", 8, _result(answer, {"error": "ConnectionError: port=11434"}),
+                            None, used_llm=True)
+    assert cache.get_exact("filing", "q", 8) == (None, None)
+    rag.store_cached_answer("filing", "q", 8, _result(answer, {}), None, used_llm=True)
+    assert cache.get_exact("filing", "q", 8)[0]["answer"] == answer
+
+def test_expired_rows_are_deleted_on_write(db_path, monkeypatch):
+    cache = AnswerCache(db_path, ttl_s=60)
+    cache.put("filing", "old question", 8, {"answer": "old"})
+    cache.put("other", "old question", 8, {"answer": "old"})
+    now = answer_cache.time.time()
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now + 120)
+    cache.put("filing", "new question", 8, {"answer": "new"})
+    rows = cache._db.execute("SELECT collection, question FROM answers").fetchall()
+    assert rows == [("filing", "new question")]
+    assert list(cache._entries) == [("filing", 8, "new question")]
+
+def test_evicting_an_ingest_invalidates_answers_when_this_process_has_no_cache(db_path, monkeypatch):
+    other = AnswerCache(db_path)
+    other.put("filing", "q", 8, {"answer": "old"})
+    monkeypatch.setattr(answer_cache, "ANSWER_CACHE_ENABLED", False)
+    monkeypatch.setattr(answer_cache, "ANSWER_CACHE_PATH", db_path)
+    answer_cache.invalidate_collection("filing")
+    assert other.get_exact("filing", "q", 8) == (None, None)
@@ -0,0 +1,85 @@
+# tests/test_context_packer.py
+import random
+
+import pytest
+
+from context_packer import SEPARATOR, count_tokens, pack_context
+from numeric_spans import context_spans, span_metadata
+from utils import TokenChunker
+
+WORDS = ("revenue net sales increased services margin risk supply chain fiscal year 2024 "
+         "compared with $ million percent. Item 7").split()
+
+def _hits(rng, n_filings=4):
+    hits = []
+    for f in range(n_filings):
+        chunker = TokenChunker(500, 100)
+        text = " ".join(rng.choice(WORDS) for _ in range(2500))
+        chunks = chunker.feed(1, text) + chunker.flush()
+        for i, chunk in enumerate(chunks):
+            hits.append({"collection": f"filing_{f}", "document": chunk["text"],
+                         "metadata": {"source": f"filing_{f}.pdf", "chunk_index": i}, "distance": rng.random()})
+    rng.shuffle(hits)
+    return hits[:rng.randint(5, 30)]
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("labelled", [False, True])
+def test_context_stays_within_budget(seed, labelled):
+    rng = random.Random(seed)
+    budget = rng.choice([500, 1000, 3000])
+    label = (lambda h: f"[Filing: {h['collection']} annual report 10-K]") if labelled else None
+    context, sources, stats = pack_context(_hits(rng), budget, label=label)
+    assert isinstance(context, str) and isinstance(sources, list) and isinstance(stats, dict)
+    assert sources
+    assert stats["tokens_out"] <= budget
+
+def _hit(text, chunk_index, distance, source="10k.pdf", page=1, collection=None):
+    return {"collection": collection, "document": text, "distance": distance,
+            "metadata": {"source": source, "chunk_index": chunk_index, "page_start": page, "page_end": page}}
+
+def _overlapping_chunks(n_words=120, size=50, step=40):
+    words = [f"w{i}" for i in range(n_words)]
+    return [" ".join(words[start:start + size]) for start in range(0, n_words - size + 1, step)], " ".join(words)
+
+def test_near_identical_chunks_are_packed_once():
+    text = "Net sales increased 8% driven by services and wearables."
+    hits = [_hit(text, 0, 0.1), _hit(text[:30], 5, 0.2), _hit(text, 9, 0.3)]
+    context, sources, stats = pack_context(hits, 1000)
+    assert context == text
+    assert stats["duplicates_dropped"] == 2
+    assert [s["chunk_index"] for s in sources] == [0]
+
+def test_neighbouring_chunks_are_stitched_into_one_passage():
+    chunks, full = _overlapping_chunks()
+    hits = [_hit(chunk, i, 0.1 * (len(chunks) - i)) for i, chunk in enumerate(chunks)]
+    context, sources, stats = pack_context(hits, 1000)
+    # overlaps appear once, in document order, whatever the retrieval order
+    assert context == full[:len(context)] and context.endswith(chunks[-1])
+    assert stats["passages"] == 1 and stats["chunks_used"] == len(chunks)
+    assert stats["tokens_out"] < count_tokens(" ".join(chunks))
+    assert {s["passage"] for s in sources} == {0}
+
+def test_labels_and_sources_survive_packing():
+    hits = [_hit("Revenue was $391 billion.", 0, 0.1, source="aapl.pdf", page=23, collection="aapl"),
+            _hit("Revenue was $245 billion.", 0, 0.2, source="msft.pdf", page=41, collection="msft")]
+    context, sources, _ = pack_context(hits, 1000, label=lambda h: f"[Filing: {h['metadata']['source']}]")
+    blocks = context.split(SEPARATOR)
+    assert blocks == ["[Filing: aapl.pdf]\nRevenue was $391 billion.", "[Filing: msft.pdf]\nRevenue was $245 billion."]
+    assert [(s["source"], s["page_start"], s["page_end"], s["collection"], s["passage"]) for s in sources] == [
+        ("aapl.pdf", 23, 23, "aapl", 0), ("msft.pdf", 41, 41, "msft", 1)]
+
+def test_chunk_over_budget_alone_is_truncated_to_its_head():
+    text = " ".join(f"word{i}" for i in range(2000))
+    context, sources, stats = pack_context([_hit(text, 0, 0.1), _hit("later chunk", 1, 0.2)], 100)
+    assert text.startswith(context) and len(context) < len(text)
+    assert stats["tokens_out"] <= 100
+    assert stats["chunks_used"] == 1 and stats["over_budget_dropped"] == 1
+    assert len(sources) == 1
+
+def test_spans_of_a_truncated_chunk_stop_at_the_packed_text():
+    text = "Net sales were $391 billion. " + "revenue grew " * 1000 + "Total assets were $353 billion."
+    hits = [_hit(text, 0, 0.1)]
+    hits[0]["metadata"].update(span_metadata(text))
+    context, sources, _ = pack_context(hits, 100)
+    assert sources[0]["truncated_at"] == len(context)
+    assert [s["text"] for s in context_spans(hits, sources)] == ["$391 billion"]
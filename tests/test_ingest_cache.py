@@ -0,0 +1,60 @@
+# tests/test_ingest_cache.py
+"""
+Cached ingests: evicting one removes the stored upload, never a file ingested
+in place, and filings that share a file name never share a collection.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ingest
+import ingest_cache
+import store
+from benchmarks.synthetic_pdf import generate_10k_pdf
+
+@pytest.fixture
+def pdf(ingest_env):
+    path = str(ingest_env / "filing.pdf")
+    generate_10k_pdf(path, 6, 1)
+    return path
+
+def _key_for(collection_name):
+    return next(e["key"] for e in ingest_cache.list_entries() if e["collection_name"] == collection_name)
+
+def test_evicting_an_upload_deletes_its_stored_copy(pdf):
+    with open(pdf, "rb") as f:
+        name, _, _ = ingest.ingest_pdf_bytes_cached(f.read(), "filing.pdf")
+    key = _key_for(name)
+    saved_path = ingest_cache.get_entry(key)["path"]
+    assert os.path.exists(saved_path)
+
+    assert ingest.evict_cached_ingest(key)
+    assert not os.path.exists(saved_path)
+    assert os.path.exists(pdf)
+
+def test_evicting_a_batch_ingest_keeps_the_file(pdf):
+    name, _, _ = ingest.ingest_pdf_path_cached(pdf, workers=1)
+    assert ingest.evict_cached_ingest(_key_for(name))
+    assert os.path.exists(pdf)
+
+def _same_named_filings(root):
+    """Two different filings that share a file name, like a/10k.pdf and b/10k.pdf in a batch directory."""
+    paths = []
+    for sub, pages, seed in (("a", 10, 1), ("b", 4, 2)):
+        os.makedirs(root / sub)
+        paths.append(str(root / sub / "10k.pdf"))
+        generate_10k_pdf(paths[-1], pages, seed)
+    return paths
+
+def test_same_named_filings_ingested_concurrently_stay_apart(ingest_env, monkeypatch):
+    paths = _same_named_filings(ingest_env)
+    # both start in the same second
+    monkeypatch.setattr(ingest.time, "time", lambda: 1_700_000_000.0)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda p: ingest.ingest_pdf_path_cached(p, workers=1), paths))
+
+    names = [name for name, _, _ in results]
+    assert len(set(names)) == 2
+    assert [store.get_collection(name).count() for name in names] == [n_chunks for _, n_chunks, _ in results]
+    assert len({ingest.tables_dir_for(name) for name in names}) == 2
@@ -0,0 +1,66 @@
+# tests/test_ingest_resume.py
+"""An ingest interrupted after a checkpoint resumes to the same result as an uninterrupted one."""
+import json
+
+import pytest
+
+import checkpoints
+import ingest
+import store
+from benchmarks.synthetic_pdf import generate_10k_pdf
+from facts import FACTS_FILE, FactStore
+from table_parser import get_table_index, invalidate_table_index
+
+class Interrupt(Exception):
+    pass
+
+@pytest.fixture
+def env(ingest_env):
+    path = str(ingest_env / "filing.pdf")
+    generate_10k_pdf(path, 40, 3)
+    return path
+
+def snapshot(collection_name):
+    """Chunks, table index and facts of an ingest, with the collection name factored out."""
+    got = store.get_collection(collection_name).get(include=["documents", "metadatas"])
+    chunks = sorted((i.replace(collection_name, "<c>"), d, json.dumps(m, sort_keys=True))
+                    for i, d, m in zip(got["ids"], got["documents"], got["metadatas"]))
+    invalidate_table_index(collection_name)
+    index = get_table_index(collection_name)
+    tables = json.dumps([{k: v for k, v in m.items() if k != "dir"} for m in index.meta],
+                        sort_keys=True).replace(collection_name, "<c>")
+    headers = [[str(h) for h in e["headers"]] for e in index.entries]
+    facts_path = f"{ingest.tables_dir_for(collection_name)}/{FACTS_FILE}"
+    fact_store = FactStore.load(facts_path)
+    facts = sorted(json.dumps(fact_store.fact(i), sort_keys=True) for i in range(len(fact_store)))
+    return chunks, tables, headers, facts
+
+def test_resumed_ingest_matches_uninterrupted(env):
+    name, n_chunks = ingest.ingest_pdf_return_collection(env, "filing.pdf", workers=1, checkpoint_pages=8)
+    expected = snapshot(name)
+    assert n_chunks == len(expected[0]) and expected[2] and expected[3]
+
+    # start over: same file, nothing cached
+    key = ingest.ingest_status(env)["key"]
+    store.delete_collection(name)
+    checkpoints.delete_manifest(key)
+
+    checkpoints_seen = []
+
+    def progress(**fields):
+        if "chunks" in fields and "pages_done" not in fields and fields.get("stage") == "extracting":
+            checkpoints_seen.append(fields["chunks"])
+            if len(checkpoints_seen) == 2:
+                raise Interrupt()
+
+    with pytest.raises(Interrupt):
+        ingest.ingest_pdf_return_collection(env, "filing.pdf", workers=1, checkpoint_pages=8, progress=progress)
+    status = ingest.ingest_status(env)
+    assert status["status"] == "in_progress" and 0 < status["pages_committed"] < status["n_pages"]
+
+    stats = {}
+    resumed_name, resumed_chunks = ingest.ingest_pdf_return_collection(env, "filing.pdf", workers=1,
+                                                                       checkpoint_pages=8, stats=stats)
+    assert stats["resumed_from_page"] == status["pages_committed"]
+    assert resumed_chunks == n_chunks
+    assert snapshot(resumed_name) == expected
@@ -0,0 +1,35 @@
+# tests/test_jobs.py
+"""Background ingest jobs: concurrent uploads that share a file name stay in separate collections."""
+import time
+
+import jobs
+import store
+from benchmarks.synthetic_pdf import generate_10k_pdf
+
+def _wait(job_ids, timeout_s=120):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        snapshots = [jobs.get_job(job_id) for job_id in job_ids]
+        if all(job["status"] in ("done", "failed") for job in snapshots):
+            return snapshots
+        time.sleep(0.05)
+    raise TimeoutError("ingest jobs did not finish")
+
+def test_same_named_uploads_in_concurrent_job_slots_stay_apart(ingest_env, monkeypatch):
+    monkeypatch.setattr(jobs, "_registry", jobs.JobRegistry(max_workers=2))
+    uploads = []
+    for pages, seed in ((10, 1), (4, 2)):
+        path = str(ingest_env / f"upload_{seed}.pdf")
+        generate_10k_pdf(path, pages, seed)
+        with open(path, "rb") as f:
+            uploads.append(f.read())
+    # both start in the same second
+    monkeypatch.setattr(jobs.ingest.time, "time", lambda: 1_700_000_000.0)
+
+    job_ids = [jobs.submit_ingest(data, "10k.pdf", build_digests=False) for data in uploads]
+    results = [job["result"] for job in _wait(job_ids)]
+
+    assert all(result is not None for result in results)
+    names = [result["collection_name"] for result in results]
+    assert len(set(names)) == 2
+    assert [store.get_collection(name).count() for name in names] == [result["n_chunks"] for result in results]
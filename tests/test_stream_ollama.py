@@ -0,0 +1,101 @@
+# tests/test_stream_ollama.py
+"""stream_ollama / call_ollama against the local fake Ollama server."""
+import pytest
+import requests
+
+import rag
+from benchmarks.fake_ollama import start_fake_ollama
+
+ANSWER = "Net sales grew on services demand while hardware margins held steady"
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Starts a fake server with the given options and points rag at it."""
+    servers = []
+
+    def start(**kwargs):
+        kwargs.setdefault("answer", ANSWER)
+        kwargs.setdefault("ttft", 0.05)
+        kwargs.setdefault("tokens_per_sec", 400.0)
+        server, url = start_fake_ollama(**kwargs)
+        servers.append(server)
+        monkeypatch.setattr(rag, "OLLAMA_URL", url)
+        return url
+
+    monkeypatch.setattr(rag, "OLLAMA_RETRIES", 0)
+    monkeypatch.setattr(rag, "_http_session", None)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_tokens_arrive_in_order(ollama):
+    ollama()
+    tokens = list(rag.stream_ollama("prompt"))
+    assert "".join(tokens).strip() == ANSWER
+    assert tokens == [w + " " for w in ANSWER.split(" ")]
+
+def test_stats_report_ttft_and_rate(ollama):
+    ollama(ttft=0.2, tokens_per_sec=100.0)
+    stats = {}
+    list(rag.stream_ollama("prompt", stats))
+    assert stats["ttft_s"] >= 0.2
+    assert stats["total_s"] >= stats["ttft_s"]
+    assert stats["n_tokens"] == len(ANSWER.split(" "))
+    # from the server's eval_count / eval_duration; sleeps only slow it down
+    assert 0 < stats["tokens_per_s"] <= 100.0
+    assert "error" not in stats
+
+def test_mid_stream_disconnect_raises_after_partial_tokens(ollama):
+    ollama(disconnect_after=3)
+    stats = {}
+    received = []
+    with pytest.raises(Exception):
+        for token in rag.stream_ollama("prompt", stats):
+            received.append(token)
+    assert received == [w + " " for w in ANSWER.split(" ")[:3]]
+    assert stats["error"]
+    assert stats["n_tokens"] == 3
+
+def test_non_200_status_raises(ollama):
+    ollama(status=500)
+    stats = {}
+    with pytest.raises(requests.HTTPError):
+        list(rag.stream_ollama("prompt", stats))
+    assert "500" in stats["error"]
+
+def test_call_ollama_joins_the_stream(ollama):
+    ollama()
+    stats = {}
+    assert rag.call_ollama("prompt", stats) == ANSWER
+    assert stats["n_tokens"] == len(ANSWER.split(" "))
+    assert "ttft_s" in stats
+
+def test_call_ollama_reports_errors_without_raising(ollama):
+    ollama(status=500)
+    stats = {}
+    answer = rag.call_ollama("prompt", stats)
+    assert answer.startswith("LLM error")
+    assert stats["error"]
+
+def _prepared(has_numbers):
+    return {"answer": None, "prompt": "prompt", "context": "", "sources": [],
+            "evidence": {"has_numbers": has_numbers, "is_boilerplate": False, "has_narrative": True},
+            "packing": {"chunks_in": 0, "chunks_used": 0, "tokens_out": 0, "tokens_saved": 0}}
+
+def test_answer_stream_never_shows_unsupported_figures(ollama, monkeypatch):
+    ollama(answer="Revenue rose to 42 billion on services")
+    monkeypatch.setattr(rag, "prepare_answer", lambda *args, **kwargs: _prepared(has_numbers=False))
+    monkeypatch.setattr(rag, "count_tables", lambda name: 0)
+    result = rag.ask_question_stream("filing", "why did revenue rise", use_cache=False)
+    streamed = list(result["answer_stream"])
+    assert not any(ch.isdigit() for ch in "".join(streamed))
+    assert streamed[-1].strip() == result["answer"] == rag.guard_numbers("42", {"has_numbers": False})
+    assert result["llm"]["stopped_on_number"]
+
+def test_answer_stream_passes_figures_through_when_context_has_numbers(ollama, monkeypatch):
+    ollama(answer="Revenue rose to 42 billion on services")
+    monkeypatch.setattr(rag, "prepare_answer", lambda *args, **kwargs: _prepared(has_numbers=True))
+    monkeypatch.setattr(rag, "count_tables", lambda name: 0)
+    result = rag.ask_question_stream("filing", "why did revenue rise", use_cache=False)
+    assert "".join(result["answer_stream"]).strip() == result["answer"] == "Revenue rose to 42 billion on services"
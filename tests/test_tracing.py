@@ -0,0 +1,46 @@
+# tests/test_tracing.py
+import pytest
+
+import rag
+import tracing
+from benchmarks.fake_ollama import start_fake_ollama
+
+@pytest.fixture
+def fresh_totals(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", False)
+    tracing.reset()
+    yield
+    tracing.reset()
+
+def test_per_call_trace_leaves_the_global_flag_alone(fresh_totals):
+    with tracing.trace("request", enabled=True) as tr:
+        with tracing.span("stage"):
+            pass
+        tracing.count("items", 2)
+    assert tr.spans["stage"][1] == 1 and tr.counters["items"] == 2
+    assert not tracing.TRACE_ENABLED
+    with tracing.trace("request") as tr:
+        assert tr is None
+        assert tracing.span("stage") is tracing._NOOP
+
+def test_streamed_generation_reaches_the_totals(fresh_totals, monkeypatch):
+    server, url = start_fake_ollama(answer="Services revenue grew", ttft=0.01, tokens_per_sec=500.0)
+    monkeypatch.setattr(rag, "OLLAMA_URL", url)
+    monkeypatch.setattr(rag, "_http_session", None)
+    prepared = {"answer": None, "prompt": "prompt", "context": "", "sources": [],
+                "evidence": {"has_numbers": True, "is_boilerplate": False, "has_narrative": True},
+                "packing": {"chunks_in": 0, "chunks_used": 0, "tokens_out": 0, "tokens_saved": 0}}
+    monkeypatch.setattr(rag, "prepare_answer", lambda *args, **kwargs: prepared)
+    monkeypatch.setattr(rag, "count_tables", lambda name: 0)
+    try:
+        result = rag.ask_question_stream("filing", "why", use_cache=False, trace=True)
+        assert "llm_generation" not in tracing.prometheus_text()
+        "".join(result["answer_stream"])
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert result["trace"]["spans"]["llm_generation"]["calls"] == 1
+    assert result["trace"]["total_s"] >= result["llm"]["total_s"]
+    text = tracing.prometheus_text()
+    assert 'span="llm_generation"' in text
+    assert 'counter="llm_tokens"} 3' in text
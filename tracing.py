@@ -0,0 +1,194 @@
+# tracing.py
+"""
+Lightweight per-stage tracing: named spans (wall time + call count) and
+counters, collected per request into a Trace and aggregated process-wide
+for export as Prometheus text or JSON lines.
+
+    with tracing.trace("ask_question") as tr:      # tr is None when disabled
+        with tracing.span("chroma_query"):
+            ...
+        tracing.count("retrieved_chunks", 8)
+
+Enable with FINDOC_TRACE=1 (or configure(enabled=True)), or per request with
+trace(name, enabled=True), e.g. from a per-session setting. Outside a trace,
+span() returns a shared no-op context manager and count() returns
+immediately, so instrumented code pays only a context-variable lookup.
+FINDOC_TRACE_JSONL=path appends every finished trace to that file.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+TRACE_ENABLED = os.getenv("FINDOC_TRACE", "0") == "1"
+TRACE_JSONL_PATH = os.getenv("FINDOC_TRACE_JSONL") or None
+
+_current = contextvars.ContextVar("findoc_trace", default=None)
+_NOOP = contextlib.nullcontext()
+
+def configure(enabled: bool = None, jsonl_path: str = None):
+    global TRACE_ENABLED, TRACE_JSONL_PATH
+    if enabled is not None:
+        TRACE_ENABLED = enabled
+    if jsonl_path is not None:
+        TRACE_JSONL_PATH = jsonl_path or None
+
+class Trace:
+    """Spans and counters of one request; safe to update from worker threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self.total_s = 0.0
+        self.spans = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, span_name: str, seconds: float, calls: int = 1):
+        with self._lock:
+            s = self.spans.setdefault(span_name, [0.0, 0])
+            s[0] += seconds
+            s[1] += calls
+
+    def count(self, counter: str, n=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "started_at": self.started_at,
+                "total_s": self.total_s,
+                "spans": {k: {"seconds": v[0], "calls": v[1]} for k, v in self.spans.items()},
+                "counters": dict(self.counters)
+            }
+
+class _Span:
+    __slots__ = ("trace", "name", "t0")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+def current_trace():
+    return _current.get()
+
+def span(name: str):
+    """Times the enclosed block into the current trace (no-op without one)."""
+    tr = _current.get()
+    return _Span(tr, name) if tr is not None else _NOOP
+
+def count(counter: str, n=1):
+    tr = _current.get()
+    if tr is not None:
+        tr.count(counter, n)
+
+def traced(name: str):
+    """Decorator form of span() for whole functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextlib.contextmanager
+def trace(name: str, enabled: bool = None, defer_finish: bool = False):
+    """
+    Starts a trace for one request (yields None when tracing is disabled).
+    `enabled` overrides FINDOC_TRACE for this request only. Nested calls
+    reuse the outer trace, so e.g. ask_question_multi's per-collection work
+    lands in one trace. With `defer_finish` the trace is not aggregated on
+    exit; call finish(tr) once work done outside the block (e.g. draining
+    an answer stream) has been added to it.
+    """
+    if not (TRACE_ENABLED if enabled is None else enabled):
+        yield None
+        return
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    tr = Trace(name)
+    token = _current.set(tr)
+    t0 = time.perf_counter()
+    try:
+        yield tr
+    finally:
+        tr.total_s = time.perf_counter() - t0
+        _current.reset(token)
+        if not defer_finish:
+            _finish(tr)
+
+def finish(tr: Trace):
+    """Aggregates/exports a trace started with defer_finish=True."""
+    _finish(tr)
+
+# -----------------------
+# Process-wide aggregation / export
+# -----------------------
+_totals_lock = threading.Lock()
+# (trace name, span name) -> [seconds, calls]; (trace name, counter) -> n
+_span_totals = {}
+_counter_totals = {}
+_trace_totals = {}
+
+def _finish(tr: Trace):
+    data = tr.to_dict()
+    with _totals_lock:
+        t = _trace_totals.setdefault(tr.name, [0.0, 0])
+        t[0] += tr.total_s
+        t[1] += 1
+        for span_name, s in data["spans"].items():
+            agg = _span_totals.setdefault((tr.name, span_name), [0.0, 0])
+            agg[0] += s["seconds"]
+            agg[1] += s["calls"]
+        for counter, n in data["counters"].items():
+            _counter_totals[(tr.name, counter)] = _counter_totals.get((tr.name, counter), 0) + n
+    if TRACE_JSONL_PATH:
+        export_jsonl(TRACE_JSONL_PATH, data)
+
+def export_jsonl(path: str, trace_dict: dict):
+    """Appends one finished trace as a JSON line."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(trace_dict)
+    with _totals_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+def prometheus_text() -> str:
+    """Aggregated spans/counters since start (or reset()) in Prometheus text format."""
+    with _totals_lock:
+        lines = ["# TYPE findoc_trace_seconds summary"]
+        for name, (seconds, n) in sorted(_trace_totals.items()):
+            lines.append(f'findoc_trace_seconds_sum{{trace="{name}"}} {seconds:.6f}')
+            lines.append(f'findoc_trace_seconds_count{{trace="{name}"}} {n}')
+        lines.append("# TYPE findoc_span_seconds summary")
+        for (name, span_name), (seconds, calls) in sorted(_span_totals.items()):
+            labels = f'trace="{name}",span="{span_name}"'
+            lines.append(f"findoc_span_seconds_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"findoc_span_seconds_count{{{labels}}} {calls}")
+        lines.append("# TYPE findoc_events_total counter")
+        for (name, counter), n in sorted(_counter_totals.items()):
+            lines.append(f'findoc_events_total{{trace="{name}",counter="{counter}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+def reset():
+    with _totals_lock:
+        _span_totals.clear()
+        _counter_totals.clear()
+        _trace_totals.clear()
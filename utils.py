@@ -1,15 +1,26 @@
 # utils.py
-import tiktoken
 import re
 
+_encoder = None
+
+def get_encoder():
+    """cl100k_base encoder, loaded once per process. None if tiktoken can't load it."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = False
+    return _encoder or None
+
 def chunk_text(text, chunk_size=500, overlap=50):
     """
     Token-aware chunking using tiktoken.
     Returns list of text chunks.
     """
-    try:
-        enc = tiktoken.get_encoding("cl100k_base")
-    except Exception:
+    enc = get_encoder()
+    if enc is None:
         words = text.split()
         chunks = []
         i = 0
@@ -28,6 +39,66 @@ def chunk_text(text, chunk_size=500, overlap=50):
         start += chunk_size - overlap
     return chunks
 
+class TokenChunker:
+    """
+    Incremental, page-aware version of chunk_text. Feed pages one at a time;
+    only the tokens of the window being filled are held. Each chunk is
+    {"text", "n_tokens", "page_start", "page_end"}. Windows match chunk_text
+    over the "\n"-joined pages, except where BPE would have merged tokens
+    across a page break. state()/`state=` let a checkpointed ingest resume
+    with exactly the same chunk boundaries.
+    """
+    def __init__(self, chunk_size=500, overlap=50, state=None):
+        self.chunk_size = chunk_size
+        self.step = chunk_size - overlap
+        self.enc = get_encoder()
+        self.buf = list(state["units"]) if state else []
+        self.buf_pages = list(state["pages"]) if state else []
+
+    def state(self):
+        return {"units": list(self.buf), "pages": list(self.buf_pages)}
+
+    def _emit(self):
+        window = self.buf[:self.chunk_size]
+        chunk = {
+            "text": self.enc.decode(window) if self.enc is not None else " ".join(window),
+            "n_tokens": len(window),
+            "page_start": self.buf_pages[0],
+            "page_end": self.buf_pages[len(window) - 1]
+        }
+        del self.buf[:self.step]
+        del self.buf_pages[:self.step]
+        return chunk
+
+    def feed(self, page_no, text):
+        """Adds one page; returns the chunks that became complete."""
+        if not text:
+            return []
+        units = self.enc.encode(text + "\n") if self.enc is not None else text.split()
+        self.buf.extend(units)
+        self.buf_pages.extend([page_no] * len(units))
+        out = []
+        while len(self.buf) >= self.chunk_size:
+            out.append(self._emit())
+        return out
+
+    def flush(self):
+        """Tail windows, same start positions as chunk_text."""
+        out = []
+        while self.buf:
+            out.append(self._emit())
+        return out
+
+def iter_chunks(pages, chunk_size=500, overlap=50):
+    """
+    Streaming chunker over an iterable of (page_no, page_text), consumed
+    lazily. Yields the same chunk dicts as TokenChunker.
+    """
+    chunker = TokenChunker(chunk_size, overlap)
+    for page_no, text in pages:
+        yield from chunker.feed(page_no, text)
+    yield from chunker.flush()
+
 # numeric finder
 NUMERIC_RE = re.compile(
     r"(\$?\s?[\d]{1,3}(?:[\d,]{0,})(?:\.\d+)?\s?(?:million|billion|MM|B|k|thousand|bn|m)?|\d{1,3}(?:,\d{3})+(?:\.\d+)?)",
@@ -0,0 +1,77 @@
+# warmup.py
+"""
+Background warm-up of the heavy, lazily loaded pieces: the embedding model
+(ONNX runtime + weights, via store.get_embedding_function) and the tiktoken
+encoder. Importing the app stays cheap; start_warmup() loads them on a
+daemon thread so the first ingest/question doesn't pay for it.
+
+    FINDOC_WARMUP = "1" (default) | "0" to skip
+    FINDOC_COLD_START_BUDGET_S = seconds the warm-up may take before a warning (default 10)
+"""
+import logging
+import os
+import threading
+import time
+
+import store
+from utils import get_encoder
+
+WARMUP_ENABLED = os.getenv("FINDOC_WARMUP", "1") == "1"
+COLD_START_BUDGET_S = float(os.getenv("FINDOC_COLD_START_BUDGET_S", "10"))
+
+logger = logging.getLogger(__name__)
+
+_thread = None
+_lock = threading.Lock()
+_done = threading.Event()
+# step -> seconds, plus total_s / over_budget / error once finished
+_timings = {}
+
+def warm_up() -> dict:
+    """Loads the tokenizer and embedding model in this thread; returns step timings."""
+    timings = {}
+    t_start = time.perf_counter()
+    try:
+        t0 = time.perf_counter()
+        get_encoder()
+        timings["tokenizer_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ef = store.get_embedding_function()
+        timings["embedding_load_s"] = time.perf_counter() - t0
+
+        # the first call initialises the ONNX session
+        t0 = time.perf_counter()
+        ef(["warm up"])
+        timings["first_embed_s"] = time.perf_counter() - t0
+    except Exception as e:
+        timings["error"] = f"{type(e).__name__}: {e}"
+    timings["total_s"] = time.perf_counter() - t_start
+    timings["over_budget"] = timings["total_s"] > COLD_START_BUDGET_S
+    if timings["over_budget"]:
+        logger.warning("Warm-up took %.1fs (budget %.1fs)", timings["total_s"], COLD_START_BUDGET_S)
+    return timings
+
+def _run():
+    try:
+        _timings.update(warm_up())
+    finally:
+        _done.set()
+
+def start_warmup() -> bool:
+    """Starts warm_up() on a daemon thread, once per process. Returns True if it is running or done."""
+    global _thread
+    if not WARMUP_ENABLED:
+        return False
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="findoc-warmup", daemon=True)
+            _thread.start()
+    return True
+
+def wait_warm(timeout: float = None) -> bool:
+    """Blocks until the background warm-up has finished (False on timeout or if never started)."""
+    return _thread is not None and _done.wait(timeout)
+
+def warmup_status() -> dict:
+    return {"started": _thread is not None, "done": _done.is_set(), **_timings}